@@ -0,0 +1,173 @@
+"""
+Benchmark del cliente RCON contra el servidor simulado, sin red externa.
+
+Mide la latencia (p50/p99) y el rendimiento (comandos por segundo) de los
+distintos patrones de uso del cliente:
+
+- tcp-connect: solo el handshake TCP.
+- connect+auth: conexión y autenticación RCON.
+- one-shot: una conexión nueva por comando (el comportamiento original).
+- pooled: conexiones reutilizadas del pool, un comando en vuelo por conexión.
+- pipelined: una conexión compartida con varios comandos en vuelo.
+- batch: lotes enviados con `execute_many`.
+
+Uso:
+    python -m benchmarks.bench_rcon --commands 500 --concurrency 8 --latency-ms 2
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable
+
+from benchmarks.fake_servers import FakeRCONServer
+from minecontrol.rcon_client import RCONConnectionPool, SimpleRCONClient
+
+PASSWORD = "bench"
+
+
+class BenchResult:
+    """Muestras de latencia de un escenario y su tiempo total."""
+
+    def __init__(self, name: str, samples: list[float], elapsed: float, ops: int):
+        self.name = name
+        self.samples = sorted(samples)
+        self.elapsed = elapsed
+        self.ops = ops
+
+    def percentile(self, p: float) -> float:
+        if not self.samples:
+            return 0.0
+        index = min(len(self.samples) - 1, round(p / 100 * (len(self.samples) - 1)))
+        return self.samples[index]
+
+    def row(self) -> str:
+        throughput = self.ops / self.elapsed if self.elapsed else 0.0
+        return (
+            f"{self.name:<14} {self.ops:>7} {self.percentile(50) * 1000:>9.3f} "
+            f"{self.percentile(99) * 1000:>9.3f} {statistics.fmean(self.samples or [0]) * 1000:>9.3f} "
+            f"{throughput:>11.1f}"
+        )
+
+
+async def run_concurrent(
+    name: str, total: int, concurrency: int, op: Callable[[int], Awaitable[None]]
+) -> BenchResult:
+    """Ejecuta `op` `total` veces repartidas entre `concurrency` workers."""
+    samples: list[float] = []
+    counter = iter(range(total))
+
+    async def worker():
+        for i in counter:
+            start = time.perf_counter()
+            await op(i)
+            samples.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return BenchResult(name, samples, time.perf_counter() - start, total)
+
+
+async def bench_tcp_connect(port: int, total: int) -> BenchResult:
+    async def op(_):
+        _, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.close()
+        await writer.wait_closed()
+
+    return await run_concurrent("tcp-connect", total, 1, op)
+
+
+async def bench_connect_auth(port: int, total: int) -> BenchResult:
+    async def op(_):
+        client = SimpleRCONClient("127.0.0.1", port, PASSWORD)
+        await client.connect()
+        await client.close()
+
+    return await run_concurrent("connect+auth", total, 1, op)
+
+
+async def bench_one_shot(port: int, total: int, concurrency: int) -> BenchResult:
+    async def op(i):
+        async with SimpleRCONClient("127.0.0.1", port, PASSWORD) as client:
+            await client.execute("list")
+
+    return await run_concurrent("one-shot", total, concurrency, op)
+
+
+async def bench_pool(
+    port: int, total: int, concurrency: int, pipelined: bool
+) -> BenchResult:
+    pool = RCONConnectionPool(
+        "127.0.0.1", port, PASSWORD, size=concurrency, pipelined=pipelined
+    )
+    # La primera conexión no forma parte de la medida.
+    await pool.execute("list")
+
+    async def op(i):
+        await pool.execute("list")
+
+    name = "pipelined" if pipelined else "pooled"
+    result = await run_concurrent(name, total, concurrency, op)
+    await pool.close()
+    return result
+
+
+async def bench_batch(port: int, total: int, batch_size: int) -> BenchResult:
+    async with SimpleRCONClient("127.0.0.1", port, PASSWORD) as client:
+        batches = (total + batch_size - 1) // batch_size
+        samples: list[float] = []
+        start = time.perf_counter()
+        for _ in range(batches):
+            batch_start = time.perf_counter()
+            await client.execute_many(["list"] * batch_size)
+            samples.append(time.perf_counter() - batch_start)
+        elapsed = time.perf_counter() - start
+    return BenchResult(f"batch x{batch_size}", samples, elapsed, batches * batch_size)
+
+
+async def main(args: argparse.Namespace):
+    server = FakeRCONServer(
+        password=PASSWORD,
+        latency=args.latency_ms / 1000,
+        players=[f"player{i}" for i in range(args.players)],
+    )
+    port = await server.start()
+
+    print(
+        f"Servidor simulado en 127.0.0.1:{port} | latencia {args.latency_ms} ms | "
+        f"{args.commands} comandos | concurrencia {args.concurrency}"
+    )
+    print(
+        f"{'escenario':<14} {'ops':>7} {'p50 ms':>9} {'p99 ms':>9} {'media ms':>9} {'ops/s':>11} {'conexiones':>11}"
+    )
+
+    scenarios = [
+        lambda: bench_tcp_connect(port, args.commands),
+        lambda: bench_connect_auth(port, args.commands),
+        lambda: bench_one_shot(port, args.commands, args.concurrency),
+        lambda: bench_pool(port, args.commands, args.concurrency, pipelined=False),
+        lambda: bench_pool(port, args.commands, args.concurrency, pipelined=True),
+        lambda: bench_batch(port, args.commands, args.batch_size),
+    ]
+    try:
+        for scenario in scenarios:
+            connections_before = server.connections
+            result = await scenario()
+            print(f"{result.row()} {server.connections - connections_before:>11}")
+    finally:
+        await server.stop()
+
+
+def run():
+    parser = argparse.ArgumentParser(description="Benchmark del cliente RCON.")
+    parser.add_argument("--commands", type=int, default=500, help="Comandos por escenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Llamadas concurrentes")
+    parser.add_argument("--latency-ms", type=float, default=1.0, help="Latencia de red simulada")
+    parser.add_argument("--batch-size", type=int, default=50, help="Comandos por lote en execute_many")
+    parser.add_argument("--players", type=int, default=5, help="Jugadores conectados simulados")
+    asyncio.run(main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,309 @@
+import asyncio
+import json
+from typing import Callable
+
+from minecontrol.rcon_codec import (
+    SERVERDATA_AUTH,
+    SERVERDATA_AUTH_RESPONSE,
+    SERVERDATA_EXECCOMMAND,
+    SERVERDATA_RESPONSE_VALUE,
+    PacketDecoder,
+    PacketEncoder,
+)
+from minecontrol.slp_client import (
+    NEXT_STATE_STATUS,
+    PING_PACKET_ID,
+    STATUS_REQUEST_PACKET_ID,
+    decode_varint,
+    encode_packet,
+    encode_string,
+    read_packet,
+)
+
+# Tamaño máximo del payload de cada paquete de respuesta en Minecraft
+MAX_RESPONSE_PAYLOAD = 4096
+
+
+class FakeRCONServer:
+    """
+    Servidor RCON de Minecraft simulado que funciona sin red externa.
+
+    Implementa la autenticación, un puñado de comandos habituales (`list`, `say`,
+    `save-all`...) y trocea las respuestas largas en paquetes de 4096 bytes como
+    hace Minecraft. `latency` simula el retardo de red: cada respuesta se entrega
+    `latency` segundos después de procesar el comando, sin bloquear los siguientes,
+    y la autenticación paga un retardo extra para imitar el handshake TCP.
+    `processing_time` simula el hilo principal del servidor: los comandos de una
+    misma conexión se ejecutan de uno en uno.
+    """
+
+    def __init__(
+        self,
+        password: str = "password",
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        processing_time: float = 0.0,
+        players: list[str] | None = None,
+        max_players: int = 20,
+    ):
+        self.password = password
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.processing_time = processing_time
+        self.players: list[str] = list(players or [])
+        self.max_players = max_players
+        # Respuestas fijas por comando completo; tienen prioridad sobre las integradas.
+        self.responses: dict[str, str] = {}
+        self.commands_received: list[str] = []
+        self.connections = 0
+        self.auth_attempts = 0
+        self.saving_enabled = True
+        self._handlers: dict[str, Callable[[str], str]] = {
+            "list": self._cmd_list,
+            "say": lambda args: "",
+            "save-all": lambda args: "Saving the game (this may take a moment!)Saved the game",
+            "save-off": self._cmd_save_off,
+            "save-on": self._cmd_save_on,
+        }
+        self._server: asyncio.AbstractServer | None = None
+        self._clients: dict[asyncio.StreamWriter, asyncio.Task] = {}
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    async def start(self) -> int:
+        """Empieza a escuchar y devuelve el puerto asignado."""
+        self._server = await asyncio.start_server(
+            self._handle_client, self.host, self.port
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self):
+        """Deja de escuchar y corta las conexiones abiertas (como un servidor que se apaga)."""
+        if self._server is None:
+            return
+        self._server.close()
+        tasks = list(self._clients.values())
+        for writer, task in list(self._clients.items()):
+            writer.transport.abort()
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._server.wait_closed()
+        self._server = None
+
+    # --- Comandos integrados ---
+
+    def _cmd_list(self, args: str) -> str:
+        return (
+            f"There are {len(self.players)} of a max of {self.max_players} players online: "
+            + ", ".join(self.players)
+        )
+
+    def _cmd_save_off(self, args: str) -> str:
+        self.saving_enabled = False
+        return "Automatic saving is now disabled"
+
+    def _cmd_save_on(self, args: str) -> str:
+        self.saving_enabled = True
+        return "Automatic saving is now enabled"
+
+    def run_command(self, command: str) -> str:
+        """Devuelve la respuesta que el servidor daría a un comando."""
+        if command in self.responses:
+            return self.responses[command]
+        name, _, args = command.partition(" ")
+        handler = self._handlers.get(name)
+        if handler is None:
+            return f"Unknown or incomplete command, see below for error{command}<--[HERE]"
+        return handler(args)
+
+    # --- Protocolo ---
+
+    def _send(self, writer: asyncio.StreamWriter, data: bytes, delay: float):
+        """Entrega una respuesta ya codificada, aplicando la latencia simulada."""
+        if writer.is_closing():
+            return
+        if delay > 0:
+            asyncio.get_running_loop().call_later(delay, self._send, writer, data, 0)
+        else:
+            writer.write(data)
+
+    async def _handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        self.connections += 1
+        self._clients[writer] = asyncio.current_task()  # type: ignore
+        decoder = PacketDecoder()
+        encoder = PacketEncoder()
+        authenticated = False
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                decoder.feed(data)
+                for req_id, req_type, payload in decoder.packets():
+                    text = payload.decode("utf-8", errors="replace")
+
+                    if req_type == SERVERDATA_AUTH:
+                        self.auth_attempts += 1
+                        authenticated = text == self.password
+                        encoder.add(
+                            req_id if authenticated else -1, SERVERDATA_AUTH_RESPONSE
+                        )
+                        self._send(writer, encoder.take(), 2 * self.latency)
+                        continue
+
+                    if not authenticated:
+                        encoder.add(-1, SERVERDATA_AUTH_RESPONSE)
+                    elif req_type == SERVERDATA_EXECCOMMAND:
+                        self.commands_received.append(text)
+                        if self.processing_time:
+                            await asyncio.sleep(self.processing_time)
+                        body = self.run_command(text).encode("utf-8")
+                        for start in range(0, max(len(body), 1), MAX_RESPONSE_PAYLOAD):
+                            encoder.add(
+                                req_id,
+                                SERVERDATA_RESPONSE_VALUE,
+                                body[start : start + MAX_RESPONSE_PAYLOAD],
+                            )
+                    else:
+                        # Igual que Minecraft: responde a los tipos desconocidos con el
+                        # mismo ID, lo que permite usarlos como centinela.
+                        encoder.add(
+                            req_id,
+                            SERVERDATA_RESPONSE_VALUE,
+                            f"Unknown request {req_type:x}",
+                        )
+                    self._send(writer, encoder.take(), self.latency)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            # Cancelado por stop(): se termina sin propagar para no ensuciar el log de asyncio.
+            pass
+        finally:
+            self._clients.pop(writer, None)
+            writer.close()
+
+
+class FakeSLPServer:
+    """
+    Responde al Server List Ping en el puerto del juego como lo haría Minecraft.
+
+    Con `hang=True` acepta conexiones pero nunca responde, lo que permite simular
+    un servidor colgado (el puerto está abierto pero el proceso no atiende).
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        players: list[str] | None = None,
+        max_players: int = 20,
+        version_name: str = "1.21.1",
+        protocol: int = 767,
+        motd: str = "A Minecraft Server",
+        latency: float = 0.0,
+        hang: bool = False,
+    ):
+        self.host = host
+        self.port = port
+        self.players: list[str] = list(players or [])
+        self.max_players = max_players
+        self.version_name = version_name
+        self.protocol = protocol
+        self.motd = motd
+        self.latency = latency
+        self.hang = hang
+        self.handshakes: list[int] = []
+        self._server: asyncio.AbstractServer | None = None
+        self._clients: dict[asyncio.StreamWriter, asyncio.Task] = {}
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.stop()
+
+    async def start(self) -> int:
+        """Empieza a escuchar y devuelve el puerto asignado."""
+        self._server = await asyncio.start_server(
+            self._handle_client, self.host, self.port
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self):
+        """Deja de escuchar y corta las conexiones abiertas."""
+        if self._server is None:
+            return
+        self._server.close()
+        tasks = list(self._clients.values())
+        for writer, task in list(self._clients.items()):
+            writer.transport.abort()
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._server.wait_closed()
+        self._server = None
+
+    def status_json(self) -> dict:
+        """Documento JSON que el servidor devuelve en la respuesta de status."""
+        return {
+            "version": {"name": self.version_name, "protocol": self.protocol},
+            "players": {
+                "max": self.max_players,
+                "online": len(self.players),
+                "sample": [
+                    {"name": name, "id": f"00000000-0000-0000-0000-{i:012d}"}
+                    for i, name in enumerate(self.players[:12])
+                ],
+            },
+            "description": {"text": self.motd},
+        }
+
+    async def _handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        self._clients[writer] = asyncio.current_task()  # type: ignore
+        try:
+            if self.hang:
+                await reader.read()
+                return
+
+            _, handshake = await read_packet(reader)
+            _, offset = decode_varint(handshake)  # versión de protocolo
+            host_length, offset = decode_varint(handshake, offset)
+            offset += host_length + 2  # dirección y puerto
+            next_state, _ = decode_varint(handshake, offset)
+            self.handshakes.append(next_state)
+            if next_state != NEXT_STATE_STATUS:
+                return
+
+            while True:
+                packet_id, payload = await read_packet(reader)
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                if packet_id == STATUS_REQUEST_PACKET_ID:
+                    writer.write(
+                        encode_packet(
+                            STATUS_REQUEST_PACKET_ID,
+                            encode_string(json.dumps(self.status_json())),
+                        )
+                    )
+                elif packet_id == PING_PACKET_ID:
+                    writer.write(encode_packet(PING_PACKET_ID, payload))
+                    await writer.drain()
+                    return
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            self._clients.pop(writer, None)
+            writer.close()
@@ -0,0 +1,184 @@
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Entendiendo el patrón de actividad
+# Cada entrada y salida de jugador, y cada arranque y parada del servidor, se guarda
+# con su fecha en una base de datos SQLite (una serie temporal de eventos).
+# Para predecir la demanda, la semana se divide en franjas de SLOT_MINUTES minutos
+# (lunes 00:00-00:15, lunes 00:15-00:30...). Con los eventos de las últimas semanas
+# se reconstruyen los intervalos con algún jugador conectado y, para cada franja de
+# la semana, se calcula la fracción de semanas observadas en que hubo alguien: la
+# probabilidad de que haya jugadores ese día a esa hora.
+# - Las franjas usan la hora local, que es la que siguen los jugadores.
+# - Una parada del servidor cierra las sesiones abiertas, aunque falte el "left".
+# - Solo cuentan las semanas en que el bot ya registraba eventos.
+
+SLOT_MINUTES = 15
+SLOT_SECONDS = SLOT_MINUTES * 60
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+SLOTS_PER_WEEK = 7 * SLOTS_PER_DAY
+WEEK_SECONDS = 7 * 86400
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    timestamp REAL NOT NULL,
+    kind TEXT NOT NULL,
+    player TEXT
+);
+CREATE INDEX IF NOT EXISTS events_timestamp ON events (timestamp);
+"""
+
+PLAYER_JOINED = "joined"
+PLAYER_LEFT = "left"
+SERVER_STARTED = "started"
+SERVER_STOPPED = "stopped"
+
+
+class ActivityStore:
+    """Serie temporal de la actividad del servidor, guardada en SQLite."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Se usa desde hilos de `asyncio.to_thread`: una conexión compartida con lock.
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self) -> "ActivityStore":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record(self, kind: str, player: str | None = None, timestamp: float | None = None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO events VALUES (?, ?, ?)",
+                (timestamp if timestamp is not None else time.time(), kind, player),
+            )
+
+    def events_since(self, timestamp: float) -> list[tuple[float, str, str | None]]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT timestamp, kind, player FROM events WHERE timestamp >= ? ORDER BY timestamp",
+                (timestamp,),
+            ).fetchall()
+
+    def first_timestamp(self) -> float | None:
+        with self._lock:
+            row = self._conn.execute("SELECT MIN(timestamp) FROM events").fetchone()
+        return row[0] if row else None
+
+    def prune(self, before: float) -> int:
+        """Borra los eventos anteriores a `before`. Devuelve cuántos se borraron."""
+        with self._lock, self._conn:
+            return self._conn.execute("DELETE FROM events WHERE timestamp < ?", (before,)).rowcount
+
+
+def week_slot(moment: datetime) -> int:
+    """Franja de la semana (0 = lunes 00:00) a la que pertenece `moment`."""
+    return moment.weekday() * SLOTS_PER_DAY + (moment.hour * 60 + moment.minute) // SLOT_MINUTES
+
+
+def occupied_intervals(
+    events: list[tuple[float, str, str | None]], until: float
+) -> list[tuple[float, float]]:
+    """Intervalos (inicio, fin) con al menos un jugador conectado."""
+    intervals = []
+    online: set[str] = set()
+    started_at = None
+    for timestamp, kind, player in events:
+        if kind == PLAYER_JOINED and player:
+            if not online:
+                started_at = timestamp
+            online.add(player)
+        elif kind == PLAYER_LEFT and player:
+            online.discard(player)
+        elif kind in (SERVER_STARTED, SERVER_STOPPED):
+            online.clear()
+        if not online and started_at is not None:
+            intervals.append((started_at, timestamp))
+            started_at = None
+    if started_at is not None:
+        intervals.append((started_at, until))
+    return intervals
+
+
+class WeeklyPattern:
+    """Probabilidad de que haya jugadores en cada franja de la semana."""
+
+    def __init__(self, probabilities: list[float], weeks_observed: float):
+        self.probabilities = probabilities
+        self.weeks_observed = weeks_observed
+
+    @classmethod
+    def from_store(cls, store: ActivityStore, weeks: int = 8, now: float | None = None) -> "WeeklyPattern":
+        """Función bloqueante que aprende el patrón de las últimas `weeks` semanas."""
+        now = now if now is not None else time.time()
+        first = store.first_timestamp()
+        if first is None:
+            return cls([0.0] * SLOTS_PER_WEEK, 0.0)
+        start = max(first, now - weeks * WEEK_SECONDS)
+        return cls.from_events(store.events_since(start), start, now)
+
+    @classmethod
+    def from_events(
+        cls, events: list[tuple[float, str, str | None]], start: float, now: float
+    ) -> "WeeklyPattern":
+        # Franjas absolutas (número de franja desde la época) con algún jugador.
+        active: set[int] = set()
+        for begin, end in occupied_intervals(events, now):
+            first = int(begin // SLOT_SECONDS)
+            # El fin es exclusivo: quien se va a las 21:00 no ocupa la franja de 21:00.
+            last = max(first + 1, int(-(-end // SLOT_SECONDS)))
+            active.update(range(first, last))
+
+        observed = [0] * SLOTS_PER_WEEK
+        hits = [0] * SLOTS_PER_WEEK
+        # Solo franjas completas dentro del periodo observado.
+        for absolute in range(int(-(-start // SLOT_SECONDS)), int(now // SLOT_SECONDS)):
+            slot = week_slot(datetime.fromtimestamp(absolute * SLOT_SECONDS))
+            observed[slot] += 1
+            if absolute in active:
+                hits[slot] += 1
+
+        probabilities = [hit / seen if seen else 0.0 for hit, seen in zip(hits, observed)]
+        return cls(probabilities, (now - start) / WEEK_SECONDS)
+
+    def probability(self, moment: datetime) -> float:
+        return self.probabilities[week_slot(moment)]
+
+    def next_demand(self, now: float, horizon_minutes: float, threshold: float) -> float | None:
+        """
+        Inicio de la primera franja de las próximas `horizon_minutes` en que suele
+        haber jugadores (probabilidad >= `threshold`), o None.
+        """
+        first = int(now // SLOT_SECONDS)
+        last = int((now + horizon_minutes * 60) // SLOT_SECONDS)
+        for absolute in range(first, last + 1):
+            moment = absolute * SLOT_SECONDS
+            if self.probability(datetime.fromtimestamp(moment)) >= threshold:
+                return max(moment, now)
+        return None
+
+    def demand_onset(self, now: float, horizon_minutes: float, threshold: float) -> float | None:
+        """
+        Inicio de la próxima franja en que empieza la demanda (la anterior está por
+        debajo del umbral) dentro de las próximas `horizon_minutes`, o None.
+        """
+        first = int(now // SLOT_SECONDS) + 1
+        last = int((now + horizon_minutes * 60) // SLOT_SECONDS)
+        for absolute in range(first, last + 1):
+            moment = absolute * SLOT_SECONDS
+            current = self.probability(datetime.fromtimestamp(moment))
+            previous = self.probability(datetime.fromtimestamp(moment - SLOT_SECONDS))
+            if current >= threshold > previous:
+                return moment
+        return None
@@ -0,0 +1,213 @@
+import json
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Entendiendo el catálogo de backups
+# Una base de datos SQLite en la carpeta de backups con una fila por backup (zip o
+# snapshot incremental): fecha, mundo, tamaño, duración y checksum. Listar o podar
+# los backups consulta el catálogo en lugar de recorrer la carpeta.
+# La política de retención se escribe como "hourly=24,daily=14,weekly=8": se guarda
+# el backup más reciente de cada hora de las últimas 24 horas, de cada día de los
+# últimos 14 días y de cada semana de las últimas 8 semanas. El backup más reciente
+# nunca se borra.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS backups (
+    id TEXT PRIMARY KEY,
+    world_name TEXT NOT NULL,
+    format TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    size_bytes INTEGER NOT NULL,
+    stored_bytes INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    checksum TEXT NOT NULL,
+    location TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS backups_created_at ON backups (created_at);
+"""
+
+RETENTION_PERIODS = {
+    "hourly": 3600,
+    "daily": 86400,
+    "weekly": 7 * 86400,
+    "monthly": 30 * 86400,
+}
+
+
+class RetentionPolicyError(ValueError):
+    """La política de retención está mal escrita."""
+
+    pass
+
+
+class BackupRecord:
+    """Un backup registrado en el catálogo."""
+
+    def __init__(
+        self,
+        backup_id: str,
+        world_name: str,
+        format: str,
+        created_at: float,
+        size_bytes: int,
+        stored_bytes: int,
+        duration: float,
+        checksum: str,
+        location: str,
+    ):
+        self.id = backup_id
+        self.world_name = world_name
+        # "zip" o "incremental"
+        self.format = format
+        self.created_at = created_at
+        # Tamaño del mundo respaldado y bytes que ocupó en disco el backup.
+        self.size_bytes = size_bytes
+        self.stored_bytes = stored_bytes
+        self.duration = duration
+        self.checksum = checksum
+        # Ruta del .zip o ID del manifiesto en el almacén.
+        self.location = location
+
+    def as_row(self) -> tuple:
+        return (
+            self.id, self.world_name, self.format, self.created_at, self.size_bytes,
+            self.stored_bytes, self.duration, self.checksum, self.location,
+        )
+
+    def __repr__(self) -> str:
+        return f"BackupRecord({self.id!r}, format={self.format!r}, size={self.size_bytes})"
+
+
+class BackupCatalog:
+    """Índice persistente de los backups, guardado en SQLite."""
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Se usa desde hilos de `asyncio.to_thread`; SQLite serializa las escrituras.
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self) -> "BackupCatalog":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, record: BackupRecord):
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO backups VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                record.as_row(),
+            )
+
+    def remove(self, backup_id: str):
+        with self._conn:
+            self._conn.execute("DELETE FROM backups WHERE id = ?", (backup_id,))
+
+    def get(self, backup_id: str) -> BackupRecord | None:
+        row = self._conn.execute("SELECT * FROM backups WHERE id = ?", (backup_id,)).fetchone()
+        return BackupRecord(*row) if row else None
+
+    def list(self, world_name: str | None = None, limit: int | None = None) -> list[BackupRecord]:
+        """Backups del más reciente al más antiguo."""
+        query = "SELECT * FROM backups"
+        params: list = []
+        if world_name is not None:
+            query += " WHERE world_name = ?"
+            params.append(world_name)
+        query += " ORDER BY created_at DESC"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return [BackupRecord(*row) for row in self._conn.execute(query, params)]
+
+    def is_empty(self) -> bool:
+        return self._conn.execute("SELECT 1 FROM backups LIMIT 1").fetchone() is None
+
+
+def parse_retention(spec: str) -> dict[str, int]:
+    """Convierte "hourly=24,daily=14,weekly=8" en un diccionario. Admite también "last=N"."""
+    policy: dict[str, int] = {}
+    for part in spec.replace(" ", "").split(","):
+        if not part:
+            continue
+        key, _, value = part.partition("=")
+        if key not in RETENTION_PERIODS and key != "last":
+            raise RetentionPolicyError(
+                f"Periodo de retención desconocido: '{key}'. Opciones: last, {', '.join(RETENTION_PERIODS)}."
+            )
+        try:
+            policy[key] = int(value)
+        except ValueError:
+            raise RetentionPolicyError(f"Valor inválido para '{key}': '{value}'.")
+    return policy
+
+
+def _bucket(timestamp: float, period: str) -> tuple:
+    moment = datetime.fromtimestamp(timestamp)
+    if period == "hourly":
+        return (moment.date(), moment.hour)
+    if period == "daily":
+        return (moment.date(),)
+    if period == "weekly":
+        return tuple(moment.isocalendar()[:2])
+    return (moment.year, moment.month)
+
+
+def select_backups_to_keep(
+    records: list[BackupRecord], policy: dict[str, int], now: float | None = None
+) -> set[str]:
+    """Aplica la política de retención y devuelve los IDs que se conservan."""
+    now = time.time() if now is None else now
+    ordered = sorted(records, key=lambda record: record.created_at, reverse=True)
+    keep = {record.id for record in ordered[: max(1, policy.get("last", 0))]}
+
+    for period, seconds in RETENTION_PERIODS.items():
+        count = policy.get(period, 0)
+        if count <= 0:
+            continue
+        seen = set()
+        for record in ordered:
+            if now - record.created_at > count * seconds:
+                break
+            bucket = _bucket(record.created_at, period)
+            if bucket not in seen:
+                seen.add(bucket)
+                keep.add(record.id)
+    return keep
+
+
+def import_existing_backups(catalog: BackupCatalog, backup_dir: Path):
+    """
+    Registra los backups que ya había en disco antes de existir el catálogo.
+
+    Solo se usa una vez, cuando el catálogo está vacío; la duración y el checksum
+    de esos backups se desconocen.
+    """
+    for archive in sorted(Path(backup_dir).glob("*.zip")):
+        st = archive.stat()
+        world_name = archive.name.split("_backup_")[0]
+        catalog.add(
+            BackupRecord(
+                archive.name, world_name, "zip", st.st_mtime, st.st_size,
+                st.st_size, 0.0, "", str(archive),
+            )
+        )
+
+    snapshots_dir = Path(backup_dir) / "store" / "snapshots"
+    for manifest_path in sorted(snapshots_dir.glob("*.json")):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        size = sum(entry["size"] for entry in data["files"].values())
+        catalog.add(
+            BackupRecord(
+                data["id"], data["world_name"], "incremental", data["created_at"],
+                size, 0, 0.0, "", data["id"],
+            )
+        )
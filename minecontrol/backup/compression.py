@@ -0,0 +1,164 @@
+import zlib
+from pathlib import Path
+
+# Dependencias opcionales: solo hacen falta si se eligen esos códecs.
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:  # pragma: no cover
+    lz4_frame = None
+
+CODECS = ("deflate", "zstd", "lz4", "none")
+DEFAULT_LEVELS = {"deflate": 6, "zstd": 3, "lz4": 0, "none": 0}
+
+# Archivos cuyo contenido ya va comprimido: recomprimirlos gasta CPU sin ahorrar espacio.
+# Las regiones (.mca/.mcc) guardan cada chunk con zlib y los .dat de Minecraft son
+# NBT en gzip, que se detecta por su cabecera.
+PRECOMPRESSED_SUFFIXES = {
+    ".mca", ".mcc", ".gz", ".zip", ".jar", ".png", ".jpg", ".jpeg",
+    ".zst", ".lz4", ".xz", ".bz2", ".7z",
+}
+COMPRESSED_MAGICS = (
+    b"\x1f\x8b",  # gzip
+    b"\x28\xb5\x2f\xfd",  # zstd
+    b"\x04\x22\x4d\x18",  # lz4
+    b"PK\x03\x04",  # zip
+)
+
+
+class BackupCompressionError(Exception):
+    """El códec pedido no existe o su librería no está instalada."""
+
+    pass
+
+
+def is_precompressed(path: Path, head: bytes) -> bool:
+    """Indica si no vale la pena comprimir un archivo, por su extensión o sus primeros bytes."""
+    return path.suffix.lower() in PRECOMPRESSED_SUFFIXES or head.startswith(COMPRESSED_MAGICS)
+
+
+def resolve_level(codec: str, level: int | None) -> int:
+    return DEFAULT_LEVELS[codec] if level is None else level
+
+
+def check_codec(codec: str):
+    """Lanza `BackupCompressionError` si el códec no se puede usar en esta instalación."""
+    if codec not in CODECS:
+        raise BackupCompressionError(
+            f"Códec de compresión desconocido: '{codec}'. Opciones: {', '.join(CODECS)}."
+        )
+    if codec == "zstd" and zstandard is None:
+        raise BackupCompressionError("El códec 'zstd' necesita el paquete 'zstandard' (pip install zstandard).")
+    if codec == "lz4" and lz4_frame is None:
+        raise BackupCompressionError("El códec 'lz4' necesita el paquete 'lz4' (pip install lz4).")
+
+
+class _NullCompressor:
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def flush(self) -> bytes:
+        return b""
+
+    def decompress(self, data: bytes) -> bytes:
+        return data
+
+
+class _LZ4Compressor:
+    def __init__(self, level: int):
+        self._compressor = lz4_frame.LZ4FrameCompressor(compression_level=level)  # type: ignore
+        self._started = False
+
+    def compress(self, data: bytes) -> bytes:
+        out = b""
+        if not self._started:
+            out = self._compressor.begin()
+            self._started = True
+        return out + self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        out = b"" if self._started else self._compressor.begin()
+        return out + self._compressor.flush()
+
+
+def compressor(codec: str, level: int | None = None):
+    """
+    Devuelve un compresor en streaming con `compress(datos)` y `flush()`.
+
+    El resultado es un flujo autocontenido (zlib, frame zstd o frame lz4) que
+    `decompressor(codec)` sabe leer.
+    """
+    check_codec(codec)
+    level = resolve_level(codec, level)
+    if codec == "deflate":
+        return zlib.compressobj(level)
+    if codec == "zstd":
+        return zstandard.ZstdCompressor(level=level).compressobj()  # type: ignore
+    if codec == "lz4":
+        return _LZ4Compressor(level)
+    return _NullCompressor()
+
+
+def decompressor(codec: str):
+    """Devuelve un descompresor en streaming con `decompress(datos)`."""
+    check_codec(codec)
+    if codec == "deflate":
+        return zlib.decompressobj()
+    if codec == "zstd":
+        return zstandard.ZstdDecompressor().decompressobj()  # type: ignore
+    if codec == "lz4":
+        return lz4_frame.LZ4FrameDecompressor()  # type: ignore
+    return _NullCompressor()
+
+
+# --- CRC-32 de trozos comprimidos por separado ---
+# Al repartir un archivo grande entre varios procesos, cada uno calcula el CRC de su
+# trozo. crc32_combine obtiene el CRC del archivo completo a partir de esos CRC y de
+# las longitudes, sin volver a leer los datos (mismo algoritmo que zlib y pigz).
+
+
+def _gf2_matrix_times(matrix: list[int], vector: int) -> int:
+    total = 0
+    i = 0
+    while vector:
+        if vector & 1:
+            total ^= matrix[i]
+        vector >>= 1
+        i += 1
+    return total
+
+
+def _gf2_matrix_square(matrix: list[int]) -> list[int]:
+    return [_gf2_matrix_times(matrix, row) for row in matrix]
+
+
+def crc32_combine(crc1: int, crc2: int, len2: int) -> int:
+    """CRC-32 de A+B a partir de crc32(A), crc32(B) y len(B)."""
+    if len2 <= 0:
+        return crc1
+
+    # Operador de "un bit cero" y sus potencias: dos y cuatro bits cero.
+    odd = [0xEDB88320] + [1 << n for n in range(31)]
+    even = _gf2_matrix_square(odd)
+    odd = _gf2_matrix_square(even)
+
+    # Aplica len2 bytes cero a crc1, elevando el operador al cuadrado en cada paso.
+    while True:
+        even = _gf2_matrix_square(odd)
+        if len2 & 1:
+            crc1 = _gf2_matrix_times(even, crc1)
+        len2 >>= 1
+        if not len2:
+            break
+        odd = _gf2_matrix_square(even)
+        if len2 & 1:
+            crc1 = _gf2_matrix_times(odd, crc1)
+        len2 >>= 1
+        if not len2:
+            break
+
+    return crc1 ^ crc2
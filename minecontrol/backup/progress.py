@@ -0,0 +1,153 @@
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+from .throttle import MB
+
+# Entendiendo el progreso de un backup
+# Las funciones bloqueantes del backup (snapshot, almacén incremental, .zip en
+# paralelo) se ejecutan en otro hilo y van sumando bytes y archivos procesados en un
+# `BackupProgress`. Es el único estado compartido: se protege con un lock y el lado
+# asíncrono solo lo lee con `snapshot()`, a su ritmo, sin que el hilo del backup
+# tenga que esperar nunca al bucle de eventos.
+# - Cada fase ("Copiando", "Comprimiendo"...) tiene sus totales, calculados antes de
+#   empezar recorriendo la carpeta (solo `stat`, no se lee ningún archivo).
+# - La velocidad se mide en una ventana de los últimos RATE_WINDOW_SECONDS, para que
+#   refleje el estado actual del disco y no el promedio desde el principio. La ETA
+#   usa esa velocidad.
+
+RATE_WINDOW_SECONDS = 10.0
+BAR_WIDTH = 16
+
+
+def scan_directory(path: Path) -> tuple[int, int]:
+    """Cuenta los archivos y bytes de una carpeta. Devuelve (archivos, bytes)."""
+    files = size = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                size += os.stat(os.path.join(dirpath, name)).st_size
+            except FileNotFoundError:
+                continue
+            files += 1
+    return files, size
+
+
+class ProgressSnapshot:
+    """Foto del progreso en un instante, para mostrarla."""
+
+    def __init__(
+        self,
+        phase: str,
+        done_bytes: int,
+        total_bytes: int,
+        done_files: int,
+        total_files: int,
+        elapsed: float,
+        rate: float,
+    ):
+        self.phase = phase
+        self.done_bytes = done_bytes
+        self.total_bytes = total_bytes
+        self.done_files = done_files
+        self.total_files = total_files
+        self.elapsed = elapsed
+        self.rate = rate
+
+    @property
+    def fraction(self) -> float | None:
+        if self.total_bytes <= 0:
+            return None
+        return min(1.0, self.done_bytes / self.total_bytes)
+
+    @property
+    def eta(self) -> float | None:
+        """Segundos que faltan según la velocidad actual, o None si no se sabe."""
+        if self.total_bytes <= 0 or self.rate <= 0:
+            return None
+        return max(0.0, self.total_bytes - self.done_bytes) / self.rate
+
+    def describe(self) -> str:
+        lines = [f"**{self.phase}**"]
+        fraction = self.fraction
+        if fraction is not None:
+            filled = round(fraction * BAR_WIDTH)
+            lines.append(f"`{'█' * filled}{'░' * (BAR_WIDTH - filled)}` {fraction:.0%}")
+        total = f" / {self.total_bytes / MB:.1f}" if self.total_bytes > 0 else ""
+        files = f" / {self.total_files}" if self.total_files > 0 else ""
+        lines.append(
+            f"{self.done_bytes / MB:.1f}{total} MB · {self.done_files}{files} archivos"
+        )
+        eta = self.eta
+        lines.append(
+            f"{self.rate / MB:.1f} MB/s · {format_duration(self.elapsed)} transcurridos"
+            + (f" · quedan ~{format_duration(eta)}" if eta is not None else "")
+        )
+        return "\n".join(lines)
+
+
+def format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds:02d}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m"
+
+
+class BackupProgress:
+    """Contador de bytes y archivos procesados, seguro entre hilos."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.phase = "Preparando"
+        self.total_bytes = 0
+        self.total_files = 0
+        self.done_bytes = 0
+        self.done_files = 0
+        self._phase_start = time.monotonic()
+        self._samples: deque[tuple[float, int]] = deque([(self._phase_start, 0)])
+
+    def start_phase(self, phase: str, total_files: int = 0, total_bytes: int = 0):
+        """Empieza una fase nueva con sus totales (0 = desconocido)."""
+        with self._lock:
+            self.phase = phase
+            self.total_files = total_files
+            self.total_bytes = total_bytes
+            self.done_files = 0
+            self.done_bytes = 0
+            self._phase_start = time.monotonic()
+            self._samples.clear()
+            self._samples.append((self._phase_start, 0))
+
+    def advance(self, size: int = 0, files: int = 0):
+        """Suma `size` bytes y `files` archivos procesados. Se llama desde el hilo del backup."""
+        with self._lock:
+            self.done_bytes += size
+            self.done_files += files
+
+    def snapshot(self) -> ProgressSnapshot:
+        now = time.monotonic()
+        with self._lock:
+            samples = self._samples
+            samples.append((now, self.done_bytes))
+            while len(samples) > 2 and now - samples[1][0] >= RATE_WINDOW_SECONDS:
+                samples.popleft()
+            oldest_time, oldest_bytes = samples[0]
+            if now - oldest_time > 0:
+                rate = (self.done_bytes - oldest_bytes) / (now - oldest_time)
+            else:
+                rate = 0.0
+            return ProgressSnapshot(
+                self.phase,
+                self.done_bytes,
+                self.total_bytes,
+                self.done_files,
+                self.total_files,
+                now - self._phase_start,
+                rate,
+            )
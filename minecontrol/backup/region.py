@@ -0,0 +1,128 @@
+import struct
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .store import BackupStore
+
+# Entendiendo los archivos de región (formato Anvil, .mca)
+# Cada archivo guarda 32x32 = 1024 chunks y se divide en sectores de 4 KiB.
+# - Sector 0: 1024 entradas de 4 bytes con la posición de cada chunk:
+#   desplazamiento en sectores (3 bytes, big-endian) | número de sectores (1 byte).
+#   Un 0 significa que el chunk no se ha generado.
+# - Sector 1: 1024 marcas de tiempo (4 bytes, big-endian) de la última escritura.
+# - Cada chunk empieza en su sector con: Longitud (4 bytes) | Compresión (1 byte) | Datos.
+#   La longitud cuenta el byte de compresión y los datos.
+# Cuando un jugador modifica un solo chunk, el servidor reescribe ese chunk y su
+# marca de tiempo, pero la fecha de modificación del archivo completo cambia. Por eso
+# el backup guarda cada chunk como un objeto propio y solo lee de nuevo los chunks
+# cuya marca de tiempo o tamaño cambió.
+
+SECTOR_SIZE = 4096
+CHUNKS_PER_REGION = 1024
+HEADER_SIZE = 2 * SECTOR_SIZE
+CHUNK_LENGTH = struct.Struct(">I")
+REGION_SUFFIX = ".mca"
+
+# (índice del chunk, marca de tiempo, sectores, hash del contenido)
+ChunkRef = tuple[int, int, int, str]
+
+
+class RegionFormatError(Exception):
+    """El archivo no tiene el formato Anvil esperado."""
+
+    pass
+
+
+def is_region_file(path: Path) -> bool:
+    return path.suffix == REGION_SUFFIX
+
+
+def parse_region_header(header: bytes) -> list[tuple[int, int, int, int]]:
+    """Devuelve (índice, sector inicial, sectores, marca de tiempo) de cada chunk generado."""
+    if len(header) < HEADER_SIZE:
+        raise RegionFormatError("Cabecera de región incompleta.")
+    locations = struct.unpack_from(">1024I", header, 0)
+    timestamps = struct.unpack_from(">1024I", header, SECTOR_SIZE)
+    chunks = []
+    for index, location in enumerate(locations):
+        if location == 0:
+            continue
+        offset, sectors = location >> 8, location & 0xFF
+        if offset < 2 or sectors == 0:
+            raise RegionFormatError(f"Posición inválida para el chunk {index}.")
+        chunks.append((index, offset, sectors, timestamps[index]))
+    return chunks
+
+
+def store_region_file(
+    store: "BackupStore", path: Path, previous: list[ChunkRef] | None
+) -> tuple[list[ChunkRef], int, int]:
+    """
+    Guarda los chunks de un archivo de región y devuelve (chunks, bytes leídos, bytes nuevos).
+
+    Un chunk con la misma marca de tiempo y el mismo número de sectores que en
+    `previous` reutiliza su hash sin leer los datos.
+    """
+    known = {index: (timestamp, sectors, digest) for index, timestamp, sectors, digest in previous or []}
+    chunks: list[ChunkRef] = []
+    read = stored = 0
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+        read += len(header)
+        store.account(read=len(header))
+        for index, offset, sectors, timestamp in parse_region_header(header):
+            old = known.get(index)
+            if old is not None and old[0] == timestamp and old[1] == sectors:
+                chunks.append((index, timestamp, sectors, old[2]))
+                continue
+
+            f.seek(offset * SECTOR_SIZE)
+            prefix = f.read(CHUNK_LENGTH.size)
+            if len(prefix) < CHUNK_LENGTH.size:
+                raise RegionFormatError(f"El chunk {index} está fuera del archivo.")
+            (length,) = CHUNK_LENGTH.unpack(prefix)
+            if not 0 < length <= sectors * SECTOR_SIZE - CHUNK_LENGTH.size:
+                raise RegionFormatError(f"Longitud inválida para el chunk {index}: {length}")
+            data = f.read(length)
+            if len(data) < length:
+                raise RegionFormatError(f"El chunk {index} está truncado.")
+            read += CHUNK_LENGTH.size + length
+            store.account(read=CHUNK_LENGTH.size + length)
+
+            # Los datos del chunk ya van comprimidos (zlib, normalmente).
+            digest, new_bytes = store.put_bytes(prefix + data, precompressed=True)
+            stored += new_bytes
+            chunks.append((index, timestamp, sectors, digest))
+    return chunks, read, stored
+
+
+def write_region_file(
+    store: "BackupStore", chunks: list[ChunkRef], path: Path, verify: bool = False
+):
+    """
+    Reconstruye un archivo de región a partir de sus chunks guardados.
+
+    Los chunks se colocan de forma consecutiva tras la cabecera, así que el archivo
+    puede no ser idéntico byte a byte al original (se pierden los sectores libres),
+    pero el servidor lo lee igual.
+    """
+    locations = [0] * CHUNKS_PER_REGION
+    timestamps = [0] * CHUNKS_PER_REGION
+    next_sector = HEADER_SIZE // SECTOR_SIZE
+    with open(path, "wb") as f:
+        f.seek(HEADER_SIZE)
+        for index, timestamp, _, digest in sorted(chunks, key=lambda chunk: chunk[0]):
+            payload = store.read_object(digest, verify)
+            sectors = -(-len(payload) // SECTOR_SIZE)
+            if sectors > 0xFF:
+                raise RegionFormatError(f"El chunk {index} ocupa demasiados sectores.")
+            f.write(payload)
+            f.write(b"\0" * (sectors * SECTOR_SIZE - len(payload)))
+            locations[index] = next_sector << 8 | sectors
+            timestamps[index] = timestamp
+            next_sector += sectors
+
+        f.seek(0)
+        f.write(struct.pack(">1024I", *locations))
+        f.write(struct.pack(">1024I", *timestamps))
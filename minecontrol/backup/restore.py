@@ -0,0 +1,171 @@
+import ctypes
+import os
+import shutil
+import struct
+import time
+import zipfile
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path, PurePosixPath
+
+from .compression import decompressor
+
+# Entendiendo la restauración
+# Restaurar un backup tiene tres fases, pensadas para que el servidor esté apagado
+# el menor tiempo posible:
+# 1. Extraer el backup en una carpeta temporal junto al mundo (en el mismo sistema de
+#    archivos), en paralelo y comprobando cada archivo: el hash SHA-256 de los
+#    snapshots incrementales o el CRC-32 que guarda el .zip. Esto se hace con el
+#    servidor todavía encendido: el mundo en uso no se toca.
+# 2. Apagar el servidor.
+# 3. Intercambiar las carpetas. En Linux, renameat2(RENAME_EXCHANGE) cambia las dos
+#    rutas en una sola operación atómica; en otros sistemas se hacen dos renombrados.
+#    El mundo anterior no se borra: queda en la carpeta temporal para deshacer.
+
+READ_BLOCK_SIZE = 1024 * 1024
+LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+ZIP_DECOMPRESSORS = {
+    zipfile.ZIP_STORED: lambda: decompressor("none"),
+    zipfile.ZIP_DEFLATED: lambda: zlib.decompressobj(-15),
+    93: lambda: decompressor("zstd"),  # Zstandard, ver zip_writer.py
+}
+
+AT_FDCWD = -100
+RENAME_EXCHANGE = 2
+
+
+class RestoreError(Exception):
+    """El backup no se puede restaurar: está dañado o no tiene el formato esperado."""
+
+    pass
+
+
+def _safe_member_path(name: str) -> PurePosixPath:
+    path = PurePosixPath(name)
+    if path.is_absolute() or ".." in path.parts:
+        raise RestoreError(f"Ruta no permitida dentro del .zip: '{name}'")
+    return path
+
+
+def _extract_member(archive_path: Path, info: zipfile.ZipInfo, target: Path):
+    """Extrae un archivo del .zip leyendo sus datos en bruto y comprobando su CRC."""
+    make_decompressor = ZIP_DECOMPRESSORS.get(info.compress_type)
+    if make_decompressor is None:
+        raise RestoreError(f"Método de compresión no soportado en '{info.filename}'.")
+    reader = make_decompressor()
+    crc = size = 0
+    with open(archive_path, "rb") as f, open(target, "wb") as out:
+        f.seek(info.header_offset)
+        header = f.read(LOCAL_HEADER.size)
+        if len(header) < LOCAL_HEADER.size or header[:4] != b"PK\x03\x04":
+            raise RestoreError(f"Cabecera local dañada en '{info.filename}'.")
+        name_length, extra_length = LOCAL_HEADER.unpack(header)[-2:]
+        f.seek(name_length + extra_length, os.SEEK_CUR)
+
+        remaining = info.compress_size
+        while remaining > 0:
+            block = f.read(min(READ_BLOCK_SIZE, remaining))
+            if not block:
+                raise RestoreError(f"'{info.filename}' está truncado.")
+            remaining -= len(block)
+            try:
+                data = reader.decompress(block)
+            except Exception as e:  # zlib.error, ZstdError...
+                raise RestoreError(f"'{info.filename}' está dañado: {e}")
+            crc = zlib.crc32(data, crc)
+            size += len(data)
+            out.write(data)
+        if hasattr(reader, "flush"):
+            data = reader.flush()
+            crc = zlib.crc32(data, crc)
+            size += len(data)
+            out.write(data)
+
+    if crc != info.CRC or size != info.file_size:
+        raise RestoreError(f"'{info.filename}' está dañado: el CRC o el tamaño no coinciden.")
+    mtime = time.mktime(info.date_time + (0, 0, -1))
+    os.utime(target, (mtime, mtime))
+
+
+def extract_zip(archive_path: Path, target_dir: Path, workers: int = 0) -> Path:
+    """
+    Función bloqueante que extrae un backup .zip en `target_dir` usando `workers`
+    hilos (0 = uno por núcleo) y devuelve la carpeta del mundo extraída.
+
+    Admite los .zip de `write_parallel_zip` (incluido zstd) y los antiguos de
+    `shutil.make_archive`. Todos los archivos deben colgar de una única carpeta.
+    """
+    archive_path = Path(archive_path)
+    try:
+        with zipfile.ZipFile(archive_path) as archive:
+            members = archive.infolist()
+    except zipfile.BadZipFile as e:
+        raise RestoreError(f"'{archive_path.name}' no es un .zip válido: {e}")
+
+    top_levels = {_safe_member_path(info.filename).parts[0] for info in members}
+    if len(top_levels) != 1:
+        raise RestoreError("El .zip debe contener una única carpeta de mundo.")
+    world_dir = Path(target_dir) / top_levels.pop()
+    if world_dir.exists():
+        raise RestoreError(f"La carpeta '{world_dir}' ya existe.")
+
+    files = []
+    for info in members:
+        path = Path(target_dir) / _safe_member_path(info.filename)
+        if info.is_dir():
+            path.mkdir(parents=True, exist_ok=True)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            files.append((info, path))
+
+    files.sort(key=lambda item: item[0].compress_size, reverse=True)
+    with ThreadPoolExecutor(workers or os.cpu_count() or 1) as pool:
+        futures = [pool.submit(_extract_member, archive_path, info, path) for info, path in files]
+        try:
+            for future in as_completed(futures):
+                future.result()
+        except BaseException:
+            pool.shutdown(cancel_futures=True)
+            raise
+    return world_dir
+
+
+def exchange_directories(a: Path, b: Path) -> bool:
+    """
+    Intercambia dos rutas. Devuelve True si el intercambio fue atómico.
+
+    Ambas deben estar en el mismo sistema de archivos. Sin renameat2, `a` pasa a
+    una ruta temporal durante un instante.
+    """
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        renameat2 = libc.renameat2
+    except (OSError, AttributeError):
+        renameat2 = None
+    if renameat2 is not None:
+        result = renameat2(AT_FDCWD, os.fsencode(a), AT_FDCWD, os.fsencode(b), RENAME_EXCHANGE)
+        if result == 0:
+            return True
+
+    tmp = a.with_name(a.name + ".swap")
+    os.rename(a, tmp)
+    os.rename(b, a)
+    os.rename(tmp, b)
+    return False
+
+
+def swap_world(staged_world: Path, world_dir: Path, keep_previous: Path) -> Path | None:
+    """
+    Función bloqueante que coloca `staged_world` en `world_dir`.
+
+    El mundo anterior se mueve a `keep_previous` (reemplazando uno anterior) y se
+    devuelve esa ruta, o None si no había mundo.
+    """
+    if not world_dir.exists():
+        os.rename(staged_world, world_dir)
+        return None
+    if keep_previous.exists():
+        shutil.rmtree(keep_previous)
+    exchange_directories(staged_world, world_dir)
+    os.rename(staged_world, keep_previous)
+    return keep_previous
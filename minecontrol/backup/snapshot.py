@@ -0,0 +1,135 @@
+import errno
+import os
+import shutil
+from pathlib import Path
+
+from .progress import BackupProgress, scan_directory
+from .throttle import BackupThrottle
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+# Entendiendo el snapshot previo al backup
+# Comprimir el mundo lleva minutos y, mientras tanto, el servidor no puede guardar
+# (save-off). En lugar de eso se hace primero una copia instantánea de la carpeta del
+# mundo, se reactiva el guardado y se comprime la copia con calma.
+# - Reflink (ioctl FICLONE en Btrfs, XFS, bcachefs...): los dos archivos comparten los
+#   bloques del disco hasta que uno cambia. Es casi instantáneo y no ocupa espacio.
+# - Hardlink: solo es seguro con archivos que Minecraft reemplaza escribiendo uno
+#   temporal y renombrándolo (level.dat, playerdata/*.dat); así el enlace conserva la
+#   versión anterior. Las regiones (.mca) se reescriben en el sitio: un hardlink
+#   cambiaría junto con el original, así que se copian.
+# - Copia normal en el resto de casos.
+# Las fechas de modificación se conservan para que el backup incremental pueda seguir
+# saltándose los archivos sin cambios.
+
+FICLONE = 0x40049409
+COPY_BLOCK_SIZE = 1024 * 1024
+REFLINK_UNSUPPORTED = {errno.EOPNOTSUPP, errno.EXDEV, errno.EINVAL, errno.ENOTTY, errno.ENOSYS}
+
+
+def is_replaced_atomically(rel_path: str) -> bool:
+    """Archivos que el servidor sustituye con escribir-temporal-y-renombrar."""
+    return rel_path in ("level.dat", "level.dat_old") or (
+        rel_path.startswith("playerdata/") and rel_path.endswith(".dat")
+    )
+
+
+def reflink_file(src: Path, dst: Path):
+    """Clona `src` en `dst` compartiendo bloques. Lanza OSError si el sistema de archivos no lo admite."""
+    if fcntl is None:
+        raise OSError(errno.ENOSYS, "reflink no disponible en esta plataforma")
+    with open(src, "rb") as s, open(dst, "wb") as d:
+        try:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        except OSError:
+            d.close()
+            dst.unlink(missing_ok=True)
+            raise
+    shutil.copystat(src, dst)
+
+
+def supports_reflink(directory: Path) -> bool:
+    """Prueba si se pueden clonar archivos dentro de `directory`."""
+    probe = Path(directory) / ".reflink-probe"
+    clone = Path(directory) / ".reflink-probe-clone"
+    try:
+        probe.write_bytes(b"minecontrol")
+        reflink_file(probe, clone)
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.unlink(missing_ok=True)
+        clone.unlink(missing_ok=True)
+
+
+def copy_file_throttled(src: Path, dst: Path, throttle: BackupThrottle | None):
+    """Como `shutil.copy2`, pero por bloques y respetando el límite de MB/s."""
+    if throttle is None:
+        shutil.copy2(src, dst)
+        return
+    with open(src, "rb") as s, open(dst, "wb") as d:
+        while block := s.read(COPY_BLOCK_SIZE):
+            throttle.read(len(block))
+            throttle.write(len(block))
+            d.write(block)
+    shutil.copystat(src, dst)
+
+
+def snapshot_directory(
+    source: Path,
+    target: Path,
+    use_reflink: bool = True,
+    throttle: BackupThrottle | None = None,
+    progress: BackupProgress | None = None,
+) -> dict[str, int]:
+    """
+    Función bloqueante que replica `source` en `target` lo más barato posible.
+
+    `target` no debe existir. Devuelve cuántos archivos se clonaron, enlazaron y copiaron.
+    Solo las copias normales cuentan para `throttle`; clonar y enlazar no mueven datos.
+    """
+    counts = {"reflink": 0, "hardlink": 0, "copy": 0}
+    if progress is not None:
+        progress.start_phase("Copiando el mundo", *scan_directory(source))
+    target.mkdir(parents=True)
+    for dirpath, dirnames, filenames in os.walk(source):
+        folder = Path(dirpath)
+        rel_folder = folder.relative_to(source)
+        for name in dirnames:
+            (target / rel_folder / name).mkdir()
+        for name in filenames:
+            src = folder / name
+            dst = target / rel_folder / name
+            rel_path = (rel_folder / name).as_posix()
+            try:
+                method = None
+                if use_reflink:
+                    try:
+                        reflink_file(src, dst)
+                        method = "reflink"
+                    except OSError as e:
+                        if e.errno not in REFLINK_UNSUPPORTED:
+                            raise
+                        use_reflink = False
+
+                if method is None and is_replaced_atomically(rel_path):
+                    try:
+                        os.link(src, dst)
+                        method = "hardlink"
+                    except OSError:
+                        pass
+
+                if method is None:
+                    copy_file_throttled(src, dst, throttle)
+                    method = "copy"
+                counts[method] += 1
+                if progress is not None:
+                    progress.advance(dst.stat().st_size, 1)
+            except FileNotFoundError:
+                # Archivos temporales que el servidor borra mientras recorremos.
+                continue
+    return counts
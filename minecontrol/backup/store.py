@@ -0,0 +1,503 @@
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import BinaryIO
+
+from .compression import (
+    check_codec,
+    compressor,
+    decompressor,
+    is_precompressed,
+)
+from .region import (
+    ChunkRef,
+    RegionFormatError,
+    is_region_file,
+    store_region_file,
+    write_region_file,
+)
+from .progress import BackupProgress, scan_directory
+from .throttle import BackupThrottle
+
+# Entendiendo el almacén de backups
+# En lugar de un .zip completo por backup, cada archivo del mundo se guarda una sola
+# vez en `objects/`, con su hash SHA-256 como nombre (direccionado por contenido).
+# Cada backup (snapshot) es un manifiesto JSON en `snapshots/` que lista las rutas
+# del mundo con su tamaño, fecha de modificación y hash.
+# - Un archivo con el mismo tamaño y mtime que en el snapshot anterior no se vuelve a
+#   leer: se reutiliza su hash.
+# - Un archivo modificado se lee una vez, calculando el hash mientras se copia; si el
+#   contenido ya existía (p. ej. se tocó sin cambiar) no se guarda de nuevo.
+# Así, después del primer snapshot cada backup solo cuesta los bytes que cambiaron.
+# Los archivos de región (.mca) se guardan chunk a chunk (ver `region.py`): su
+# entrada en el manifiesto lista los chunks en lugar de un único hash.
+# El hash es siempre el del contenido original; cada objeto indica con qué códec se
+# comprimió, de modo que cambiar el códec no invalida los objetos existentes. Lo que
+# ya viene comprimido (chunks de región, NBT en gzip) se guarda tal cual.
+#
+# store/
+#   objects/ab/abcdef0123...   contenido de un archivo: 1 byte con el códec + datos
+#   snapshots/<id>.json        manifiesto de un snapshot
+#   tmp/                       escrituras a medio terminar
+
+READ_BLOCK_SIZE = 1024 * 1024
+MANIFEST_VERSION = 1
+CODEC_IDS = {"none": 0, "deflate": 1, "zstd": 2, "lz4": 3}
+CODEC_NAMES = {codec_id: name for name, codec_id in CODEC_IDS.items()}
+
+
+class BackupStoreError(Exception):
+    """El almacén de backups está incompleto o un snapshot no existe."""
+
+    pass
+
+
+class FileEntry:
+    """
+    Un archivo del mundo dentro de un snapshot.
+
+    Los archivos normales tienen `digest`; los archivos de región guardados por
+    chunks tienen `chunks` y `digest` vacío.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        size: int,
+        mtime_ns: int,
+        digest: str = "",
+        chunks: list[ChunkRef] | None = None,
+    ):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.digest = digest
+        self.chunks = chunks
+
+    def object_digests(self) -> list[str]:
+        """Hashes de todos los objetos que necesita este archivo."""
+        if self.chunks is not None:
+            return [chunk[3] for chunk in self.chunks]
+        return [self.digest]
+
+    def to_dict(self) -> dict:
+        data = {"size": self.size, "mtime_ns": self.mtime_ns}
+        if self.chunks is not None:
+            data["chunks"] = [list(chunk) for chunk in self.chunks]
+        else:
+            data["digest"] = self.digest
+        return data
+
+    @classmethod
+    def from_dict(cls, path: str, data: dict) -> "FileEntry":
+        chunks = data.get("chunks")
+        return cls(
+            path,
+            data["size"],
+            data["mtime_ns"],
+            data.get("digest", ""),
+            [tuple(chunk) for chunk in chunks] if chunks is not None else None,  # type: ignore
+        )
+
+
+class SnapshotManifest:
+    """Lista de archivos (y carpetas vacías) que forman un snapshot del mundo."""
+
+    def __init__(
+        self,
+        snapshot_id: str,
+        world_name: str,
+        created_at: float,
+        files: dict[str, FileEntry] | None = None,
+        directories: list[str] | None = None,
+    ):
+        self.id = snapshot_id
+        self.world_name = world_name
+        self.created_at = created_at
+        self.files = files or {}
+        self.directories = directories or []
+
+    @property
+    def total_size(self) -> int:
+        return sum(entry.size for entry in self.files.values())
+
+    def to_dict(self) -> dict:
+        return {
+            "version": MANIFEST_VERSION,
+            "id": self.id,
+            "world_name": self.world_name,
+            "created_at": self.created_at,
+            "directories": self.directories,
+            "files": {path: entry.to_dict() for path, entry in sorted(self.files.items())},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SnapshotManifest":
+        return cls(
+            data["id"],
+            data["world_name"],
+            data["created_at"],
+            {path: FileEntry.from_dict(path, entry) for path, entry in data["files"].items()},
+            data.get("directories", []),
+        )
+
+
+class BackupStats:
+    """Resumen de lo que costó crear un snapshot."""
+
+    def __init__(self):
+        self.files_total = 0
+        self.files_changed = 0
+        self.bytes_total = 0
+        self.bytes_read = 0
+        self.bytes_stored = 0
+        self.elapsed = 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"BackupStats(files={self.files_changed}/{self.files_total}, "
+            f"read={self.bytes_read}, stored={self.bytes_stored}, elapsed={self.elapsed:.2f}s)"
+        )
+
+
+class BackupStore:
+    """Almacén de objetos direccionado por contenido más los manifiestos de snapshots."""
+
+    def __init__(
+        self,
+        root: Path,
+        codec: str = "deflate",
+        level: int | None = None,
+        throttle: BackupThrottle | None = None,
+    ):
+        check_codec(codec)
+        self.codec = codec
+        self.level = level
+        # Límite de MB/s para leer el mundo y escribir objetos (ver `throttle.py`).
+        self.throttle = throttle
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.snapshots_dir = self.root / "snapshots"
+        self.tmp_dir = self.root / "tmp"
+        for folder in (self.objects_dir, self.snapshots_dir, self.tmp_dir):
+            folder.mkdir(parents=True, exist_ok=True)
+
+    def object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / digest
+
+    def account(self, read: int = 0, written: int = 0):
+        """Descuenta los bytes leídos o escritos del límite, si lo hay."""
+        if self.throttle is not None:
+            if read:
+                self.throttle.read(read)
+            if written:
+                self.throttle.write(written)
+
+    def has_object(self, digest: str) -> bool:
+        return self.object_path(digest).exists()
+
+    def _open_object(self, digest: str) -> tuple[BinaryIO, str]:
+        """Abre un objeto y devuelve el archivo (tras el byte del códec) y el códec."""
+        try:
+            f = open(self.object_path(digest), "rb")
+        except FileNotFoundError:
+            raise BackupStoreError(f"Falta el objeto {digest} en el almacén.")
+        head = f.read(1)
+        codec = CODEC_NAMES.get(head[0]) if head else None
+        if codec is None:
+            f.close()
+            raise BackupStoreError(f"El objeto {digest} está dañado.")
+        return f, codec
+
+    def read_object(self, digest: str, verify: bool = False) -> bytes:
+        """Devuelve el contenido original de un objeto pequeño."""
+        f, codec = self._open_object(digest)
+        with f:
+            try:
+                data = decompressor(codec).decompress(f.read())
+            except Exception as e:  # zlib.error, ZstdError, RuntimeError de lz4...
+                raise BackupStoreError(f"El objeto {digest} está dañado: {e}")
+        if verify and hashlib.sha256(data).hexdigest() != digest:
+            raise BackupStoreError(f"El objeto {digest} está dañado: su hash no coincide.")
+        return data
+
+    def copy_object(self, digest: str, dst: BinaryIO, verify: bool = False):
+        """Escribe el contenido original de un objeto en `dst`, por bloques."""
+        f, codec = self._open_object(digest)
+        reader = decompressor(codec)
+        hasher = hashlib.sha256() if verify else None
+        with f:
+            while block := f.read(READ_BLOCK_SIZE):
+                try:
+                    data = reader.decompress(block)
+                except Exception as e:
+                    raise BackupStoreError(f"El objeto {digest} está dañado: {e}")
+                if hasher is not None:
+                    hasher.update(data)
+                dst.write(data)
+        if hasher is not None and hasher.hexdigest() != digest:
+            raise BackupStoreError(f"El objeto {digest} está dañado: su hash no coincide.")
+
+    def put_bytes(self, data: bytes, precompressed: bool = False) -> tuple[str, int]:
+        """Guarda un objeto pequeño ya en memoria. Devuelve (hash, bytes nuevos guardados)."""
+        digest = hashlib.sha256(data).hexdigest()
+        target = self.object_path(digest)
+        if target.exists():
+            return digest, 0
+        codec = "none" if precompressed else self.codec
+        writer = compressor(codec, self.level)
+        payload = bytes([CODEC_IDS[codec]]) + writer.compress(data) + writer.flush()
+        target.parent.mkdir(exist_ok=True)
+        tmp_path = self.tmp_dir / f"{os.getpid()}-{time.monotonic_ns()}"
+        try:
+            self.account(written=len(payload))
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, target)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        return digest, len(payload)
+
+    def put_file(self, source: Path) -> tuple[str, int, int]:
+        """
+        Copia `source` al almacén calculando su hash en la misma lectura.
+
+        Devuelve (hash, bytes leídos, bytes nuevos guardados). Si el contenido ya
+        estaba en el almacén, la copia temporal se descarta.
+        """
+        hasher = hashlib.sha256()
+        read = 0
+        tmp_path = self.tmp_dir / f"{os.getpid()}-{time.monotonic_ns()}"
+        try:
+            with open(source, "rb") as src, open(tmp_path, "wb") as dst:
+                block = src.read(READ_BLOCK_SIZE)
+                codec = "none" if is_precompressed(source, block[:4]) else self.codec
+                writer = compressor(codec, self.level)
+                dst.write(bytes([CODEC_IDS[codec]]))
+                while block:
+                    hasher.update(block)
+                    data = writer.compress(block)
+                    self.account(read=len(block), written=len(data))
+                    dst.write(data)
+                    read += len(block)
+                    block = src.read(READ_BLOCK_SIZE)
+                dst.write(writer.flush())
+                stored = dst.tell()
+
+            digest = hasher.hexdigest()
+            target = self.object_path(digest)
+            if target.exists():
+                return digest, read, 0
+            target.parent.mkdir(exist_ok=True)
+            os.replace(tmp_path, target)
+            return digest, read, stored
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def list_snapshots(self) -> list[str]:
+        """IDs de los snapshots, del más antiguo al más reciente."""
+        return sorted(path.stem for path in self.snapshots_dir.glob("*.json"))
+
+    def load_manifest(self, snapshot_id: str) -> SnapshotManifest:
+        path = self.snapshots_dir / f"{snapshot_id}.json"
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return SnapshotManifest.from_dict(json.load(f))
+        except FileNotFoundError:
+            raise BackupStoreError(f"No existe el snapshot '{snapshot_id}'.")
+
+    def latest_manifest(self, world_name: str | None = None) -> SnapshotManifest | None:
+        for snapshot_id in reversed(self.list_snapshots()):
+            manifest = self.load_manifest(snapshot_id)
+            if world_name is None or manifest.world_name == world_name:
+                return manifest
+        return None
+
+    def save_manifest(self, manifest: SnapshotManifest):
+        """Escribe el manifiesto de forma atómica: un snapshot a medias nunca es visible."""
+        path = self.snapshots_dir / f"{manifest.id}.json"
+        tmp_path = self.tmp_dir / f"{manifest.id}.json"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest.to_dict(), f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def manifest_checksum(self, snapshot_id: str) -> str:
+        """SHA-256 del manifiesto, que a su vez fija el hash de cada archivo del snapshot."""
+        return sha256_file(self.snapshots_dir / f"{snapshot_id}.json")
+
+    def delete_snapshot(self, snapshot_id: str):
+        """Borra el manifiesto. Los objetos quedan hasta el siguiente `collect_garbage`."""
+        (self.snapshots_dir / f"{snapshot_id}.json").unlink(missing_ok=True)
+
+    def collect_garbage(self) -> tuple[int, int]:
+        """
+        Borra los objetos que ya no usa ningún snapshot. Devuelve (objetos, bytes liberados).
+
+        No debe ejecutarse mientras se crea un snapshot: sus objetos aún no están
+        en ningún manifiesto.
+        """
+        referenced: set[str] = set()
+        for snapshot_id in self.list_snapshots():
+            for entry in self.load_manifest(snapshot_id).files.values():
+                referenced.update(entry.object_digests())
+
+        removed = freed = 0
+        for path in self.objects_dir.glob("*/*"):
+            if path.name not in referenced:
+                freed += path.stat().st_size
+                path.unlink()
+                removed += 1
+        for path in self.tmp_dir.iterdir():
+            path.unlink(missing_ok=True)
+        return removed, freed
+
+    def new_snapshot_id(self, world_name: str) -> str:
+        snapshot_id = f"{world_name}_{datetime.now().strftime('%Y-%m-%d_%H-%M-%S')}"
+        existing = set(self.list_snapshots())
+        candidate, n = snapshot_id, 1
+        while candidate in existing:
+            n += 1
+            candidate = f"{snapshot_id}_{n}"
+        return candidate
+
+
+def sha256_file(path: Path) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        while block := f.read(READ_BLOCK_SIZE):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def create_snapshot(
+    store: BackupStore,
+    source_dir: Path,
+    world_name: str,
+    progress: BackupProgress | None = None,
+) -> tuple[SnapshotManifest, BackupStats]:
+    """
+    Función bloqueante que guarda la carpeta `source_dir/world_name` como snapshot.
+
+    Solo se leen los archivos cuyo tamaño o fecha de modificación cambió respecto
+    al último snapshot del mismo mundo y, dentro de los archivos de región, solo
+    los chunks cuya marca de tiempo cambió. Cada archivo revisado se suma a `progress`.
+    """
+    start = time.perf_counter()
+    stats = BackupStats()
+    world_dir = Path(source_dir) / world_name
+    previous = store.latest_manifest(world_name)
+    previous_files = previous.files if previous else {}
+    manifest = SnapshotManifest(store.new_snapshot_id(world_name), world_name, time.time())
+    if progress is not None:
+        progress.start_phase("Guardando los cambios", *scan_directory(world_dir))
+
+    for dirpath, dirnames, filenames in os.walk(world_dir):
+        dirnames.sort()
+        folder = Path(dirpath)
+        rel_folder = folder.relative_to(world_dir).as_posix()
+        if not filenames and not dirnames and rel_folder != ".":
+            manifest.directories.append(rel_folder)
+
+        for name in sorted(filenames):
+            path = folder / name
+            rel_path = path.relative_to(world_dir).as_posix()
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                # El servidor puede borrar archivos temporales mientras recorremos.
+                continue
+
+            stats.files_total += 1
+            stats.bytes_total += st.st_size
+            try:
+                old = previous_files.get(rel_path)
+                if (
+                    old is not None
+                    and old.size == st.st_size
+                    and old.mtime_ns == st.st_mtime_ns
+                    and all(store.has_object(digest) for digest in old.object_digests())
+                ):
+                    manifest.files[rel_path] = old
+                    continue
+
+                stats.files_changed += 1
+                if is_region_file(path) and st.st_size > 0:
+                    try:
+                        chunks, read, stored = store_region_file(
+                            store, path, old.chunks if old is not None else None
+                        )
+                        stats.bytes_read += read
+                        stats.bytes_stored += stored
+                        manifest.files[rel_path] = FileEntry(
+                            rel_path, st.st_size, st.st_mtime_ns, chunks=chunks
+                        )
+                        continue
+                    except RegionFormatError as e:
+                        # Regiones vacías o dañadas: se guardan como un archivo más.
+                        print(f"Backup: '{rel_path}' se guarda completo ({e})")
+
+                digest, read, stored = store.put_file(path)
+                stats.bytes_read += read
+                stats.bytes_stored += stored
+                manifest.files[rel_path] = FileEntry(rel_path, read, st.st_mtime_ns, digest)
+            finally:
+                if progress is not None:
+                    progress.advance(st.st_size, 1)
+
+    store.save_manifest(manifest)
+    stats.elapsed = time.perf_counter() - start
+    return manifest, stats
+
+
+def restore_snapshot(
+    store: BackupStore,
+    snapshot_id: str,
+    target_dir: Path,
+    workers: int = 0,
+    verify: bool = True,
+) -> Path:
+    """
+    Función bloqueante que reconstruye el snapshot en `target_dir/<nombre del mundo>`.
+
+    La carpeta de destino no debe existir: no se sobrescribe ningún mundo. Los
+    archivos se reconstruyen en `workers` hilos (0 = uno por núcleo), empezando por
+    los más grandes; zlib, zstd y hashlib liberan el GIL con bloques grandes, así
+    que los hilos aprovechan varios núcleos sin copiar datos entre procesos. Con
+    `verify`, el contenido de cada objeto se compara con el hash del manifiesto.
+    """
+    manifest = store.load_manifest(snapshot_id)
+    world_dir = Path(target_dir) / manifest.world_name
+    if world_dir.exists():
+        raise BackupStoreError(f"La carpeta '{world_dir}' ya existe.")
+
+    world_dir.mkdir(parents=True)
+    for rel_folder in manifest.directories:
+        (world_dir / rel_folder).mkdir(parents=True, exist_ok=True)
+    for rel_path in manifest.files:
+        (world_dir / rel_path).parent.mkdir(parents=True, exist_ok=True)
+
+    def restore_file(entry: FileEntry):
+        path = world_dir / entry.path
+        if entry.chunks is not None:
+            write_region_file(store, entry.chunks, path, verify)
+        else:
+            with open(path, "wb") as dst:
+                store.copy_object(entry.digest, dst, verify)
+        os.utime(path, ns=(entry.mtime_ns, entry.mtime_ns))
+
+    entries = sorted(manifest.files.values(), key=lambda entry: entry.size, reverse=True)
+    with ThreadPoolExecutor(workers or os.cpu_count() or 1) as pool:
+        futures = [pool.submit(restore_file, entry) for entry in entries]
+        try:
+            for future in as_completed(futures):
+                future.result()
+        except BaseException:
+            pool.shutdown(cancel_futures=True)
+            raise
+    return world_dir
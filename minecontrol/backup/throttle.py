@@ -0,0 +1,167 @@
+import ctypes
+import os
+import platform
+import threading
+import time
+
+# Entendiendo la limitación de E/S de los backups
+# Un backup en el mismo disco que el servidor compite con él por la E/S y el
+# servidor lo nota como caídas de TPS y chunks que tardan en cargar. Tres palancas:
+# - Límite de MB/s de lectura y de escritura (cubo de tokens): cada bloque leído o
+#   escrito consume tokens y, si no quedan, el hilo del backup espera.
+# - Prioridad: el hilo y los procesos del backup bajan su prioridad de CPU (nice) y
+#   de E/S (ioprio_set), así el planificador atiende antes al servidor.
+# - Adaptación: mientras dura el backup se mide el MSPT del servidor; si pasa del
+#   objetivo el límite se reduce a la mitad y, si se recupera, vuelve a subir poco a poco.
+
+MB = 1024 * 1024
+# Ráfaga máxima permitida: medio segundo de tráfico.
+BURST_SECONDS = 0.5
+MIN_RATE = 1 * MB
+# Por encima de esto la adaptación deja de limitar si no había un límite configurado.
+UNLIMITED_RATE = 1024 * MB
+
+IOPRIO_CLASS_SHIFT = 13
+IOPRIO_CLASS_BE = 2
+IOPRIO_CLASS_IDLE = 3
+IOPRIO_WHO_PROCESS = 1
+SYS_IOPRIO_SET = {"x86_64": 251, "aarch64": 30, "i686": 289, "armv7l": 314}
+PRIORITIES = {
+    # (incremento de nice, clase de E/S, nivel de E/S)
+    "normal": None,
+    "low": (10, IOPRIO_CLASS_BE, 7),
+    "idle": (19, IOPRIO_CLASS_IDLE, 0),
+}
+
+
+def lower_io_priority(priority: str = "low"):
+    """
+    Baja la prioridad de CPU y de E/S del hilo o proceso que la llama.
+
+    En Linux tanto nice como ioprio se aplican al hilo actual, por eso el backup se
+    ejecuta en un hilo propio que termina con él. En otros sistemas solo se aplica nice.
+    """
+    settings = PRIORITIES.get(priority)
+    if settings is None:
+        return
+    nice, io_class, io_level = settings
+    try:
+        os.nice(nice)
+    except (AttributeError, OSError):
+        pass
+
+    syscall_number = SYS_IOPRIO_SET.get(platform.machine())
+    if platform.system() != "Linux" or syscall_number is None:
+        return
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.syscall(
+            syscall_number, IOPRIO_WHO_PROCESS, 0, io_class << IOPRIO_CLASS_SHIFT | io_level
+        )
+    except (OSError, AttributeError):
+        pass
+
+
+class RateLimiter:
+    """Cubo de tokens en bytes por segundo, seguro entre hilos. `rate=None` = sin límite."""
+
+    def __init__(self, rate: float | None = None):
+        self._rate = rate
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.total = 0
+
+    @property
+    def rate(self) -> float | None:
+        return self._rate
+
+    @rate.setter
+    def rate(self, value: float | None):
+        with self._lock:
+            self._refill()
+            self._rate = value
+
+    def _refill(self):
+        now = time.monotonic()
+        if self._rate is not None:
+            self._tokens = min(
+                self._rate * BURST_SECONDS, self._tokens + (now - self._updated) * self._rate
+            )
+        self._updated = now
+
+    def consume(self, amount: int):
+        """Descuenta `amount` bytes y duerme lo necesario para respetar el límite."""
+        with self._lock:
+            self.total += amount
+            if self._rate is None:
+                return
+            self._refill()
+            self._tokens -= amount
+            wait = -self._tokens / self._rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+
+class BackupThrottle:
+    """Límites de lectura y escritura de un backup, ajustables mientras se ejecuta."""
+
+    def __init__(self, read_rate: float | None = None, write_rate: float | None = None):
+        self.reads = RateLimiter(read_rate)
+        self.writes = RateLimiter(write_rate)
+        self.base_rates = (read_rate, write_rate)
+        self._window_start = time.monotonic()
+        self._window_bytes = 0
+
+    @classmethod
+    def from_mb(cls, read_mb: float, write_mb: float) -> "BackupThrottle":
+        """Crea los límites a partir de MB/s; 0 significa sin límite."""
+        return cls(read_mb * MB if read_mb > 0 else None, write_mb * MB if write_mb > 0 else None)
+
+    def read(self, amount: int):
+        self.reads.consume(amount)
+
+    def write(self, amount: int):
+        self.writes.consume(amount)
+
+    def observed_rate(self) -> float:
+        """Bytes por segundo (lectura + escritura) desde la última llamada."""
+        now = time.monotonic()
+        total = self.reads.total + self.writes.total
+        elapsed = now - self._window_start
+        rate = (total - self._window_bytes) / elapsed if elapsed > 0 else 0.0
+        self._window_start, self._window_bytes = now, total
+        return rate
+
+    def adapt(self, mspt: float, target_mspt: float) -> bool:
+        """
+        Ajusta los límites según el MSPT medido. Devuelve True si cambiaron.
+
+        Si el servidor va por encima del objetivo, los límites bajan a la mitad (o a
+        la mitad de lo observado, si no había límite). Por debajo del 70 % del
+        objetivo suben un 25 %, sin pasar de los configurados.
+        """
+        observed = self.observed_rate()
+        changed = False
+        for limiter, base in zip((self.reads, self.writes), self.base_rates):
+            current = limiter.rate
+            if mspt > target_mspt:
+                reference = current if current is not None else max(observed, MIN_RATE * 2)
+                new_rate = max(MIN_RATE, reference / 2)
+            elif mspt < target_mspt * 0.7 and current is not None:
+                new_rate = current * 1.25
+                ceiling = base if base is not None else UNLIMITED_RATE
+                if new_rate >= ceiling:
+                    new_rate = base
+            else:
+                continue
+            if new_rate != current:
+                limiter.rate = new_rate
+                changed = True
+        return changed
+
+    def describe(self) -> str:
+        def fmt(rate):
+            return "sin límite" if rate is None else f"{rate / MB:.1f} MB/s"
+
+        return f"lectura {fmt(self.reads.rate)}, escritura {fmt(self.writes.rate)}"
@@ -0,0 +1,419 @@
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+
+# Dependencia opcional: solo hace falta para subir a S3 (o MinIO, Ceph, R2...).
+try:
+    import boto3
+    from botocore.config import Config as BotoConfig
+    from botocore.exceptions import ClientError
+except ImportError:  # pragma: no cover
+    boto3 = None
+
+from .catalog import BackupRecord
+from .store import BackupStore
+
+# Entendiendo la subida de backups
+# Cada backup terminado se copia a un destino externo (una carpeta, p. ej. un disco
+# de red montado, o un bucket S3) a través de un `BackupUploader`.
+# - Solo se sube lo que falta: el almacén incremental ya es direccionado por
+#   contenido, así que se listan los objetos remotos y se envían únicamente los
+#   nuevos; un .zip que ya existe en el destino con el mismo tamaño se omite.
+# - Los archivos grandes se suben por partes (multipart), varias a la vez con un
+#   número limitado de conexiones.
+# - Se puede reanudar: `upload-state.json` guarda los backups pendientes y el ID de
+#   cada subida por partes; al reanudar se pregunta al destino qué partes tiene ya.
+# - El manifiesto de un snapshot se sube el último: hasta entonces el snapshot no
+#   existe en el destino, aunque ya estén algunos de sus objetos.
+
+STATE_FILE = "upload-state.json"
+
+
+class UploadError(Exception):
+    """Fallo al subir un backup, o destino mal configurado."""
+
+    pass
+
+
+class UploadStats:
+    def __init__(self):
+        self.files_total = 0
+        self.files_sent = 0
+        self.bytes_sent = 0
+        self.parts_resumed = 0
+        self.elapsed = 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"UploadStats(files={self.files_sent}/{self.files_total}, sent={self.bytes_sent}, "
+            f"resumed_parts={self.parts_resumed}, elapsed={self.elapsed:.2f}s)"
+        )
+
+
+class BackupUploader:
+    """
+    Interfaz de un destino de subida. Las claves son rutas relativas con '/'.
+
+    Los métodos son bloqueantes y deben poder llamarse desde varios hilos a la vez.
+    """
+
+    def list_keys(self, prefix: str) -> dict[str, int]:
+        """Claves que empiezan por `prefix`, con su tamaño."""
+        raise NotImplementedError
+
+    def put_file(self, key: str, path: Path):
+        raise NotImplementedError
+
+    def create_multipart(self, key: str) -> str:
+        """Empieza una subida por partes y devuelve su ID."""
+        raise NotImplementedError
+
+    def list_parts(self, key: str, upload_id: str) -> dict[int, str] | None:
+        """Partes ya recibidas (número -> etiqueta), o None si la subida ya no existe."""
+        raise NotImplementedError
+
+    def upload_part(self, key: str, upload_id: str, number: int, data: bytes) -> str:
+        raise NotImplementedError
+
+    def complete_multipart(self, key: str, upload_id: str, parts: dict[int, str]):
+        raise NotImplementedError
+
+    def abort_multipart(self, key: str, upload_id: str):
+        """Descarta una subida por partes y sus partes. No falla si ya no existe."""
+        raise NotImplementedError
+
+    def describe(self) -> str:
+        raise NotImplementedError
+
+
+class LocalDirectoryUploader(BackupUploader):
+    """Copia los backups a otra carpeta, normalmente un disco distinto o una unidad de red."""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.uploads_dir = self.root / ".uploads"
+        self.uploads_dir.mkdir(parents=True, exist_ok=True)
+
+    def _write_atomic(self, target: Path, write):
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(f".{target.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                write(f)
+            os.replace(tmp_path, target)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def list_keys(self, prefix: str) -> dict[str, int]:
+        keys = {}
+        base = self.root / prefix
+        folder = base if base.is_dir() else base.parent
+        if not folder.exists():
+            return keys
+        for dirpath, dirnames, filenames in os.walk(folder):
+            dirnames[:] = [name for name in dirnames if name != ".uploads"]
+            for name in filenames:
+                if name.startswith("."):
+                    continue
+                path = Path(dirpath) / name
+                key = path.relative_to(self.root).as_posix()
+                if key.startswith(prefix):
+                    keys[key] = path.stat().st_size
+        return keys
+
+    def put_file(self, key: str, path: Path):
+        with open(path, "rb") as src:
+            self._write_atomic(self.root / key, lambda dst: shutil.copyfileobj(src, dst))
+
+    def create_multipart(self, key: str) -> str:
+        upload_id = uuid.uuid4().hex
+        (self.uploads_dir / upload_id).mkdir()
+        return upload_id
+
+    def list_parts(self, key: str, upload_id: str) -> dict[int, str] | None:
+        folder = self.uploads_dir / upload_id
+        if not folder.is_dir():
+            return None
+        return {int(path.stem): path.stem for path in folder.glob("*.part")}
+
+    def upload_part(self, key: str, upload_id: str, number: int, data: bytes) -> str:
+        folder = self.uploads_dir / upload_id
+        if not folder.is_dir():
+            raise UploadError(f"La subida {upload_id} ya no existe.")
+        self._write_atomic(folder / f"{number}.part", lambda f: f.write(data))
+        return str(number)
+
+    def complete_multipart(self, key: str, upload_id: str, parts: dict[int, str]):
+        folder = self.uploads_dir / upload_id
+
+        def join(dst):
+            for number in sorted(parts):
+                with open(folder / f"{number}.part", "rb") as src:
+                    shutil.copyfileobj(src, dst)
+
+        self._write_atomic(self.root / key, join)
+        shutil.rmtree(folder, ignore_errors=True)
+
+    def abort_multipart(self, key: str, upload_id: str):
+        shutil.rmtree(self.uploads_dir / upload_id, ignore_errors=True)
+
+    def describe(self) -> str:
+        return f"la carpeta `{self.root}`"
+
+
+class S3Uploader(BackupUploader):
+    """Sube los backups a un bucket S3 o compatible (MinIO, Ceph, R2...)."""
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        endpoint_url: str | None = None,
+        region: str | None = None,
+        access_key: str | None = None,
+        secret_key: str | None = None,
+        max_connections: int = 4,
+    ):
+        if boto3 is None:
+            raise UploadError("La subida a S3 necesita el paquete 'boto3' (pip install boto3).")
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url or None,
+            region_name=region or None,
+            aws_access_key_id=access_key or None,
+            aws_secret_access_key=secret_key or None,
+            # Un hilo de subida por conexión; boto3 reintenta los errores transitorios.
+            config=BotoConfig(
+                max_pool_connections=max_connections,
+                retries={"max_attempts": 5, "mode": "standard"},
+            ),
+        )
+
+    def list_keys(self, prefix: str) -> dict[str, int]:
+        keys = {}
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix + prefix):
+            for item in page.get("Contents", []):
+                keys[item["Key"][len(self.prefix):]] = item["Size"]
+        return keys
+
+    def put_file(self, key: str, path: Path):
+        with open(path, "rb") as f:
+            self.client.put_object(Bucket=self.bucket, Key=self.prefix + key, Body=f)
+
+    def create_multipart(self, key: str) -> str:
+        response = self.client.create_multipart_upload(Bucket=self.bucket, Key=self.prefix + key)
+        return response["UploadId"]
+
+    def list_parts(self, key: str, upload_id: str) -> dict[int, str] | None:
+        parts = {}
+        paginator = self.client.get_paginator("list_parts")
+        try:
+            for page in paginator.paginate(
+                Bucket=self.bucket, Key=self.prefix + key, UploadId=upload_id
+            ):
+                for part in page.get("Parts", []):
+                    parts[part["PartNumber"]] = part["ETag"]
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "NoSuchUpload":
+                return None
+            raise
+        return parts
+
+    def upload_part(self, key: str, upload_id: str, number: int, data: bytes) -> str:
+        response = self.client.upload_part(
+            Bucket=self.bucket, Key=self.prefix + key, UploadId=upload_id,
+            PartNumber=number, Body=data,
+        )
+        return response["ETag"]
+
+    def complete_multipart(self, key: str, upload_id: str, parts: dict[int, str]):
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=self.prefix + key,
+            UploadId=upload_id,
+            MultipartUpload={
+                "Parts": [{"PartNumber": number, "ETag": parts[number]} for number in sorted(parts)]
+            },
+        )
+
+    def abort_multipart(self, key: str, upload_id: str):
+        try:
+            self.client.abort_multipart_upload(
+                Bucket=self.bucket, Key=self.prefix + key, UploadId=upload_id
+            )
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") != "NoSuchUpload":
+                raise
+
+    def describe(self) -> str:
+        return f"el bucket `{self.bucket}`"
+
+
+class UploadState:
+    """Estado persistente de las subidas, para reanudarlas tras una interrupción."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            data = {}
+        self.pending: list[str] = data.get("pending", [])
+        self.multipart: dict[str, dict] = data.get("multipart", {})
+
+    def save(self):
+        with self._lock:
+            tmp_path = self.path.with_name(self.path.name + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"pending": self.pending, "multipart": self.multipart}, f)
+            os.replace(tmp_path, self.path)
+
+    def add_pending(self, backup_id: str):
+        if backup_id not in self.pending:
+            self.pending.append(backup_id)
+            self.save()
+
+    def remove_pending(self, backup_id: str):
+        if backup_id in self.pending:
+            self.pending.remove(backup_id)
+            self.save()
+
+
+def _send_part(uploader: BackupUploader, key: str, upload_id: str, number: int, path: Path, offset: int, length: int) -> str:
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read(length)
+    if len(data) != length:
+        raise UploadError(f"'{path.name}' cambió de tamaño durante la subida.")
+    return uploader.upload_part(key, upload_id, number, data)
+
+
+def _upload_files(
+    uploader: BackupUploader,
+    files: list[tuple[str, Path]],
+    state: UploadState,
+    workers: int,
+    part_size: int,
+    stats: UploadStats,
+):
+    """Sube una lista de (clave, archivo): los pequeños de una vez y los grandes por partes."""
+    with ThreadPoolExecutor(workers, thread_name_prefix="upload") as pool:
+        simple: list[Future] = []
+        multipart: list[tuple[str, str, dict[int, str], dict[int, Future]]] = []
+        try:
+            for key, path in files:
+                st = path.stat()
+                stats.files_sent += 1
+                if st.st_size <= part_size:
+                    simple.append(pool.submit(uploader.put_file, key, path))
+                    stats.bytes_sent += st.st_size
+                    continue
+
+                # Reanudar la subida anterior si es del mismo archivo.
+                saved = state.multipart.get(key)
+                done: dict[int, str] | None = None
+                if saved and saved["size"] == st.st_size and saved["mtime_ns"] == st.st_mtime_ns:
+                    done = uploader.list_parts(key, saved["upload_id"])
+                elif saved:
+                    # El archivo cambió: sus partes ya no sirven y, en S3, se siguen
+                    # cobrando hasta que se descarta la subida.
+                    uploader.abort_multipart(key, saved["upload_id"])
+                if done is None:
+                    upload_id = uploader.create_multipart(key)
+                    done = {}
+                    state.multipart[key] = {
+                        "upload_id": upload_id, "size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                    }
+                    state.save()
+                else:
+                    upload_id = saved["upload_id"]  # type: ignore
+                    stats.parts_resumed += len(done)
+
+                futures = {}
+                for index, offset in enumerate(range(0, st.st_size, part_size)):
+                    number = index + 1
+                    if number in done:
+                        continue
+                    length = min(part_size, st.st_size - offset)
+                    futures[number] = pool.submit(
+                        _send_part, uploader, key, upload_id, number, path, offset, length
+                    )
+                    stats.bytes_sent += length
+                multipart.append((key, upload_id, done, futures))
+
+            for future in simple:
+                future.result()
+            for key, upload_id, done, futures in multipart:
+                for number, future in futures.items():
+                    done[number] = future.result()
+                uploader.complete_multipart(key, upload_id, done)
+                del state.multipart[key]
+                state.save()
+        except BaseException:
+            pool.shutdown(cancel_futures=True)
+            raise
+
+
+def upload_backup(
+    uploader: BackupUploader,
+    backup_dir: Path,
+    record: BackupRecord,
+    store: BackupStore | None = None,
+    workers: int = 4,
+    part_size: int = 16 * 1024 * 1024,
+) -> UploadStats:
+    """
+    Función bloqueante que sube un backup del catálogo, enviando solo lo que falta.
+
+    Un snapshot incremental sube sus objetos a `store/objects/` y después su
+    manifiesto a `store/snapshots/`; un .zip se sube tal cual a la raíz del destino.
+    """
+    start = time.perf_counter()
+    stats = UploadStats()
+    state = UploadState(Path(backup_dir) / STATE_FILE)
+    state.add_pending(record.id)
+
+    if record.format == "incremental":
+        if store is None:
+            raise UploadError("Hace falta el almacén para subir un snapshot incremental.")
+        manifest_key = f"store/snapshots/{record.location}.json"
+        manifest = store.load_manifest(record.location)
+        digests = {digest for entry in manifest.files.values() for digest in entry.object_digests()}
+        stats.files_total = len(digests) + 1
+        remote = uploader.list_keys("store/objects/")
+        missing = [
+            (f"store/objects/{digest[:2]}/{digest}", store.object_path(digest))
+            for digest in sorted(digests)
+            if f"store/objects/{digest[:2]}/{digest}" not in remote
+        ]
+        _upload_files(uploader, missing, state, workers, part_size, stats)
+        # El manifiesto, al final: "publica" el snapshot en el destino.
+        _upload_files(
+            uploader, [(manifest_key, store.snapshots_dir / f"{record.location}.json")],
+            state, workers, part_size, stats,
+        )
+    else:
+        archive = Path(record.location)
+        stats.files_total = 1
+        remote = uploader.list_keys(archive.name)
+        if remote.get(archive.name) != archive.stat().st_size:
+            _upload_files(uploader, [(archive.name, archive)], state, workers, part_size, stats)
+
+    state.remove_pending(record.id)
+    stats.elapsed = time.perf_counter() - start
+    return stats
+
+
+def pending_uploads(backup_dir: Path) -> list[str]:
+    """IDs de los backups cuya subida quedó a medias."""
+    return list(UploadState(Path(backup_dir) / STATE_FILE).pending)
@@ -0,0 +1,338 @@
+import multiprocessing
+import os
+import struct
+import time
+import zlib
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+
+from .compression import (
+    BackupCompressionError,
+    check_codec,
+    crc32_combine,
+    is_precompressed,
+    resolve_level,
+    zstandard,
+)
+from .progress import BackupProgress
+from .throttle import BackupThrottle, lower_io_priority
+
+# Entendiendo el escritor de .zip en paralelo
+# `shutil.make_archive` comprime archivo por archivo en un solo hilo. Aquí los
+# archivos (y los trozos de los archivos grandes) se comprimen en un pool de
+# procesos mientras el proceso principal escribe los resultados en el .zip siempre
+# en el mismo orden (rutas ordenadas), así que el archivo final es determinista.
+# - DEFLATE admite concatenar trozos comprimidos por separado si cada trozo salvo el
+#   último termina con un "sync flush"; el CRC del archivo se combina con crc32_combine.
+# - Los archivos ya comprimidos (regiones, NBT en gzip, imágenes) se guardan sin
+#   comprimir (método STORED) y se copian directamente, sin pasar por el pool.
+# - Las cabeceras locales se escriben con ceros y se corrigen al terminar cada
+#   archivo, cuando ya se conocen el CRC y los tamaños.
+# - Se usa ZIP64 cuando un tamaño o un desplazamiento no cabe en 32 bits.
+# - Con un límite de MB/s, el proceso principal descuenta cada trozo antes de
+#   enviarlo al pool (los procesos no comparten el cubo de tokens) y cada bloque que
+#   escribe en el .zip. Los procesos del pool arrancan con la prioridad rebajada.
+
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+ZIP_ZSTANDARD = 93
+ZIP_METHODS = {"none": ZIP_STORED, "deflate": ZIP_DEFLATED, "zstd": ZIP_ZSTANDARD}
+
+SEGMENT_SIZE = 16 * 1024 * 1024
+COPY_BLOCK_SIZE = 1024 * 1024
+ZIP32_LIMIT = 0xFFFFFFFF
+# Margen para el caso (raro) en que comprimir agranda el archivo.
+ZIP64_THRESHOLD = ZIP32_LIMIT - 64 * 1024 * 1024
+UTF8_FLAG = 0x800
+
+LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+END_OF_CENTRAL_DIR = struct.Struct("<IHHHHIIH")
+ZIP64_END_OF_CENTRAL_DIR = struct.Struct("<IQHHIIQQQQ")
+ZIP64_LOCATOR = struct.Struct("<IIQI")
+
+
+def _compress_segment(
+    path: str, offset: int, length: int, method: int, level: int, final: bool
+) -> tuple[int, int, bytes]:
+    """Trabajo del pool: lee un trozo, calcula su CRC y lo comprime. Devuelve (crc, tamaño, datos)."""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read(length)
+    crc = zlib.crc32(data)
+    if method == ZIP_DEFLATED:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+        out = compressor.compress(data) + compressor.flush(
+            zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        )
+    else:
+        out = zstandard.ZstdCompressor(level=level).compress(data)  # type: ignore
+    return crc, len(data), out
+
+
+def _dos_datetime(mtime: float) -> tuple[int, int]:
+    t = time.localtime(max(mtime, 315532800))  # 1980-01-01, el mínimo de ZIP
+    dos_time = t.tm_hour << 11 | t.tm_min << 5 | t.tm_sec // 2
+    dos_date = (t.tm_year - 1980) << 9 | t.tm_mon << 5 | t.tm_mday
+    return dos_time, dos_date
+
+
+class _ZipEntry:
+    def __init__(self, name: str, path: Path | None, st: os.stat_result, method: int):
+        self.name = name
+        self.encoded_name = name.encode("utf-8")
+        self.path = path
+        self.size = st.st_size if path is not None else 0
+        self.mode = st.st_mode
+        self.dos_time, self.dos_date = _dos_datetime(st.st_mtime)
+        self.method = method
+        self.zip64 = self.size >= ZIP64_THRESHOLD
+        self.crc = 0
+        self.compressed_size = 0
+        self.read_size = 0
+        self.header_offset = 0
+
+    @property
+    def is_dir(self) -> bool:
+        return self.path is None
+
+    @property
+    def version_needed(self) -> int:
+        if self.method == ZIP_ZSTANDARD:
+            return 63
+        return 45 if self.zip64 else 20
+
+    def local_header(self) -> bytes:
+        extra = b""
+        compressed_size, size = self.compressed_size, self.size
+        if self.zip64:
+            extra = struct.pack("<HHQQ", 1, 16, size, compressed_size)
+            compressed_size = size = ZIP32_LIMIT
+        return (
+            LOCAL_HEADER.pack(
+                0x04034B50, self.version_needed, UTF8_FLAG, self.method,
+                self.dos_time, self.dos_date, self.crc, compressed_size, size,
+                len(self.encoded_name), len(extra),
+            )
+            + self.encoded_name
+            + extra
+        )
+
+    def central_header(self) -> bytes:
+        size, compressed_size, offset = self.size, self.compressed_size, self.header_offset
+        zip64_fields = []
+        if size >= ZIP32_LIMIT:
+            zip64_fields.append(size)
+            size = ZIP32_LIMIT
+        if compressed_size >= ZIP32_LIMIT:
+            zip64_fields.append(compressed_size)
+            compressed_size = ZIP32_LIMIT
+        if offset >= ZIP32_LIMIT:
+            zip64_fields.append(offset)
+            offset = ZIP32_LIMIT
+        extra = b""
+        if zip64_fields:
+            extra = struct.pack(f"<HH{len(zip64_fields)}Q", 1, 8 * len(zip64_fields), *zip64_fields)
+        version_needed = max(self.version_needed, 45 if zip64_fields else 20)
+        external_attr = (self.mode & 0xFFFF) << 16 | (0x10 if self.is_dir else 0)
+        return (
+            CENTRAL_HEADER.pack(
+                0x02014B50, 3 << 8 | version_needed, version_needed, UTF8_FLAG,
+                self.method, self.dos_time, self.dos_date, self.crc, compressed_size,
+                size, len(self.encoded_name), len(extra), 0, 0, 0, external_attr, offset,
+            )
+            + self.encoded_name
+            + extra
+        )
+
+
+def _collect_entries(source_dir: Path, base_dir: str, method: int) -> list[_ZipEntry]:
+    """Recorre `source_dir/base_dir` en orden y decide el método de cada archivo."""
+    entries = []
+    for dirpath, dirnames, filenames in os.walk(source_dir / base_dir):
+        dirnames.sort()
+        folder = Path(dirpath)
+        rel_folder = folder.relative_to(source_dir).as_posix()
+        entries.append(_ZipEntry(rel_folder + "/", None, folder.stat(), ZIP_STORED))
+        for name in sorted(filenames):
+            path = folder / name
+            try:
+                st = path.stat()
+                with open(path, "rb") as f:
+                    head = f.read(4)
+            except FileNotFoundError:
+                continue
+            file_method = method
+            if method != ZIP_STORED and (st.st_size == 0 or is_precompressed(path, head)):
+                file_method = ZIP_STORED
+            entries.append(_ZipEntry(f"{rel_folder}/{name}", path, st, file_method))
+    return entries
+
+
+def _segments(entry: _ZipEntry) -> list[tuple[int, int, bool]]:
+    """Trozos (desplazamiento, longitud, es_el_último) en que se comprime un archivo."""
+    # Solo DEFLATE se puede partir; un frame zstd por archivo es lo que esperan los lectores.
+    if entry.method != ZIP_DEFLATED or entry.size <= 2 * SEGMENT_SIZE:
+        return [(0, entry.size, True)]
+    offsets = range(0, entry.size, SEGMENT_SIZE)
+    return [
+        (offset, min(SEGMENT_SIZE, entry.size - offset), offset + SEGMENT_SIZE >= entry.size)
+        for offset in offsets
+    ]
+
+
+def write_parallel_zip(
+    source_dir: Path,
+    base_dir: str,
+    archive_path: Path,
+    codec: str = "deflate",
+    level: int | None = None,
+    workers: int = 0,
+    throttle: BackupThrottle | None = None,
+    io_priority: str = "normal",
+    progress: BackupProgress | None = None,
+) -> Path:
+    """
+    Función bloqueante que comprime `source_dir/base_dir` en `archive_path` usando
+    `workers` procesos (0 = uno por núcleo).
+
+    `throttle` limita los MB/s leídos y escritos; `io_priority` ("normal", "low" o
+    "idle") es la prioridad de los procesos del pool. Los bytes leídos y los archivos
+    terminados se suman a `progress`.
+
+    El .zip se escribe primero con la extensión `.partial` y se renombra al final,
+    de modo que nunca queda a la vista un archivo a medias.
+    """
+    check_codec(codec)
+    if codec not in ZIP_METHODS:
+        raise BackupCompressionError(
+            f"El formato zip no admite el códec '{codec}'; úsalo con backups incrementales."
+        )
+    method = ZIP_METHODS[codec]
+    level = resolve_level(codec, level)
+    workers = workers or os.cpu_count() or 1
+    source_dir = Path(source_dir)
+    entries = _collect_entries(source_dir, base_dir, method)
+    if progress is not None:
+        files = [entry for entry in entries if not entry.is_dir]
+        progress.start_phase("Comprimiendo", len(files), sum(entry.size for entry in files))
+
+    # Cola ordenada de trabajos. Los trozos comprimidos van al pool con una ventana
+    # limitada para no acumular en memoria todo el mundo comprimido.
+    jobs: list[tuple[_ZipEntry, tuple[int, int, bool] | None]] = []
+    for entry in entries:
+        if entry.is_dir or entry.method == ZIP_STORED:
+            jobs.append((entry, None))
+        else:
+            jobs.extend((entry, segment) for segment in _segments(entry))
+    window = workers * 2
+
+    partial_path = archive_path.with_name(archive_path.name + ".partial")
+    context = multiprocessing.get_context("spawn")
+    try:
+        with ProcessPoolExecutor(
+            workers, mp_context=context, initializer=lower_io_priority, initargs=(io_priority,)
+        ) as pool, open(partial_path, "wb") as out:
+            pending: deque[tuple[_ZipEntry, Future | None, bool]] = deque()
+            next_job = 0
+
+            def fill():
+                nonlocal next_job
+                while next_job < len(jobs) and len(pending) < window:
+                    entry, segment = jobs[next_job]
+                    next_job += 1
+                    if segment is None:
+                        pending.append((entry, None, True))
+                    else:
+                        offset, length, final = segment
+                        if throttle is not None:
+                            throttle.read(length)
+                        future = pool.submit(
+                            _compress_segment, str(entry.path), offset, length,
+                            entry.method, level, final,
+                        )
+                        pending.append((entry, future, final))
+
+            current: _ZipEntry | None = None
+            fill()
+            while pending:
+                entry, future, final = pending.popleft()
+                fill()
+                if entry is not current:
+                    current = entry
+                    entry.header_offset = out.tell()
+                    out.write(entry.local_header())
+
+                if future is None:
+                    if not entry.is_dir:
+                        _copy_stored(entry, out, throttle, progress)
+                else:
+                    crc, length, data = future.result()
+                    entry.crc = crc32_combine(entry.crc, crc, length)
+                    entry.read_size += length
+                    entry.compressed_size += len(data)
+                    if throttle is not None:
+                        throttle.write(len(data))
+                    if progress is not None:
+                        progress.advance(length)
+                    out.write(data)
+
+                if final:
+                    if future is not None:
+                        entry.size = entry.read_size
+                    _finish_entry(entry, out)
+                    if progress is not None and not entry.is_dir:
+                        progress.advance(files=1)
+
+            central_offset = out.tell()
+            for entry in entries:
+                out.write(entry.central_header())
+            _write_end_of_central_dir(out, len(entries), central_offset, out.tell() - central_offset)
+
+        os.replace(partial_path, archive_path)
+    finally:
+        partial_path.unlink(missing_ok=True)
+    return archive_path
+
+
+def _copy_stored(
+    entry: _ZipEntry, out, throttle: BackupThrottle | None, progress: BackupProgress | None
+):
+    with open(entry.path, "rb") as f:  # type: ignore
+        size = 0
+        while block := f.read(COPY_BLOCK_SIZE):
+            if throttle is not None:
+                throttle.read(len(block))
+                throttle.write(len(block))
+            if progress is not None:
+                progress.advance(len(block))
+            entry.crc = zlib.crc32(block, entry.crc)
+            size += len(block)
+            out.write(block)
+    # El archivo pudo cambiar de tamaño desde que se recorrió la carpeta.
+    entry.size = entry.compressed_size = size
+
+
+def _finish_entry(entry: _ZipEntry, out):
+    """Reescribe la cabecera local con el CRC y los tamaños definitivos."""
+    if entry.compressed_size >= ZIP32_LIMIT and not entry.zip64:
+        raise BackupCompressionError(f"'{entry.name}' creció más de lo previsto al comprimirse.")
+    end = out.tell()
+    out.seek(entry.header_offset)
+    out.write(entry.local_header())
+    out.seek(end)
+
+
+def _write_end_of_central_dir(out, count: int, offset: int, size: int):
+    if count >= 0xFFFF or offset >= ZIP32_LIMIT or size >= ZIP32_LIMIT:
+        zip64_offset = out.tell()
+        out.write(
+            ZIP64_END_OF_CENTRAL_DIR.pack(
+                0x06064B50, ZIP64_END_OF_CENTRAL_DIR.size - 12, 3 << 8 | 45, 45,
+                0, 0, count, count, size, offset,
+            )
+        )
+        out.write(ZIP64_LOCATOR.pack(0x07064B50, 0, zip64_offset, 1))
+        count, size, offset = min(count, 0xFFFF), min(size, ZIP32_LIMIT), min(offset, ZIP32_LIMIT)
+    out.write(END_OF_CENTRAL_DIR.pack(0x06054B50, 0, 0, count, count, size, offset, 0))
@@ -15,19 +15,20 @@ async def main(path: Union[Path, str]):
     path = Path(path) if isinstance(path, str) else path
     config = load_config_orchestator(path)
 
-    print("Verificando requisitos del servidor de Minecraft...")
-    server_path = Path(config.minecraft_config.server_path)
-    start_script = server_path / "start.sh"
-
-    if not start_script.exists():
-        error_msg = f"Error Crítico: El script 'start.sh' no se encuentra en la ruta especificada: '{server_path}'"
-        print(error_msg)
-        raise FileNotFoundError(error_msg)
-
-    if not os.access(start_script, os.X_OK):
-        error_msg = f"Error Crítico: El script '{start_script}' no tiene permisos de ejecución. Ejecuta 'chmod +x {start_script}' en tu terminal."
-        print(error_msg)
-        raise PermissionError(error_msg)
+    print("Verificando requisitos de los servidores de Minecraft...")
+    for minecraft_config in config.servers.values():
+        server_path = Path(minecraft_config.server_path)
+        start_script = server_path / "start.sh"
+
+        if not start_script.exists():
+            error_msg = f"Error Crítico: El script 'start.sh' del servidor '{minecraft_config.name}' no se encuentra en la ruta especificada: '{server_path}'"
+            print(error_msg)
+            raise FileNotFoundError(error_msg)
+
+        if not os.access(start_script, os.X_OK):
+            error_msg = f"Error Crítico: El script '{start_script}' no tiene permisos de ejecución. Ejecuta 'chmod +x {start_script}' en tu terminal."
+            print(error_msg)
+            raise PermissionError(error_msg)
 
     print("Requisitos verificados correctamente.")
 
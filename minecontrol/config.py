@@ -1,5 +1,6 @@
+import re
 from pathlib import Path
-from typing import Union
+from typing import Literal, Union
 
 from pydantic import Field, ValidationError
 from pydantic_settings import BaseSettings
@@ -23,6 +24,9 @@ class DiscordConfig(BaseSettings):
 class MinecraftConfig(BaseSettings):
     """Configuración para la conexión RCON con el servidor de Minecraft."""
 
+    name: str = Field(
+        "minecraft", description="Nombre del servidor en el bot (opción `server` de los comandos)"
+    )
     rcon_host: str = Field(
         "127.0.0.1", description="IP o dominio del servidor de Minecraft"
     )
@@ -30,10 +34,102 @@ class MinecraftConfig(BaseSettings):
     rcon_password: str = Field(
         ..., description="Contraseña RCON del servidor de Minecraft"
     )
+    rcon_pool_size: int = Field(
+        2, description="Número máximo de conexiones RCON que se mantienen abiertas"
+    )
+    rcon_pipelined: bool = Field(
+        True,
+        description="Envía los comandos RCON concurrentes por una misma conexión sin esperar respuestas",
+    )
     
+    game_port: int = Field(
+        25565, description="Puerto del juego, usado por la sonda Server List Ping"
+    )
+    status_probe: Literal["rcon", "slp"] = Field(
+        "rcon",
+        description="Cómo se detecta el estado: 'rcon' (login + list) o 'slp' (Server List Ping, sin contraseña)",
+    )
+    status_cache_seconds: float = Field(
+        5.0,
+        description="Segundos durante los que se reutiliza el último estado consultado del servidor",
+    )
+
     backup_path: str = Field(
         "backups", description="Ruta relativa o absoluta donde se almacenarán los archivos .zip de backup"
     )
+    backup_format: Literal["incremental", "zip"] = Field(
+        "zip",
+        description="'incremental' guarda solo los archivos que cambiaron (almacén deduplicado); 'zip' comprime el mundo completo",
+    )
+    backup_compression: Literal["deflate", "zstd", "lz4", "none"] = Field(
+        "deflate",
+        description="Códec de compresión de los backups. 'zstd' y 'lz4' necesitan sus paquetes; 'lz4' solo sirve con el formato incremental",
+    )
+    backup_compression_level: int | None = Field(
+        None, description="Nivel de compresión (vacío = el predeterminado del códec)"
+    )
+    backup_workers: int = Field(
+        0, description="Procesos que comprimen en paralelo los backups zip (0 = uno por núcleo)"
+    )
+    backup_retention: str = Field(
+        "",
+        description="Política de retención, p. ej. 'hourly=24,daily=14,weekly=8' (vacío = conservar todos)",
+    )
+    backup_snapshot: Literal["auto", "always", "off"] = Field(
+        "auto",
+        description="Copia instantánea del mundo antes de comprimir para reactivar el guardado enseguida. 'auto' la usa con reflink o con el formato zip",
+    )
+    backup_read_mb_per_second: float = Field(
+        0, description="Límite de lectura del backup en MB/s (0 = sin límite)"
+    )
+    backup_write_mb_per_second: float = Field(
+        0, description="Límite de escritura del backup en MB/s (0 = sin límite)"
+    )
+    backup_io_priority: Literal["normal", "low", "idle"] = Field(
+        "low",
+        description="Prioridad de CPU y disco (nice/ioprio) del backup. 'idle' solo usa el disco cuando nadie más lo pide",
+    )
+    backup_target_mspt: float = Field(
+        40.0,
+        description="Si el MSPT del servidor supera este valor durante un backup, se reducen los límites de MB/s (0 = no adaptar)",
+    )
+    backup_schedule: str = Field(
+        "",
+        description="Expresiones cron separadas por ';' para los backups automáticos, p. ej. '0 */6 * * *' (vacío = solo manuales)",
+    )
+    backup_schedule_max_players: int = Field(
+        0,
+        description="Un backup programado se aplaza mientras haya más jugadores conectados que este número",
+    )
+    backup_schedule_max_delay_minutes: int = Field(
+        120, description="Minutos máximos que se aplaza un backup programado antes de hacerlo igualmente"
+    )
+    backup_schedule_skip_unchanged: bool = Field(
+        True,
+        description="Omite el backup programado si no ha entrado nadie ni ha cambiado ningún chunk desde el anterior",
+    )
+    upload_target: Literal["none", "local", "s3"] = Field(
+        "none", description="Destino al que se suben los backups terminados, en segundo plano"
+    )
+    upload_local_path: str = Field(
+        "", description="Carpeta de destino con upload_target='local' (p. ej. un disco de red montado)"
+    )
+    upload_s3_bucket: str = Field("", description="Bucket de destino con upload_target='s3'")
+    upload_s3_prefix: str = Field("minecontrol", description="Prefijo de las claves dentro del bucket")
+    upload_s3_endpoint_url: str = Field(
+        "", description="URL de un servicio compatible con S3 (MinIO, R2...). Vacío = AWS"
+    )
+    upload_s3_region: str = Field("", description="Región del bucket (vacío = la de la configuración de AWS)")
+    upload_s3_access_key: str = Field(
+        "", description="Access key de S3 (vacío = credenciales del entorno o de ~/.aws)"
+    )
+    upload_s3_secret_key: str = Field("", description="Secret key de S3")
+    upload_concurrency: int = Field(
+        4, description="Partes que se suben a la vez (conexiones simultáneas)"
+    )
+    upload_part_size_mb: int = Field(
+        16, description="Tamaño de cada parte en MB (S3 exige al menos 5)"
+    )
 
     # variables para la gestión del proceso
     server_path: str = Field(
@@ -42,6 +138,35 @@ class MinecraftConfig(BaseSettings):
     terminal_session_name: str = Field(
         "minecraft", description="Nombre de la sesión de tmux para el servidor"
     )
+    process_backend: Literal["tmux", "supervisor"] = Field(
+        "tmux",
+        description="Cómo se ejecuta el servidor: 'tmux' (sesión independiente) o 'supervisor' (proceso hijo del bot)",
+    )
+    supervisor_restart_on_crash: bool = Field(
+        True,
+        description="En modo supervisor, reinicia el servidor si termina sin que se haya pedido un stop",
+    )
+    supervisor_max_restarts: int = Field(
+        5, description="Reinicios automáticos seguidos antes de darse por vencido"
+    )
+
+    log_watch_enabled: bool = Field(
+        True,
+        description="Sigue logs/latest.log para reaccionar al instante a arranques, apagados y jugadores",
+    )
+
+    # variables para la telemetría (/perf)
+    telemetry_enabled: bool = Field(
+        False,
+        description="Muestrea TPS/MSPT, CPU, memoria y jugadores del servidor y los guarda en memoria para /perf (añade tráfico RCON)",
+    )
+    telemetry_interval_seconds: float = Field(
+        5.0, description="Segundos entre muestras de TPS/MSPT, CPU, memoria y jugadores"
+    )
+    telemetry_count_seconds: float = Field(
+        60.0,
+        description="Segundos entre recuentos de chunks y entidades (recorrerlas cuesta tiempo de tick)",
+    )
 
     # variables para el apagado automático
     auto_shutdown_enabled: bool = Field(
@@ -55,6 +180,46 @@ class MinecraftConfig(BaseSettings):
         60,
         description="Segundos de cuenta atrás final antes de apagar, una vez que se ha anunciado.",
     )
+    auto_shutdown_hold_minutes: int = Field(
+        0,
+        description="No apaga el servidor vacío si, según el historial, suelen volver jugadores en estos minutos (0 = no esperar)",
+    )
+
+    # variables para el historial de actividad y el arranque anticipado
+    activity_tracking: bool = Field(
+        True,
+        description="Guarda las entradas y salidas de jugadores y los arranques y paradas para aprender el patrón semanal",
+    )
+    activity_db_path: str = Field(
+        "activity.db", description="Base de datos del historial, relativa a la carpeta del servidor o absoluta"
+    )
+    activity_history_weeks: int = Field(
+        8, description="Semanas de historial que se usan para aprender el patrón"
+    )
+    prewarm_minutes: int = Field(
+        0,
+        description="Inicia el servidor apagado estos minutos antes de la hora en que suele haber jugadores (0 = desactivado)",
+    )
+    prewarm_threshold: float = Field(
+        0.5,
+        description="Fracción de semanas con jugadores a esa hora a partir de la cual se espera demanda (0-1)",
+    )
+
+    # variables para despertar el servidor al entrar
+    wake_on_join_enabled: bool = Field(
+        False,
+        description="Con el servidor apagado, escucha en el puerto del juego y lo inicia cuando alguien intenta entrar",
+    )
+    wake_on_join_host: str = Field(
+        "0.0.0.0", description="Dirección en la que escucha el servidor dormido"
+    )
+    wake_on_join_motd: str = Field(
+        "Servidor dormido. Entra para despertarlo.",
+        description="MOTD que muestra la lista de servidores mientras duerme",
+    )
+    wake_on_join_players: str = Field(
+        "", description="Jugadores que pueden despertarlo, separados por comas (vacío = cualquiera)"
+    )
 
     class Config:
         env_file = ".env"
@@ -63,14 +228,49 @@ class MinecraftConfig(BaseSettings):
         env_prefix = "MINECRAFT_"
 
 
+class ServersConfig(BaseSettings):
+    """Servidores que gestiona el bot y cómo se vigilan."""
+
+    servers: str = Field(
+        "",
+        description="Nombres de los servidores separados por comas. Cada uno lee sus variables con el prefijo MINECRAFT_<NOMBRE>_ (vacío = un solo servidor con MINECRAFT_)",
+    )
+    monitor_concurrency: int = Field(
+        4, description="Servidores que se sondean a la vez en cada vuelta de vigilancia"
+    )
+
+    class Config:
+        env_file = ".env"
+        env_file_encoding = "utf-8"
+        extra = "ignore"
+        env_prefix = "MINECONTROL_"
+
+
+SERVER_NAME_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]*$")
+
+
 class ManagerConfig:
     def __init__(
         self,
         discord_config: DiscordConfig,
-        minecraft_config: MinecraftConfig,
+        minecraft_configs: list[MinecraftConfig],
+        monitor_concurrency: int = 4,
     ) -> None:
         self.discord_config = discord_config
-        self.minecraft_config = minecraft_config
+        # Registro de servidores por nombre, en el orden de la configuración.
+        self.servers = {config.name: config for config in minecraft_configs}
+        self.monitor_concurrency = monitor_concurrency
+
+    @property
+    def minecraft_config(self) -> MinecraftConfig:
+        """El servidor por defecto: el primero configurado."""
+        return next(iter(self.servers.values()))
+
+    def get_server(self, name: str | None = None) -> MinecraftConfig:
+        """Devuelve el servidor `name`, o el predeterminado si no se indica. KeyError si no existe."""
+        if not name:
+            return self.minecraft_config
+        return self.servers[name]
 
 
 def load_config_orchestator(env_path: Union[Path, str] = ".env") -> ManagerConfig:
@@ -81,11 +281,44 @@ def load_config_orchestator(env_path: Union[Path, str] = ".env") -> ManagerConfi
 
     try:
         discord_config = DiscordConfig(_env_file=env_file)  # type: ignore
-        minecraft_config = MinecraftConfig(_env_file=env_file)  # type: ignore
-        return ManagerConfig(
-            discord_config=discord_config,
-            minecraft_config=minecraft_config,
-        )
+        servers_config = ServersConfig(_env_file=env_file)  # type: ignore
+        names = [name.strip().lower() for name in servers_config.servers.split(",") if name.strip()]
+        prefixes = [server_env_prefix(name) for name in names]
+        if len(set(prefixes)) != len(set(names)):
+            raise ValueError(
+                "MINECONTROL_SERVERS tiene nombres que solo se diferencian en '-' y '_' "
+                "y compartirían las mismas variables MINECRAFT_<NOMBRE>_*."
+            )
+        if not names:
+            minecraft_configs = [MinecraftConfig(_env_file=env_file)]  # type: ignore
+        else:
+            minecraft_configs = [load_server_config(env_file, name) for name in names]
     except ValidationError as e:
         print(f"Error en la configuración del archivo {env_file}:\n{e}")
         raise
+
+    names = [config.name for config in minecraft_configs]
+    if len(set(names)) != len(names):
+        raise ValueError("MINECONTROL_SERVERS tiene nombres repetidos.")
+    server_paths = [Path(config.server_path).resolve() for config in minecraft_configs]
+    if len(set(server_paths)) != len(server_paths):
+        raise ValueError("Dos servidores no pueden compartir la misma carpeta (server_path).")
+    return ManagerConfig(
+        discord_config=discord_config,
+        minecraft_configs=minecraft_configs,
+        monitor_concurrency=max(1, servers_config.monitor_concurrency),
+    )
+
+
+def load_server_config(env_file: Path, name: str) -> MinecraftConfig:
+    """Carga un servidor de MINECONTROL_SERVERS leyendo las variables MINECRAFT_<NOMBRE>_*."""
+    if not SERVER_NAME_PATTERN.match(name):
+        raise ValueError(
+            f"Nombre de servidor no válido: '{name}'. Usa letras minúsculas, números, '-' y '_'."
+        )
+    return MinecraftConfig(_env_file=env_file, _env_prefix=server_env_prefix(name), name=name)  # type: ignore
+
+
+def server_env_prefix(name: str) -> str:
+    """Prefijo de las variables de entorno de un servidor de MINECONTROL_SERVERS."""
+    return f"MINECRAFT_{name.upper().replace('-', '_')}_"
@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta
+
+# Entendiendo las expresiones cron
+# Cinco campos separados por espacios: minuto hora día-del-mes mes día-de-la-semana.
+# - "*" cualquier valor, "5" un valor, "1-5" un rango, "1,15" una lista y "*/15" o
+#   "0-30/10" un paso. El día de la semana va de 0 (domingo) a 6; 7 también es domingo.
+# - Como en cron, si se restringen a la vez el día del mes y el de la semana, basta
+#   con que se cumpla uno de los dos.
+# - Atajos: @hourly, @daily, @weekly y @monthly.
+# Ejemplos: "0 */6 * * *" cada 6 horas; "30 4 * * 1-5" a las 4:30 de lunes a viernes.
+
+MACROS = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+}
+FIELD_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+FIELD_NAMES = ["minuto", "hora", "día del mes", "mes", "día de la semana"]
+# Límite de la búsqueda de la siguiente ejecución (p. ej. "0 0 30 2 *" nunca ocurre).
+MAX_SEARCH_DAYS = 5 * 366
+
+
+class CronError(ValueError):
+    """La expresión cron está mal escrita."""
+
+    pass
+
+
+def _parse_field(text: str, index: int) -> set[int]:
+    low, high = FIELD_RANGES[index]
+    values: set[int] = set()
+    for part in text.split(","):
+        base, _, step_text = part.partition("/")
+        try:
+            step = int(step_text) if step_text else 1
+            if base == "*":
+                start, end = low, high
+            elif "-" in base:
+                start, end = (int(value) for value in base.split("-", 1))
+            else:
+                start = int(base)
+                end = high if step_text else start
+        except ValueError:
+            raise CronError(f"Valor inválido en el campo {FIELD_NAMES[index]}: '{part}'")
+        if step < 1 or not low <= start <= end <= high:
+            raise CronError(f"Fuera de rango en el campo {FIELD_NAMES[index]}: '{part}'")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronExpression:
+    """Una expresión cron de cinco campos."""
+
+    def __init__(self, expression: str):
+        self.expression = expression.strip()
+        fields = MACROS.get(self.expression, self.expression).split()
+        if len(fields) != 5:
+            raise CronError(f"Se esperaban 5 campos en '{expression}'.")
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            _parse_field(field, index) for index, field in enumerate(fields)
+        )
+        self.weekdays = {day % 7 for day in weekdays}
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def _matches_day(self, moment: datetime) -> bool:
+        if moment.month not in self.months:
+            return False
+        in_month = moment.day in self.days
+        # datetime: lunes = 0; cron: domingo = 0
+        in_week = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return in_month and in_week
+        return in_month or in_week
+
+    def matches(self, moment: datetime) -> bool:
+        return (
+            moment.minute in self.minutes
+            and moment.hour in self.hours
+            and self._matches_day(moment)
+        )
+
+    def next_after(self, moment: datetime) -> datetime | None:
+        """Primer minuto posterior a `moment` que cumple la expresión, o None si no hay."""
+        start = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.replace(hour=0, minute=0)
+        for _ in range(MAX_SEARCH_DAYS):
+            if self._matches_day(day):
+                for hour in sorted(self.hours):
+                    for minute in sorted(self.minutes):
+                        candidate = day.replace(hour=hour, minute=minute)
+                        if candidate >= start:
+                            return candidate
+            day += timedelta(days=1)
+        return None
+
+    def __repr__(self) -> str:
+        return f"CronExpression({self.expression!r})"
+
+
+def parse_schedule(spec: str) -> list[CronExpression]:
+    """Convierte varias expresiones separadas por ';' en una lista."""
+    return [CronExpression(part) for part in spec.split(";") if part.strip()]
@@ -1,54 +1,294 @@
 import asyncio
+import functools
+import math
+import os
 import shutil
-import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Sequence, cast
+from typing import Any, Awaitable, Callable, Sequence, cast
 
 import discord
 from discord.ext import commands
 
 from minecontrol.config import MinecraftConfig
 from minecontrol.discord_bot.enums import ServerStatus
-from minecontrol.discord_bot.server_state import ServerStateManager
-
-from ..rcon_client import RCONAuthError, RCONConnectionError, SimpleRCONClient
+from minecontrol.discord_bot.server_state import STATE_FILE_PATH, ServerStateManager
+from minecontrol.discord_bot.status_service import ServerStatusService
+
+from ..backup.catalog import (
+    BackupCatalog,
+    BackupRecord,
+    import_existing_backups,
+    parse_retention,
+    select_backups_to_keep,
+)
+from ..backup.progress import BackupProgress
+from ..backup.restore import RestoreError, extract_zip, swap_world
+from ..backup.snapshot import snapshot_directory, supports_reflink
+from ..backup.store import BackupStore, create_snapshot, restore_snapshot, sha256_file
+from ..backup.throttle import MB, BackupThrottle, lower_io_priority
+from ..backup.upload import (
+    BackupUploader,
+    LocalDirectoryUploader,
+    S3Uploader,
+    UploadError,
+    UploadState,
+    STATE_FILE,
+    pending_uploads,
+    upload_backup,
+)
+from ..backup.zip_writer import write_parallel_zip
+from ..log_watcher import LogEvent, LogEventType, LogTailer, ServerEventBus
+from ..process_control import ServerProcessBackend, SupervisorBackend, TmuxBackend
+from ..rcon_client import (
+    RCONAuthError,
+    RCONConnectionError,
+    RCONConnectionPool,
+    get_rcon_pool,
+    raise_first_error,
+)
+from ..server_metrics import MsptProbe
+from ..slp_client import SLPConnectionError, SLPError, query_server_list_ping
+from ..telemetry import METRICS, TelemetryStore, format_value, sparkline
+from ..wake_listener import WakeOnJoinListener
 from .guild_config import GuildConfigManager
 from .utils import send_announcement
 
-state_manager = ServerStateManager()
-_backup_in_progress = False
+# Estado por servidor, indexado por su carpeta (`server_path`).
+_state_managers: dict[str, ServerStateManager] = {}
+# Backups, podas y restauraciones de un mismo servidor se ejecutan de uno en uno;
+# los que llegan mientras tanto esperan su turno.
+_backup_locks: dict[str, asyncio.Lock] = {}
+_uploaders: dict[str, BackupUploader] = {}
+_upload_queues: dict[str, asyncio.Queue] = {}
+_upload_tasks: dict[str, asyncio.Task] = {}
+_queued_uploads: set[tuple[str, str]] = set()
+# Servidores dormidos: los que deben tener el puerto del juego escuchando mientras
+# están apagados, y sus listeners activos.
+_hibernating: set[str] = set()
+_wake_listeners: dict[str, WakeOnJoinListener] = {}
+_status_services: dict[str, ServerStatusService] = {}
+_event_buses: dict[str, ServerEventBus] = {}
+_log_tailers: dict[str, LogTailer] = {}
+_process_backends: dict[str, ServerProcessBackend] = {}
+_telemetry_stores: dict[str, TelemetryStore] = {}
+# Discord limita las ediciones por canal; el mensaje de progreso se edita como mucho
+# una vez cada tantos segundos.
+PROGRESS_EDIT_SECONDS = 3.0
 
 # --- Utilidades ---
 
-def exists_tmux_session(session_name: str) -> bool:
-    """Comprueba si una sesión de tmux con el nombre dado existe. Devuelve True si existe, False si no."""
-    check_process = subprocess.run(["tmux", "has-session", "-t", session_name])
-    return check_process.returncode == 0
+def get_state_manager(config: MinecraftConfig) -> ServerStateManager:
+    """Devuelve el estado persistente ('iniciando') del servidor."""
+    manager = _state_managers.get(config.server_path)
+    if manager is None:
+        # El servidor por defecto conserva el archivo de siempre para no perder el
+        # estado de las instalaciones de un solo servidor al actualizar.
+        if config.name == "minecraft":
+            state_file = STATE_FILE_PATH
+        else:
+            state_file = STATE_FILE_PATH.with_name(f".server_state_{config.name}.json")
+        manager = ServerStateManager(state_file)
+        _state_managers[config.server_path] = manager
+    return manager
+
+
+def get_telemetry_store(config: MinecraftConfig) -> TelemetryStore:
+    """Devuelve el historial en memoria de las métricas del servidor."""
+    store = _telemetry_stores.get(config.server_path)
+    if store is None:
+        store = TelemetryStore(max(1.0, config.telemetry_interval_seconds))
+        _telemetry_stores[config.server_path] = store
+    return store
+
+
+def get_backup_lock(config: MinecraftConfig) -> asyncio.Lock:
+    """Devuelve el lock que ordena las operaciones de backup del servidor."""
+    lock = _backup_locks.get(config.server_path)
+    if lock is None:
+        lock = _backup_locks[config.server_path] = asyncio.Lock()
+    return lock
+
+
+def get_server_rcon(config: MinecraftConfig) -> RCONConnectionPool:
+    """Devuelve el pool de conexiones RCON compartido para el servidor configurado."""
+    return get_rcon_pool(
+        config.rcon_host,
+        config.rcon_port,
+        config.rcon_password,
+        size=config.rcon_pool_size,
+        pipelined=config.rcon_pipelined,
+    )
 
 
-async def get_minecraft_server_status(config: MinecraftConfig) -> ServerStatus:
+async def probe_status_slp(config: MinecraftConfig) -> ServerStatus:
+    """
+    Verifica el estado mediante Server List Ping en el puerto del juego.
+
+    A diferencia de RCON distingue un puerto cerrado (apagado o aún arrancando) de
+    un servidor que acepta conexiones pero no responde (colgado).
+    """
+    try:
+        await query_server_list_ping(config.rcon_host, config.game_port)
+        return ServerStatus.ONLINE
+
+    except SLPConnectionError:
+        if get_state_manager(config).is_starting():
+            return ServerStatus.STARTING
+        return ServerStatus.OFFLINE
+
+    except (SLPError, asyncio.TimeoutError):
+        if get_state_manager(config).is_starting():
+            return ServerStatus.STARTING
+        print("El puerto del juego acepta conexiones pero el servidor no responde al ping.")
+        return ServerStatus.UNKNOWN
+
+
+async def probe_minecraft_server_status(config: MinecraftConfig) -> ServerStatus:
     """
     Verifica el estado real del servidor, considerando el estado 'iniciando'.
     """
+    if is_hibernating(config):
+        # Quien responde en el puerto del juego es el listener, no el servidor.
+        return ServerStatus.OFFLINE
+    if config.status_probe == "slp":
+        return await probe_status_slp(config)
+
     try:
-        async with SimpleRCONClient(
-            config.rcon_host, config.rcon_port, config.rcon_password
-        ) as client:
-            await client.execute("list")
+        await get_server_rcon(config).execute("list")
         return ServerStatus.ONLINE
 
     except (RCONConnectionError, RCONAuthError, asyncio.TimeoutError):
-        if state_manager.is_starting():
+        if get_state_manager(config).is_starting():
             return ServerStatus.STARTING
         return ServerStatus.OFFLINE
 
     except Exception:
-        if state_manager.is_starting():
+        if get_state_manager(config).is_starting():
             return ServerStatus.STARTING
         return ServerStatus.UNKNOWN
 
 
+def get_status_service(config: MinecraftConfig) -> ServerStatusService:
+    """Devuelve el servicio de estado compartido del servidor configurado."""
+    service = _status_services.get(config.server_path)
+    if service is None:
+        service = ServerStatusService(
+            lambda: probe_minecraft_server_status(config),
+            ttl=config.status_cache_seconds,
+        )
+        _status_services[config.server_path] = service
+    return service
+
+
+async def get_minecraft_server_status(
+    config: MinecraftConfig, max_age: float | None = None
+) -> ServerStatus:
+    """
+    Devuelve el estado del servidor desde la caché compartida.
+
+    Las llamadas simultáneas comparten una única sonda; `max_age` permite exigir
+    un resultado más reciente que el TTL configurado.
+    """
+    return await get_status_service(config).get_status(max_age)
+
+
+def get_event_bus(config: MinecraftConfig) -> ServerEventBus:
+    """
+    Devuelve el bus de eventos del servidor, creándolo la primera vez.
+
+    Los eventos del log mantienen al día el servicio de estado sin necesidad de
+    sondear: "Done" marca el servidor como online y "All dimensions are saved"
+    como offline.
+    """
+    bus = _event_buses.get(config.server_path)
+    if bus is not None:
+        return bus
+
+    bus = ServerEventBus()
+    service = get_status_service(config)
+
+    def on_event(event: LogEvent):
+        if event.type == LogEventType.SERVER_READY:
+            get_state_manager(config).set_stopped()
+            service.set_status(ServerStatus.ONLINE)
+            print(f"Log: el servidor está listo (arrancó en {event.startup_seconds}s).")
+        elif event.type == LogEventType.SERVER_STOPPING:
+            service.invalidate()
+        elif event.type == LogEventType.SERVER_STOPPED:
+            get_state_manager(config).set_stopped()
+            service.set_status(ServerStatus.OFFLINE)
+        elif event.type == LogEventType.CRASH:
+            print(f"Log: el servidor ha registrado un crash:\n{event.details}")
+
+    bus.subscribe(on_event)
+    _event_buses[config.server_path] = bus
+    return bus
+
+
+def has_server_events(config: MinecraftConfig) -> bool:
+    """Indica si el bus de eventos recibe las líneas del servidor (del log o de su consola)."""
+    return config.log_watch_enabled or config.process_backend == "supervisor"
+
+
+def start_log_watcher(config: MinecraftConfig) -> LogTailer:
+    """Empieza a seguir `logs/latest.log` del servidor y a emitir sus eventos."""
+    tailer = _log_tailers.get(config.server_path)
+    if tailer is None:
+        bus = get_event_bus(config)
+        tailer = LogTailer(
+            Path(config.server_path) / "logs" / "latest.log",
+            on_line=bus.feed_line,
+            on_idle=bus.flush,
+        )
+        _log_tailers[config.server_path] = tailer
+    tailer.start()
+    return tailer
+
+
+def get_process_backend(config: MinecraftConfig) -> ServerProcessBackend:
+    """
+    Devuelve el backend que controla el proceso del servidor configurado.
+
+    Con `process_backend="supervisor"` la consola del servidor alimenta
+    directamente el bus de eventos y la salida del proceso marca el servidor como
+    offline al instante, sin esperar a la siguiente sonda.
+    """
+    backend = _process_backends.get(config.server_path)
+    if backend is not None:
+        return backend
+
+    if config.process_backend == "supervisor":
+        bus = get_event_bus(config)
+        service = get_status_service(config)
+
+        def on_exit(returncode: int, expected: bool):
+            bus.flush()
+            get_state_manager(config).set_stopped()
+            service.set_status(ServerStatus.OFFLINE)
+
+        def stopped_cleanly(started_at: float) -> bool:
+            # "All dimensions are saved" después del último arranque: un stop desde
+            # el juego o por RCON, no un crash.
+            event = bus.last_event.get(LogEventType.SERVER_STOPPED)
+            return event is not None and event.timestamp >= started_at
+
+        backend = SupervisorBackend(
+            on_line=bus.feed_line,
+            on_exit=on_exit,
+            stopped_cleanly=stopped_cleanly,
+            restart_on_crash=config.supervisor_restart_on_crash,
+            max_restarts=config.supervisor_max_restarts,
+        )
+    else:
+        backend = TmuxBackend(config.terminal_session_name)
+
+    _process_backends[config.server_path] = backend
+    return backend
+
+
 def get_leval_name(server_path: Path) -> str:
     props_file= server_path / "server.properties"
     level_name= "world"
@@ -64,17 +304,346 @@ def get_leval_name(server_path: Path) -> str:
     return level_name
 
 
-def perform_backup_zip(source_dir:Path, backup_folder:Path, world_name:str) -> Path:
+def perform_backup_zip(source_dir:Path, backup_folder:Path, world_name:str, config: MinecraftConfig, throttle: BackupThrottle | None = None, progress: BackupProgress | None = None) -> Path:
     """
-    Función bloqueante (CPU bound) que comprime la carpeta.
+    Función bloqueante que comprime la carpeta en un pool de procesos.
     Se ejecutará en un thread aparte.
     """
     timestamp= datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    filename= f"{world_name}_backup_{timestamp}"
+    filename= f"{world_name}_backup_{timestamp}.zip"
     archive_path= backup_folder / filename
 
-    final_path= shutil.make_archive(base_name= str(archive_path), format='zip', root_dir= source_dir, base_dir= world_name)
-    return Path(final_path)
+    return write_parallel_zip(
+        source_dir,
+        world_name,
+        archive_path,
+        codec=config.backup_compression,
+        level=config.backup_compression_level,
+        workers=config.backup_workers,
+        throttle=throttle,
+        io_priority=config.backup_io_priority,
+        progress=progress,
+    )
+
+
+def get_backup_dir(config: MinecraftConfig) -> Path:
+    """Carpeta de backups: `backup_path` si es absoluta, o relativa a la del servidor."""
+    if Path(config.backup_path).is_absolute():
+        return Path(config.backup_path)
+    return Path(config.server_path) / config.backup_path
+
+
+def get_backup_store(
+    backup_dir: Path, config: MinecraftConfig, throttle: BackupThrottle | None = None
+) -> BackupStore:
+    return BackupStore(
+        backup_dir / "store",
+        codec=config.backup_compression,
+        level=config.backup_compression_level,
+        throttle=throttle,
+    )
+
+
+def open_backup_catalog(backup_dir: Path) -> BackupCatalog:
+    """Abre el catálogo de backups. Si está vacío, registra los backups que ya hubiera en disco."""
+    catalog = BackupCatalog(backup_dir / "catalog.sqlite3")
+    if catalog.is_empty():
+        import_existing_backups(catalog, backup_dir)
+    return catalog
+
+
+def prune_backups(config: MinecraftConfig, backup_dir: Path) -> tuple[list[BackupRecord], int]:
+    """
+    Función bloqueante que aplica `backup_retention` a cada mundo del catálogo.
+
+    Devuelve los backups eliminados y los bytes liberados. Los objetos del almacén
+    incremental solo se borran cuando ningún snapshot restante los usa.
+    """
+    policy = parse_retention(config.backup_retention)
+    if not policy:
+        return [], 0
+
+    removed: list[BackupRecord] = []
+    freed = 0
+    store = None
+    with open_backup_catalog(backup_dir) as catalog:
+        records = catalog.list()
+        keep: set[str] = set()
+        for world_name in {record.world_name for record in records}:
+            keep |= select_backups_to_keep(
+                [record for record in records if record.world_name == world_name], policy
+            )
+
+        for record in records:
+            if record.id in keep:
+                continue
+            if record.format == "zip":
+                archive = Path(record.location)
+                if archive.exists():
+                    freed += archive.stat().st_size
+                    archive.unlink()
+            else:
+                store = store or get_backup_store(backup_dir, config)
+                store.delete_snapshot(record.location)
+            catalog.remove(record.id)
+            removed.append(record)
+
+    if store is not None:
+        _, gc_freed = store.collect_garbage()
+        freed += gc_freed
+    return removed, freed
+
+
+def get_backup_record(backup_dir: Path, backup_id: str) -> BackupRecord | None:
+    with open_backup_catalog(backup_dir) as catalog:
+        return catalog.get(backup_id)
+
+
+def record_backup(
+    config: MinecraftConfig, backup_dir: Path, record: BackupRecord
+) -> tuple[list[BackupRecord], int]:
+    """Función bloqueante que registra un backup en el catálogo y aplica la retención."""
+    with open_backup_catalog(backup_dir) as catalog:
+        catalog.add(record)
+    return prune_backups(config, backup_dir)
+
+
+def extract_backup(
+    config: MinecraftConfig, backup_dir: Path, record: BackupRecord, staging_dir: Path, world_name: str
+) -> Path:
+    """
+    Función bloqueante que extrae y verifica un backup en `staging_dir/world_name`.
+
+    Un snapshot incremental se comprueba contra el checksum del catálogo (que fija el
+    hash de cada archivo) y luego objeto a objeto; un .zip, archivo a archivo con su CRC.
+    """
+    if record.format == "incremental":
+        store = get_backup_store(backup_dir, config)
+        if record.checksum and store.manifest_checksum(record.location) != record.checksum:
+            raise RestoreError(f"El manifiesto de `{record.id}` no coincide con el catálogo.")
+        staged_world = restore_snapshot(
+            store, record.location, staging_dir, workers=config.backup_workers
+        )
+    else:
+        staged_world = extract_zip(Path(record.location), staging_dir, config.backup_workers)
+
+    # El mundo pudo respaldarse con otro level-name: se restaura con el actual.
+    if staged_world.name != world_name:
+        staged_world = staged_world.rename(staging_dir / world_name)
+    return staged_world
+
+
+def get_uploader(config: MinecraftConfig) -> BackupUploader | None:
+    """Devuelve el destino de subida configurado, o None si no se suben los backups."""
+    if config.upload_target == "none":
+        return None
+    uploader = _uploaders.get(config.server_path)
+    if uploader is not None:
+        return uploader
+
+    if config.upload_target == "local":
+        if not config.upload_local_path:
+            raise UploadError("Falta MINECRAFT_UPLOAD_LOCAL_PATH para subir a una carpeta.")
+        uploader = LocalDirectoryUploader(Path(config.upload_local_path))
+    else:
+        if not config.upload_s3_bucket:
+            raise UploadError("Falta MINECRAFT_UPLOAD_S3_BUCKET para subir a S3.")
+        uploader = S3Uploader(
+            config.upload_s3_bucket,
+            prefix=config.upload_s3_prefix,
+            endpoint_url=config.upload_s3_endpoint_url,
+            region=config.upload_s3_region,
+            access_key=config.upload_s3_access_key,
+            secret_key=config.upload_s3_secret_key,
+            max_connections=config.upload_concurrency,
+        )
+    _uploaders[config.server_path] = uploader
+    return uploader
+
+
+async def _upload_worker(config: MinecraftConfig, queue: asyncio.Queue):
+    """Sube los backups de la cola uno detrás de otro, sin bloquear los comandos."""
+    while True:
+        backup_id = await queue.get()
+        _queued_uploads.discard((config.server_path, backup_id))
+        backup_dir = get_backup_dir(config)
+        try:
+            uploader = cast(BackupUploader, get_uploader(config))
+            record = await asyncio.to_thread(get_backup_record, backup_dir, backup_id)
+            if record is None:
+                # La retención lo borró antes de subirlo.
+                await asyncio.to_thread(UploadState(backup_dir / STATE_FILE).remove_pending, backup_id)
+                continue
+            store = get_backup_store(backup_dir, config) if record.format == "incremental" else None
+            stats = await run_backup_io(
+                config, upload_backup, uploader, backup_dir, record, store,
+                config.upload_concurrency, config.upload_part_size_mb * MB,
+            )
+            print(f"Subida: `{backup_id}` copiado a {uploader.describe()} {stats}.")
+        except Exception as e:
+            print(f"Subida: error al subir `{backup_id}`: {e}. Se reintentará con el siguiente backup.")
+        finally:
+            queue.task_done()
+
+
+def queue_backup_upload(config: MinecraftConfig, backup_id: str | None = None) -> bool:
+    """
+    Pone en cola la subida de un backup, junto con las que quedaron a medias.
+
+    La subida se hace en segundo plano y puede solaparse con el siguiente backup.
+    Devuelve False si no hay destino de subida o está mal configurado.
+    """
+    try:
+        if get_uploader(config) is None:
+            return False
+    except UploadError as e:
+        print(f"Subida: {e}")
+        return False
+
+    queue = _upload_queues.get(config.server_path)
+    if queue is None:
+        queue = _upload_queues[config.server_path] = asyncio.Queue()
+        _upload_tasks[config.server_path] = asyncio.create_task(_upload_worker(config, queue))
+
+    backup_ids = pending_uploads(get_backup_dir(config))
+    if backup_id is not None and backup_id not in backup_ids:
+        backup_ids.append(backup_id)
+    for pending_id in backup_ids:
+        if (config.server_path, pending_id) not in _queued_uploads:
+            _queued_uploads.add((config.server_path, pending_id))
+            queue.put_nowait(pending_id)
+    return True
+
+
+async def pause_world_saving(config: MinecraftConfig, timeout: float = 120):
+    """
+    Desactiva el guardado automático y fuerza un guardado completo del mundo.
+
+    Vuelve cuando el servidor confirma "Saved the game", ya sea en la respuesta de
+    `save-all flush` o, si esta tarda más que el timeout de RCON, en el log.
+    """
+    bus = get_event_bus(config) if has_server_events(config) else None
+    # La espera se registra antes de enviar el comando para no perder el evento.
+    saved = (
+        asyncio.ensure_future(bus.wait_for([LogEventType.WORLD_SAVED], timeout))
+        if bus is not None
+        else None
+    )
+    try:
+        save_off, flush = await get_server_rcon(config).execute_many(
+            ["save-off", "save-all flush"]
+        )
+        if isinstance(save_off, BaseException):
+            raise save_off
+        if isinstance(flush, str) and "Saved the game" in flush:
+            return
+        if isinstance(flush, BaseException) and not isinstance(flush, asyncio.TimeoutError):
+            raise flush
+
+        if saved is None:
+            # Sin log ni confirmación por RCON solo queda dar un margen fijo.
+            await asyncio.sleep(5)
+            return
+        if await saved is None:
+            raise TimeoutError(f"El servidor no confirmó el guardado en {timeout} segundos.")
+    finally:
+        if saved is not None:
+            saved.cancel()
+
+
+def should_snapshot(config: MinecraftConfig, staging_dir: Path) -> tuple[bool, bool]:
+    """
+    Decide si se copia el mundo antes de comprimir. Devuelve (copiar, usar reflink).
+
+    Con reflink la copia es instantánea y siempre compensa. Sin reflink, copiar el
+    mundo compensa frente a comprimirlo (zip), pero no frente a un backup
+    incremental, que ya solo lee lo que cambió.
+    """
+    if config.backup_snapshot == "off":
+        return False, False
+    reflink = supports_reflink(staging_dir)
+    if config.backup_snapshot == "always" or reflink:
+        return True, reflink
+    return config.backup_format == "zip", False
+
+
+def get_backup_throttle(config: MinecraftConfig) -> BackupThrottle:
+    return BackupThrottle.from_mb(
+        config.backup_read_mb_per_second, config.backup_write_mb_per_second
+    )
+
+
+async def run_backup_io(config: MinecraftConfig, func, *args):
+    """
+    Ejecuta una función bloqueante del backup en un hilo propio con la prioridad
+    `backup_io_priority`.
+
+    El hilo termina con la función: si se usara `asyncio.to_thread`, la prioridad
+    rebajada se quedaría en un hilo del pool compartido.
+    """
+    executor = ThreadPoolExecutor(
+        1,
+        thread_name_prefix="backup",
+        initializer=lower_io_priority,
+        initargs=(config.backup_io_priority,),
+    )
+    try:
+        return await asyncio.get_running_loop().run_in_executor(
+            executor, functools.partial(func, *args)
+        )
+    finally:
+        executor.shutdown(wait=False)
+
+
+async def adapt_backup_throttle(
+    config: MinecraftConfig, throttle: BackupThrottle, interval: float = 5.0
+):
+    """
+    Tarea que mide el MSPT del servidor mientras dura un backup y ajusta `throttle`.
+
+    El MSPT se pide por RCON; además, un "Can't keep up!" en el log cuenta como un
+    tick de al menos 50 ms, de modo que también se frena en servidores sin comando
+    de medida.
+    """
+    probe = MsptProbe(get_server_rcon(config))
+    lagging = False
+    unsubscribe = None
+    if has_server_events(config):
+
+        def on_event(event: LogEvent):
+            nonlocal lagging
+            if event.type == LogEventType.SERVER_OVERLOADED:
+                lagging = True
+
+        unsubscribe = get_event_bus(config).subscribe(on_event)
+
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                mspt = await probe.measure()
+            except (RCONConnectionError, RCONAuthError, asyncio.TimeoutError):
+                mspt = None
+            if lagging:
+                lagging = False
+                mspt = max(mspt or 0.0, 50.0)
+            if mspt is not None and throttle.adapt(mspt, config.backup_target_mspt):
+                print(f"Backup: MSPT {mspt:.1f} ms, límites ajustados a {throttle.describe()}.")
+    finally:
+        if unsubscribe is not None:
+            unsubscribe()
+
+
+async def wait_for_process_exit(
+    backend: ServerProcessBackend, timeout: float, interval: float = 1.0
+) -> bool:
+    """Espera a que termine el proceso del servidor. Devuelve False si no terminó a tiempo."""
+    deadline = time.monotonic() + timeout
+    while await backend.is_running():
+        if time.monotonic() >= deadline:
+            return False
+        await asyncio.sleep(interval)
+    return True
 
 
 # --- Tareas en segundo plano ---
@@ -91,26 +660,22 @@ async def check_and_announce_startup(
     """
     max_wait_seconds = 240
     check_interval_seconds = 15
-    attempts = max_wait_seconds // check_interval_seconds
-
-    for i in range(attempts):
-        status = await get_minecraft_server_status(config)
-        if status == ServerStatus.ONLINE:
-            await send_announcement(
-                bot=bot,
-                guild_manager=config_manager,
-                guild_id=guild_id,
-                title="Servidor de Minecraft Online",
-                description="El servidor de Minecraft ya está disponible para jugar.",
-                color=discord.Color.green(),
-                footer_text="¡Nos vemos dentro!",
-            )
-            return
 
-        print(
-            f"Intento {i+1}/{attempts}: El servidor aún no está online. Reintentando en {check_interval_seconds}s..."
+    service = get_status_service(config)
+    if await service.wait_for(
+        ServerStatus.ONLINE, max_wait_seconds, check_interval_seconds
+    ):
+        await send_announcement(
+            bot=bot,
+            guild_manager=config_manager,
+            guild_id=guild_id,
+            title="Servidor de Minecraft Online",
+            description="El servidor de Minecraft ya está disponible para jugar.",
+            color=discord.Color.green(),
+            footer_text="¡Nos vemos dentro!",
+            server_name=config.name,
         )
-        await asyncio.sleep(check_interval_seconds)
+        return
 
     print(
         f"El servidor no se inició después de {max_wait_seconds} segundos. Se cancela el anuncio."
@@ -128,26 +693,22 @@ async def check_and_announce_shutdown(
     """
     max_wait_seconds = 120
     check_interval_seconds = 3
-    attempts = max_wait_seconds // check_interval_seconds
-
-    for i in range(attempts):
-        status = await get_minecraft_server_status(config)
-        if status == ServerStatus.OFFLINE:
-            await send_announcement(
-                bot=bot,
-                guild_manager=config_manager,
-                guild_id=guild_id,
-                title="Servidor de Minecraft Desconectado",
-                description="El servidor de Minecraft se ha desconectado.",
-                color=discord.Color.red(),
-                footer_text="¡Hasta pronto!",
-            )
-            return
 
-        print(
-            f"Intento {i+1}/{attempts}: El servidor aún no se desconectó. Reintentando en {check_interval_seconds}s..."
+    service = get_status_service(config)
+    if await service.wait_for(
+        ServerStatus.OFFLINE, max_wait_seconds, check_interval_seconds
+    ):
+        await send_announcement(
+            bot=bot,
+            guild_manager=config_manager,
+            guild_id=guild_id,
+            title="Servidor de Minecraft Desconectado",
+            description="El servidor de Minecraft se ha desconectado.",
+            color=discord.Color.red(),
+            footer_text="¡Hasta pronto!",
+            server_name=config.name,
         )
-        await asyncio.sleep(check_interval_seconds)
+        return
 
     print(
         f"El servidor no se desconectó en {max_wait_seconds} segundos. Se cancela el anuncio."
@@ -175,14 +736,14 @@ async def start_minecraft_server(
     config_manager: GuildConfigManager,
 ):
     """
-    Inicia el servidor de Minecraft en una sesión 'tmux' si no está ya corriendo.
+    Inicia el servidor de Minecraft (en tmux o supervisado) si no está ya corriendo.
     """
     await interaction.response.defer(ephemeral=True)
 
-    session_name = config.terminal_session_name
-    if exists_tmux_session(session_name):
+    backend = get_process_backend(config)
+    if await backend.is_running():
         await interaction.followup.send(
-            f"El servidor de Minecraft ya está en ejecución en la sesión de tmux `{session_name}`."
+            f"El servidor de Minecraft ya está en ejecución en {backend.describe()}."
         )
         return
 
@@ -204,9 +765,8 @@ async def start_minecraft_server(
         return
 
     try:
-
         guild_id = cast(int, interaction.guild_id)
-        response_message = f"¡Iniciando el servidor en la sesión `{session_name}`!"
+        response_message = "¡Iniciando el servidor!"
         if not config_manager.get_announcement_channel(guild_id):
             response_message += (
                 "\n\n**Nota:** Para que anuncie públicamente cuando esté listo, "
@@ -215,40 +775,162 @@ async def start_minecraft_server(
         else:
             response_message += " Se anunciará públicamente cuando esté listo."
 
-        state_manager.set_starting()
-        subprocess.Popen(
-            ["tmux", "new-session", "-s", session_name, "-d", str(start_script)]
-        )
-
-        await interaction.followup.send(response_message)
-
         bot = cast(commands.Bot, interaction.client)
-        bot.loop.create_task(
-            check_and_announce_startup(bot, config, guild_id, config_manager)
-        )
+        await launch_minecraft_server(bot, config, guild_id, config_manager)
+        await interaction.followup.send(response_message)
 
     except Exception as e:
-        state_manager.set_stopped()
         await interaction.followup.send(
             f"**Error inesperado al iniciar el servidor:**\n```\n{e}\n```"
         )
 
 
+async def launch_minecraft_server(
+    bot: commands.Bot,
+    config: MinecraftConfig,
+    guild_id: int,
+    config_manager: GuildConfigManager,
+):
+    """
+    Arranca el proceso del servidor y programa el anuncio de cuando esté listo.
+
+    Si el servidor estaba dormido, primero libera el puerto del juego. Lanza la
+    excepción del backend si no se pudo iniciar.
+    """
+    await release_wake_listener(config)
+    get_state_manager(config).set_starting()
+    get_status_service(config).invalidate()
+    try:
+        await get_process_backend(config).start(Path(config.server_path) / "start.sh")
+    except Exception:
+        get_state_manager(config).set_stopped()
+        raise
+    bot.loop.create_task(
+        check_and_announce_startup(bot, config, guild_id, config_manager)
+    )
+
+
+def is_hibernating(config: MinecraftConfig) -> bool:
+    """Indica si el servidor está dormido con el listener escuchando en su puerto."""
+    listener = _wake_listeners.get(config.server_path)
+    return listener is not None and listener.is_serving
+
+
+async def ensure_wake_listener(
+    bot: commands.Bot,
+    config: MinecraftConfig,
+    guild_id: int,
+    config_manager: GuildConfigManager,
+) -> bool:
+    """
+    Ocupa el puerto del juego si el servidor debe estar dormido y no lo está ya.
+
+    Devuelve False si no toca o si el puerto sigue ocupado (p. ej. el proceso aún no
+    ha terminado); la vigilancia de cada minuto lo vuelve a intentar.
+    """
+    if config.server_path not in _hibernating:
+        return False
+    if is_hibernating(config):
+        return True
+    if await get_process_backend(config).is_running():
+        return False
+
+    listener = WakeOnJoinListener(
+        config.wake_on_join_host,
+        config.game_port,
+        on_wake=functools.partial(wake_server, bot, config, guild_id, config_manager),
+        motd=config.wake_on_join_motd,
+        allowed_players=[
+            name.strip() for name in config.wake_on_join_players.split(",") if name.strip()
+        ],
+    )
+    try:
+        await listener.start()
+    except OSError as e:
+        print(
+            f"Wake-on-join [{config.name}]: el puerto {config.game_port} sigue ocupado ({e}); "
+            "se reintentará."
+        )
+        return False
+    _wake_listeners[config.server_path] = listener
+    get_status_service(config).invalidate()
+    print(f"Wake-on-join [{config.name}]: servidor dormido, escuchando en el puerto {listener.port}.")
+    return True
+
+
+async def hibernate_server(
+    bot: commands.Bot,
+    config: MinecraftConfig,
+    guild_id: int,
+    config_manager: GuildConfigManager,
+    wait_seconds: float = 180,
+):
+    """
+    Deja el servidor dormido: cuando su proceso termine, el puerto del juego queda
+    escuchando para iniciarlo en cuanto alguien intente entrar.
+
+    Solo se llama tras un apagado pedido (auto-apagado, /server_stop o al arrancar
+    el bot con el servidor parado); nunca tras un crash que el supervisor reinicia.
+    """
+    if not config.wake_on_join_enabled:
+        return
+    _hibernating.add(config.server_path)
+    await wait_for_process_exit(get_process_backend(config), wait_seconds)
+    await ensure_wake_listener(bot, config, guild_id, config_manager)
+
+
+async def release_wake_listener(config: MinecraftConfig):
+    """Despierta el servidor a efectos del puerto: deja de escuchar y lo libera."""
+    _hibernating.discard(config.server_path)
+    listener = _wake_listeners.pop(config.server_path, None)
+    if listener is not None:
+        await listener.stop()
+        get_status_service(config).invalidate()
+
+
+async def wake_server(
+    bot: commands.Bot,
+    config: MinecraftConfig,
+    guild_id: int,
+    config_manager: GuildConfigManager,
+    player: str,
+):
+    """Inicia el servidor dormido porque `player` ha intentado entrar."""
+    print(f"Wake-on-join [{config.name}]: {player} quiere entrar. Iniciando el servidor.")
+    try:
+        await launch_minecraft_server(bot, config, guild_id, config_manager)
+    except Exception as e:
+        print(f"Wake-on-join [{config.name}]: no se pudo iniciar el servidor: {e}")
+        # Sigue dormido: la vigilancia volverá a ocupar el puerto.
+        _hibernating.add(config.server_path)
+        return
+    await send_announcement(
+        bot=bot,
+        guild_manager=config_manager,
+        guild_id=guild_id,
+        title="Servidor Despertando",
+        description=f"**{player}** ha intentado entrar en el servidor dormido. Se está iniciando.",
+        color=discord.Color.blue(),
+        footer_text="Se anunciará cuando esté listo para jugar.",
+        server_name=config.name,
+    )
+
+
 async def stop_minecraft_server(
     interaction: discord.Interaction,
     config: MinecraftConfig,
     config_manager: GuildConfigManager,
 ):
     """
-    Envía el comando 'stop' a la sesión tmux del servidor de Minecraft.
+    Envía el comando 'stop' a la consola del servidor de Minecraft.
     """
     await interaction.response.defer(ephemeral=True)
-    session_name = config.terminal_session_name
+    backend = get_process_backend(config)
 
-    if not exists_tmux_session(session_name):
-        state_manager.set_stopped()
+    if not await backend.is_running():
+        get_state_manager(config).set_stopped()
         await interaction.followup.send(
-            f"El servidor de Minecraft no está en ejecución. No se encontró la sesión de tmux `{session_name}`."
+            f"El servidor de Minecraft no está en ejecución. No se encontró {backend.describe()}."
         )
         return
 
@@ -261,25 +943,19 @@ async def stop_minecraft_server(
 
     try:
         guild_id = cast(int, interaction.guild_id)
-        subprocess.run(
-            [
-                "tmux",
-                "send-keys",
-                "-t",
-                session_name,
-                "stop",
-                "C-m",  # Enviamos el comando 'stop' y luego la tecla Enter (C-m)
-            ]
-        )
+        await backend.stop()
+        get_status_service(config).invalidate()
 
         bot = cast(commands.Bot, interaction.client)
         bot.loop.create_task(
             check_and_announce_shutdown(bot, config, guild_id, config_manager)
         )
+        bot.loop.create_task(hibernate_server(bot, config, guild_id, config_manager))
 
-        await interaction.followup.send(
-            f"Comando de apagado enviado al servidor. La sesión de tmux `{session_name}` se cerrará en breve."
-        )
+        message = f"Comando de apagado enviado al servidor. {backend.describe().capitalize()} se cerrará en breve."
+        if config.wake_on_join_enabled:
+            message += " Después quedará dormido: se iniciará cuando alguien intente entrar."
+        await interaction.followup.send(message)
 
     except Exception as e:
         await interaction.followup.send(
@@ -370,6 +1046,48 @@ async def check_server_status(
         await interaction.followup.send("**El servidor de Minecraft está Offline.**")
 
 
+async def show_performance(
+    interaction: discord.Interaction, config: MinecraftConfig, window: str = "hora"
+):
+    """
+    Muestra las métricas del servidor en la última hora, día o mes con gráficas de
+    una línea. Solo lee el historial en memoria: no consulta el servidor ni el disco.
+    """
+    if not config.telemetry_enabled:
+        await interaction.response.send_message(
+            "La telemetría está desactivada (`MINECRAFT_TELEMETRY_ENABLED`).", ephemeral=True
+        )
+        return
+    store = get_telemetry_store(config)
+    if not store.latest:
+        await interaction.response.send_message(
+            "Todavía no hay muestras: el servidor debe estar encendido unos segundos.",
+            ephemeral=True,
+        )
+        return
+
+    now = time.time()
+    labels = {"hora": "la última hora", "dia": "el último día", "mes": "el último mes"}
+    lines = []
+    for metric, (label, _, _) in METRICS.items():
+        series = store.window(metric, window, now)
+        values = [value for value in series if not math.isnan(value)]
+        if metric not in store.latest or not values:
+            lines.append(f"{label:<10} sin datos")
+            continue
+        current = format_value(metric, store.latest[metric][1])
+        lines.append(
+            f"{label:<10} {sparkline(series)} {current} "
+            f"({format_value(metric, min(values))}–{format_value(metric, max(values))})"
+        )
+    await interaction.response.send_message(
+        f"**Rendimiento de `{config.name}` en {labels[window]}:**\n```\n"
+        + "\n".join(lines)
+        + "\n```",
+        ephemeral=True,
+    )
+
+
 async def set_announcement_channel_logic(
     interaction: discord.Interaction,
     channel: discord.TextChannel,
@@ -386,90 +1104,440 @@ async def set_announcement_channel_logic(
     )
 
 
-async def backup_server(interaction: discord.Interaction, config: MinecraftConfig):
-    global _backup_in_progress
+def get_last_backup_time(backup_dir: Path, world_name: str) -> float | None:
+    """Fecha del backup más reciente del mundo según el catálogo."""
+    with open_backup_catalog(backup_dir) as catalog:
+        records = catalog.list(world_name, limit=1)
+    return records[0].created_at if records else None
 
-    if _backup_in_progress:
-        await interaction.response.send_message(
-            "Ya hay un backup en progreso. Por favor, espera a que termine antes de iniciar otro.",
-            ephemeral=True,
-        )
-        return
 
-    _backup_in_progress = True
+def regions_changed_since(world_path: Path, timestamp: float) -> bool:
+    """
+    Función bloqueante que indica si algún archivo de región (.mca) del mundo se
+    modificó después de `timestamp`. Sin chunks modificados no hay nada nuevo que
+    respaldar, aunque el servidor siga reescribiendo level.dat en cada autoguardado.
+    """
+    for dirpath, _, filenames in os.walk(world_path):
+        for name in filenames:
+            if not name.endswith(".mca"):
+                continue
+            try:
+                if os.stat(os.path.join(dirpath, name)).st_mtime > timestamp:
+                    return True
+            except FileNotFoundError:
+                continue
+    return False
+
+
+async def stream_backup_progress(
+    progress: BackupProgress,
+    send: Callable[[str], Awaitable[Any]],
+    interval: float = PROGRESS_EDIT_SECONDS,
+):
+    """
+    Muestra el progreso del backup en un único mensaje que se edita cada `interval`
+    segundos con la velocidad (MB/s) y el tiempo restante.
+
+    `send` debe devolver el mensaje enviado para poder editarlo. Al cancelarse hace
+    una última edición con el estado final.
+    """
+    message = None
+    last_text = None
+
+    async def update():
+        nonlocal message, last_text
+        text = progress.snapshot().describe()
+        if text == last_text:
+            return
+        last_text = text
+        if message is None:
+            message = await send(text)
+        else:
+            await message.edit(content=text)
 
     try:
-        await interaction.response.defer(ephemeral=False)
+        while True:
+            await update()
+            await asyncio.sleep(interval)
+    except asyncio.CancelledError:
+        try:
+            await update()
+        except discord.HTTPException:
+            pass
+        raise
+    except discord.HTTPException as e:
+        # El token de una interacción caduca a los 15 minutos y ya no se puede editar.
+        print(f"Backup: no se pudo actualizar el progreso en Discord: {e}")
+
+
+async def stop_task(task: asyncio.Task | None):
+    """Cancela una tarea auxiliar y espera a que termine."""
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
 
-        server_path= Path(config.server_path)
-        level_name= get_leval_name(server_path)
-        world_path= server_path / level_name
 
-        # Determinar dónde guardar el backup
-        if Path(config.backup_path).is_absolute():
-            backup_dir= Path(config.backup_path)
-        else:
-            backup_dir= server_path / config.backup_path
+async def run_backup(
+    config: MinecraftConfig,
+    notify: Callable[[str], Awaitable[Any]],
+    needs_backup: Callable[[float | None], Awaitable[bool]] | None = None,
+    send_progress: Callable[[str], Awaitable[Any]] | None = None,
+) -> str | None:
+    """
+    Crea un backup del mundo y devuelve un resumen, o None si `needs_backup`
+    decide que no hace falta.
+
+    Si hay otra operación de backup en curso (manual, programada, poda o
+    restauración) del mismo servidor espera su turno en su lock en lugar de rechazarse.
+    `needs_backup` recibe la fecha del último backup del mundo y se evalúa ya con el
+    turno, de modo que tiene en cuenta el backup que acaba de terminar.
+    `notify` recibe los avisos de cada paso. Si se da `send_progress`, los bytes y
+    archivos procesados se muestran en un mensaje que se va editando (ver
+    `stream_backup_progress`).
+    """
+    if get_backup_lock(config).locked():
+        await notify("Hay otra operación de backup en curso; este backup empezará cuando termine.")
+
+    async with get_backup_lock(config):
+        server_path = Path(config.server_path)
+        level_name = get_leval_name(server_path)
+        world_path = server_path / level_name
+        if not world_path.exists():
+            raise FileNotFoundError(
+                f"No se encontró la carpeta del mundo `{level_name}` en la ruta `{world_path}`."
+            )
 
+        # Determinar dónde guardar el backup
+        backup_dir = get_backup_dir(config)
         backup_dir.mkdir(parents=True, exist_ok=True)
 
-        if not world_path.exists():
-            await interaction.followup.send(
-                f"**Error:** No se encontró la carpeta del mundo `{level_name}` en la ruta `{world_path}`."
+        if needs_backup is not None:
+            last_backup = await asyncio.to_thread(get_last_backup_time, backup_dir, level_name)
+            if not await needs_backup(last_backup):
+                return None
+
+        return await _create_backup(
+            config, notify, server_path, level_name, backup_dir, send_progress
+        )
+
+
+async def _create_backup(
+    config: MinecraftConfig,
+    notify: Callable[[str], Awaitable[Any]],
+    server_path: Path,
+    level_name: str,
+    backup_dir: Path,
+    send_progress: Callable[[str], Awaitable[Any]] | None = None,
+) -> str:
+    world_path= server_path / level_name
+    status= await get_minecraft_server_status(config)
+    is_online= status == ServerStatus.ONLINE
+    saving_paused= False
+    staging_root= backup_dir / ".staging"
+    source_dir= server_path
+    started= time.monotonic()
+    throttle= get_backup_throttle(config)
+    adapt_task= None
+    progress= BackupProgress()
+    progress_task= None
+
+    try:
+        if is_online:
+            await notify(f"El servidor está online. Preparando para el backup...")
+            if send_progress is not None:
+                progress_task= asyncio.create_task(stream_backup_progress(progress, send_progress))
+            if config.backup_target_mspt > 0:
+                adapt_task= asyncio.create_task(adapt_backup_throttle(config, throttle))
+
+            # Poner el mundo en modo solo lectura y esperar a que todo esté en disco
+            saving_paused= True
+            await pause_world_saving(config)
+
+            staging_root.mkdir(exist_ok=True)
+            use_snapshot, use_reflink= await asyncio.to_thread(should_snapshot, config, staging_root)
+            if use_snapshot:
+                # Fase 1: copia rápida del mundo y el servidor vuelve a guardar enseguida.
+                await asyncio.to_thread(shutil.rmtree, staging_root / level_name, True)
+                counts= await run_backup_io(
+                    config, snapshot_directory, world_path, staging_root / level_name, use_reflink,
+                    throttle, progress,
+                )
+                print(f"Backup: snapshot del mundo listo {counts}.")
+                await get_server_rcon(config).execute("save-on")
+                saving_paused= False
+                source_dir= staging_root
+        else:
+            await notify(f"El servidor está offline. Iniciando el backup...")
+            if send_progress is not None:
+                progress_task= asyncio.create_task(stream_backup_progress(progress, send_progress))
+
+        # Fase 2: comprimir (desde la copia si la hay)
+        if config.backup_format == "incremental":
+            if progress_task is None:
+                await notify(f"Guardando los cambios del mundo `{level_name}`...")
+
+            store= get_backup_store(backup_dir, config, throttle)
+            manifest, stats= await run_backup_io(config, create_snapshot, store, source_dir, level_name, progress)
+            backup_name= manifest.id
+            checksum= await asyncio.to_thread(store.manifest_checksum, manifest.id)
+            record= BackupRecord(
+                manifest.id, level_name, "incremental", manifest.created_at, stats.bytes_total,
+                stats.bytes_stored, time.monotonic() - started, checksum, manifest.id,
             )
-            return
-        
-        status= await get_minecraft_server_status(config)
-        is_online= status == ServerStatus.ONLINE
+            summary= (
+                f"{stats.files_changed}/{stats.files_total} archivos cambiados, "
+                f"{stats.bytes_stored / (1024 * 1024):.2f} MB nuevos de "
+                f"{stats.bytes_total / (1024 * 1024):.2f} MB, en {stats.elapsed:.1f} s"
+            )
+        else:
+            if progress_task is None:
+                await notify(f"Comprimiendo la carpeta del mundo `{level_name}`...")
+
+            final_zip_path= await run_backup_io(config, perform_backup_zip, source_dir, backup_dir, level_name, config, throttle, progress)
+            backup_name= final_zip_path.name
+            zip_size= final_zip_path.stat().st_size
+            checksum= await run_backup_io(config, sha256_file, final_zip_path)
+            record= BackupRecord(
+                final_zip_path.name, level_name, "zip", time.time(), zip_size,
+                zip_size, time.monotonic() - started, checksum, str(final_zip_path),
+            )
+            summary= f"{zip_size / (1024 * 1024):.2f} MB"
+
+        await stop_task(progress_task)
+        progress_task= None
+        if adapt_task is not None:
+            adapt_task.cancel()
+            adapt_task= None
+        if throttle.reads.rate is not None or throttle.writes.rate is not None:
+            summary += f"; límites al terminar: {throttle.describe()}"
+
+        if saving_paused:
+            # Volver a poner el mundo en modo escritura y avisar en una sola ráfaga
+            raise_first_error(
+                await get_server_rcon(config).execute_many(
+                    ["save-on", f"say Backup completado: {backup_name}."]
+                )
+            )
+            saving_paused= False
+        elif is_online:
+            await get_server_rcon(config).execute(f"say Backup completado: {backup_name}.")
+
+        # Registrar en el catálogo y podar con el guardado ya reactivado
+        removed, freed= await asyncio.to_thread(record_backup, config, backup_dir, record)
+        if removed:
+            summary += (
+                f"; retención: {len(removed)} backups antiguos eliminados, "
+                f"{freed / (1024 * 1024):.2f} MB liberados"
+            )
+        if queue_backup_upload(config, record.id):
+            summary += f"; subiéndose a {cast(BackupUploader, get_uploader(config)).describe()} en segundo plano"
+        return f"`{backup_name}` ({summary})"
+    except Exception:
+        if saving_paused:
+            try:
+                await get_server_rcon(config).execute("save-on")
+            except Exception:
+                # TODO: Si esto falla, tenemos grandes problemas.
+                # Significa que el mundo se queda en modo solo lectura.
+                pass
+        raise
+    finally:
+        if adapt_task is not None:
+            adapt_task.cancel()
+        await stop_task(progress_task)
+        if (staging_root / level_name).exists():
+            await asyncio.to_thread(shutil.rmtree, staging_root / level_name, True)
 
-        try:
-            if is_online:
-                await interaction.followup.send(f"El servidor está online. Preparando para el backup...")
 
-                async with SimpleRCONClient(
-                    config.rcon_host, config.rcon_port, config.rcon_password
-                ) as client:
-                    # Poner el mundo en modo solo lectura
-                    await client.execute("save-off")
-                    await client.execute("save-all")
+async def backup_server(interaction: discord.Interaction, config: MinecraftConfig):
+    await interaction.response.defer(ephemeral=False)
+    try:
+        summary = await run_backup(
+            config,
+            interaction.followup.send,
+            send_progress=functools.partial(interaction.followup.send, wait=True),
+        )
+        await interaction.followup.send(f"Backup completado: {summary}.")
+    except Exception as e:
+        await interaction.followup.send(
+            f"**Error inesperado al crear el backup:**\n```\n{e}\n```"
+        )
+
 
-                    await asyncio.sleep(5)  # Esperar un momento para asegurar que se guarden los datos
-            else:
-                await interaction.followup.send(f"El servidor está offline. Iniciando el backup...")
+def format_size(size: int) -> str:
+    if size >= 1024**3:
+        return f"{size / 1024**3:.2f} GB"
+    return f"{size / (1024 * 1024):.2f} MB"
+
+
+async def list_backups(interaction: discord.Interaction, config: MinecraftConfig, limit: int = 15):
+    """
+    Muestra los backups más recientes consultando solo el catálogo.
+    """
+    await interaction.response.defer(ephemeral=True)
+
+    def read_catalog() -> tuple[list[BackupRecord], int]:
+        with open_backup_catalog(get_backup_dir(config)) as catalog:
+            records = catalog.list()
+        return records[:limit], len(records)
+
+    records, total = await asyncio.to_thread(read_catalog)
+    if not records:
+        await interaction.followup.send("Todavía no hay backups registrados.")
+        return
+
+    lines = [f"**Backups ({len(records)} de {total}):**"]
+    for record in records:
+        created = datetime.fromtimestamp(record.created_at).strftime("%Y-%m-%d %H:%M")
+        line = f"`{record.id}` · {created} · {format_size(record.size_bytes)}"
+        if record.format == "incremental":
+            line += f" (nuevos: {format_size(record.stored_bytes)})"
+        else:
+            line += " (zip)"
+        lines.append(line)
+    await interaction.followup.send("\n".join(lines))
 
-            # Realiza la compresion
 
-            await interaction.followup.send(f"Comprimiendo la carpeta del mundo `{level_name}`...")
+async def prune_backups_command(interaction: discord.Interaction, config: MinecraftConfig):
+    """
+    Aplica la política de retención configurada y borra los backups sobrantes.
+    """
+    if not config.backup_retention:
+        await interaction.response.send_message(
+            "No hay una política de retención configurada (`MINECRAFT_BACKUP_RETENTION`).",
+            ephemeral=True,
+        )
+        return
+    await interaction.response.defer(ephemeral=True)
+    if get_backup_lock(config).locked():
+        await interaction.followup.send("Hay un backup en progreso; la poda se hará cuando termine.")
+    try:
+        async with get_backup_lock(config):
+            removed, freed = await asyncio.to_thread(prune_backups, config, get_backup_dir(config))
+        if not removed:
+            await interaction.followup.send("No hay backups que eliminar según la política actual.")
+            return
+        await interaction.followup.send(
+            f"Eliminados {len(removed)} backups antiguos ({format_size(freed)} liberados)."
+        )
+    except Exception as e:
+        await interaction.followup.send(f"**Error al podar los backups:**\n```\n{e}\n```")
+
+
+def search_backup_ids(config: MinecraftConfig, current: str, limit: int = 25) -> list[str]:
+    """IDs de los backups más recientes que contienen `current`, para el autocompletado."""
+    with open_backup_catalog(get_backup_dir(config)) as catalog:
+        records = catalog.list()
+    return [record.id for record in records if current.lower() in record.id.lower()][:limit]
+
+
+async def restore_backup(
+    interaction: discord.Interaction,
+    config: MinecraftConfig,
+    config_manager: GuildConfigManager,
+    backup_id: str,
+):
+    """
+    Restaura un backup del catálogo sustituyendo el mundo actual.
 
-            final_zip_path= await asyncio.to_thread(perform_backup_zip, source_dir= server_path, backup_folder= backup_dir, world_name= level_name)
+    El backup se extrae y verifica con el servidor aún encendido; solo entonces se
+    apaga, se intercambian las carpetas y se vuelve a iniciar si estaba en marcha.
+    El mundo sustituido se conserva en `.restore/` hasta la siguiente restauración.
+    """
+    await interaction.response.defer(ephemeral=False)
+    if get_backup_lock(config).locked():
+        await interaction.followup.send(
+            "Hay un backup en progreso; la restauración empezará cuando termine."
+        )
 
+    async with get_backup_lock(config):
 
-            file_size_mb= final_zip_path.stat().st_size / (1024 * 1024)
+        server_path = Path(config.server_path)
+        level_name = get_leval_name(server_path)
+        world_path = server_path / level_name
+        backup_dir = get_backup_dir(config)
 
-            if is_online:
-                async with SimpleRCONClient(
-                    config.rcon_host, config.rcon_port, config.rcon_password
-                ) as client:
-                    # Volver a poner el mundo en modo escritura
-                    await client.execute("save-on")
-                    await client.execute(f"say Backup completado: {final_zip_path.name}.")
-            
+        record = await asyncio.to_thread(get_backup_record, backup_dir, backup_id)
+        if record is None:
             await interaction.followup.send(
-                f"Backup completado: `{final_zip_path.name}` ({file_size_mb:.2f} MB)."
+                f"**Error:** No existe el backup `{backup_id}`. Usa `/backup_list` para ver los disponibles."
             )
-        except Exception as e:
-            if is_online:
+            return
+
+        # Misma carpeta que el mundo, para que el intercambio sea un simple renombrado.
+        staging_dir = server_path / ".restore"
+        backend = get_process_backend(config)
+        was_running = False
+        swapped = False
+        restarted = False
+        started = time.monotonic()
+
+        try:
+            await interaction.followup.send(f"Extrayendo y verificando `{record.id}`...")
+            await asyncio.to_thread(shutil.rmtree, staging_dir, True)
+            staging_dir.mkdir()
+            staged_world = await asyncio.to_thread(
+                extract_backup, config, backup_dir, record, staging_dir, level_name
+            )
+
+            was_running = await backend.is_running()
+            downtime_start = time.monotonic()
+            if was_running:
+                await interaction.followup.send("Backup verificado. Apagando el servidor para cambiar el mundo...")
                 try:
-                    async with SimpleRCONClient(
-                        config.rcon_host, config.rcon_port, config.rcon_password
-                    ) as client:
-                        await client.execute("save-on")
-                except Exception:
-                    # TODO: Si esto falla, tenemos grandes problemas.
-                    # Significa que el mundo se queda en modo solo lectura.
+                    await get_server_rcon(config).execute(
+                        "say El servidor se reinicia para restaurar un backup."
+                    )
+                except (RCONConnectionError, RCONAuthError, asyncio.TimeoutError):
                     pass
-            await interaction.followup.send(
-                f"**Error inesperado al crear el backup:**\n```\n{e}\n```"
-            )        
-    finally:
-        _backup_in_progress = False
\ No newline at end of file
+                await backend.stop()
+                get_status_service(config).invalidate()
+                if not await wait_for_process_exit(backend, timeout=180):
+                    raise TimeoutError("El servidor no se apagó en 180 segundos; no se ha tocado el mundo.")
+
+            previous = await asyncio.to_thread(
+                swap_world, staged_world, world_path, staging_dir / f"{level_name}.previous"
+            )
+            swapped = True
+
+            if was_running:
+                get_state_manager(config).set_starting()
+                get_status_service(config).invalidate()
+                await backend.start(server_path / "start.sh")
+                restarted = True
+                bot = cast(commands.Bot, interaction.client)
+                bot.loop.create_task(
+                    check_and_announce_startup(
+                        bot, config, cast(int, interaction.guild_id), config_manager
+                    )
+                )
+
+            summary = f"Backup `{record.id}` restaurado en {time.monotonic() - started:.1f} s"
+            if was_running:
+                summary += f" (servidor parado {time.monotonic() - downtime_start:.1f} s; iniciándose de nuevo)"
+            if previous is not None:
+                summary += f". El mundo anterior se guardó en `{previous.relative_to(server_path)}`"
+            await interaction.followup.send(summary + ".")
+        except Exception as e:
+            if not swapped:
+                await asyncio.to_thread(shutil.rmtree, staging_dir / level_name, True)
+            message = f"**Error al restaurar el backup:**\n```\n{e}\n```"
+            if was_running and not restarted:
+                # No dejar el servidor apagado por un fallo de la restauración.
+                try:
+                    if not await backend.is_running():
+                        get_state_manager(config).set_starting()
+                        await backend.start(server_path / "start.sh")
+                except Exception as restart_error:
+                    get_state_manager(config).set_stopped()
+                    message += (
+                        "\n**Tampoco se pudo volver a iniciar el servidor:**"
+                        f"\n```\n{restart_error}\n```"
+                    )
+                finally:
+                    get_status_service(config).invalidate()
+            await interaction.followup.send(message)
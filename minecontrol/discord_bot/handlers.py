@@ -1,3 +1,4 @@
+import asyncio
 from collections.abc import Sequence
 from pathlib import Path
 from typing import cast
@@ -7,20 +8,36 @@ from discord import app_commands
 from discord.app_commands import AppCommandError, CheckFailure
 from discord.ext import commands
 
-from minecontrol.config import ManagerConfig
+from minecontrol.config import ManagerConfig, MinecraftConfig
 from minecontrol.discord_bot.guild_config import GuildConfigManager
 
 from .commands import (
     backup_server,
     check_server_status,
     echo,
+    list_backups,
+    prune_backups_command,
+    queue_backup_upload,
+    restore_backup,
+    search_backup_ids,
     set_announcement_channel_logic,
     setup_bot_role,
+    show_performance,
+    has_server_events,
+    start_log_watcher,
     start_minecraft_server,
     stop_minecraft_server,
 )
 from .logging_utils import log_command_usage, setup_command_logger
-from .tasks import auto_shutdown_loop
+from .tasks import (
+    get_schedule_state,
+    hibernate_if_stopped,
+    monitor_servers_loop,
+    record_player_activity,
+    start_auto_shutdown,
+    start_telemetry,
+    watch_backup_activity,
+)
 
 config_manager = GuildConfigManager(Path("guild_configs.json"))
 command_logger = setup_command_logger()
@@ -68,6 +85,31 @@ async def is_admin(interaction: discord.Interaction) -> bool:
 def register_handlers_discord(bot: commands.Bot, config: ManagerConfig):
     """Registra los slash commands y eventos para el bot de Discord."""
     guild_obj = discord.Object(id=config.discord_config.guild_id)
+    server_description = "Servidor de Minecraft (por defecto, el primero configurado)"
+
+    async def server_autocomplete(
+        interaction: discord.Interaction, current: str
+    ) -> list[app_commands.Choice[str]]:
+        current = current.lower()
+        return [
+            app_commands.Choice(name=name, value=name)
+            for name in config.servers
+            if current in name
+        ][:25]
+
+    async def resolve_server(
+        interaction: discord.Interaction, server: str | None
+    ) -> MinecraftConfig | None:
+        """Devuelve el servidor elegido o responde con los disponibles si no existe."""
+        try:
+            return config.get_server(server)
+        except KeyError:
+            await interaction.response.send_message(
+                f"No hay ningún servidor llamado `{server}`. "
+                f"Disponibles: {', '.join(f'`{name}`' for name in config.servers)}.",
+                ephemeral=True,
+            )
+            return None
 
     # --- Comandos Administrativos ---
     # Comando setup
@@ -114,12 +156,14 @@ def register_handlers_discord(bot: commands.Bot, config: ManagerConfig):
         description="Inicia el servidor de Minecraft si está apagado.",
         guild=guild_obj,
     )
+    @app_commands.describe(server=server_description)
+    @app_commands.autocomplete(server=server_autocomplete)
     @app_commands.check(is_admin)
     @log_command
-    async def server_start(interaction: discord.Interaction):
-        await start_minecraft_server(
-            interaction, config.minecraft_config, config_manager
-        )
+    async def server_start(interaction: discord.Interaction, server: str | None = None):
+        mc_config = await resolve_server(interaction, server)
+        if mc_config is not None:
+            await start_minecraft_server(interaction, mc_config, config_manager)
 
     @server_start.error
     async def server_start_error(
@@ -145,12 +189,14 @@ def register_handlers_discord(bot: commands.Bot, config: ManagerConfig):
         description="Detiene el servidor de Minecraft si estaba corriendo.",
         guild=guild_obj,
     )
+    @app_commands.describe(server=server_description)
+    @app_commands.autocomplete(server=server_autocomplete)
     @app_commands.check(is_admin)
     @log_command
-    async def server_stop(interaction: discord.Interaction):
-        await stop_minecraft_server(
-            interaction, config.minecraft_config, config_manager
-        )
+    async def server_stop(interaction: discord.Interaction, server: str | None = None):
+        mc_config = await resolve_server(interaction, server)
+        if mc_config is not None:
+            await stop_minecraft_server(interaction, mc_config, config_manager)
 
     @server_stop.error
     async def server_stop_error(
@@ -177,20 +223,53 @@ def register_handlers_discord(bot: commands.Bot, config: ManagerConfig):
         description="Verifica si el servidor de Minecraft está online u offline.",
         guild=guild_obj,
     )
+    @app_commands.describe(server=server_description)
+    @app_commands.autocomplete(server=server_autocomplete)
     @log_command
-    async def server_status(interaction: discord.Interaction):
-        await check_server_status(interaction, config.minecraft_config)
+    async def server_status(interaction: discord.Interaction, server: str | None = None):
+        mc_config = await resolve_server(interaction, server)
+        if mc_config is not None:
+            await check_server_status(interaction, mc_config)
+
+    # Comando rendimiento del servidor
+    @bot.tree.command(
+        name="perf",
+        description="Muestra TPS, MSPT, CPU, memoria, jugadores, chunks y entidades del servidor.",
+        guild=guild_obj,
+    )
+    @app_commands.describe(window="Periodo que se muestra", server=server_description)
+    @app_commands.choices(
+        window=[
+            app_commands.Choice(name="Última hora", value="hora"),
+            app_commands.Choice(name="Último día", value="dia"),
+            app_commands.Choice(name="Último mes", value="mes"),
+        ]
+    )
+    @app_commands.autocomplete(server=server_autocomplete)
+    @log_command
+    async def perf(
+        interaction: discord.Interaction,
+        window: app_commands.Choice[str] | None = None,
+        server: str | None = None,
+    ):
+        mc_config = await resolve_server(interaction, server)
+        if mc_config is not None:
+            await show_performance(interaction, mc_config, window.value if window else "hora")
 
     # Comando backup
     @bot.tree.command(
         name="backup",
-        description="Realiza una copia de seguridad del mundo (zip). Funciona con el servidor ON u OFF.",
+        description="Realiza una copia de seguridad del mundo. Funciona con el servidor ON u OFF.",
         guild=guild_obj,
     )
+    @app_commands.describe(server=server_description)
+    @app_commands.autocomplete(server=server_autocomplete)
     @app_commands.check(is_admin)
     @log_command
-    async def backup_command(interaction: discord.Interaction):
-        await backup_server(interaction, config.minecraft_config)
+    async def backup_command(interaction: discord.Interaction, server: str | None = None):
+        mc_config = await resolve_server(interaction, server)
+        if mc_config is not None:
+            await backup_server(interaction, mc_config)
     
     @backup_command.error
     async def backup_command_error(interaction: discord.Interaction, error: AppCommandError):
@@ -199,6 +278,74 @@ def register_handlers_discord(bot: commands.Bot, config: ManagerConfig):
         else:
             await interaction.followup.send(f"Error: {error}", ephemeral=True)
 
+    # Comando listar backups
+    @bot.tree.command(
+        name="backup_list",
+        description="Muestra los backups más recientes.",
+        guild=guild_obj,
+    )
+    @app_commands.describe(server=server_description)
+    @app_commands.autocomplete(server=server_autocomplete)
+    @log_command
+    async def backup_list(interaction: discord.Interaction, server: str | None = None):
+        mc_config = await resolve_server(interaction, server)
+        if mc_config is not None:
+            await list_backups(interaction, mc_config)
+
+    # Comando podar backups
+    @bot.tree.command(
+        name="backup_prune",
+        description="Borra los backups antiguos según la política de retención.",
+        guild=guild_obj,
+    )
+    @app_commands.describe(server=server_description)
+    @app_commands.autocomplete(server=server_autocomplete)
+    @app_commands.check(is_admin)
+    @log_command
+    async def backup_prune(interaction: discord.Interaction, server: str | None = None):
+        mc_config = await resolve_server(interaction, server)
+        if mc_config is not None:
+            await prune_backups_command(interaction, mc_config)
+
+    @backup_prune.error
+    async def backup_prune_error(interaction: discord.Interaction, error: AppCommandError):
+        if isinstance(error, app_commands.MissingRole) or isinstance(error, CheckFailure):
+            return
+        await interaction.followup.send(f"Error: {error}", ephemeral=True)
+
+    # Comando restaurar backup
+    @bot.tree.command(
+        name="restore",
+        description="Restaura un backup: apaga el servidor, cambia el mundo y lo vuelve a iniciar.",
+        guild=guild_obj,
+    )
+    @app_commands.describe(backup="ID del backup (ver /backup_list)", server=server_description)
+    @app_commands.autocomplete(server=server_autocomplete)
+    @app_commands.check(is_admin)
+    @log_command
+    async def restore(interaction: discord.Interaction, backup: str, server: str | None = None):
+        mc_config = await resolve_server(interaction, server)
+        if mc_config is not None:
+            await restore_backup(interaction, mc_config, config_manager, backup)
+
+    @restore.autocomplete("backup")
+    async def restore_autocomplete(
+        interaction: discord.Interaction, current: str
+    ) -> list[app_commands.Choice[str]]:
+        # Los backups que se sugieren son los del servidor ya elegido en el comando.
+        try:
+            mc_config = config.get_server(getattr(interaction.namespace, "server", None))
+        except KeyError:
+            return []
+        backup_ids = await asyncio.to_thread(search_backup_ids, mc_config, current)
+        return [app_commands.Choice(name=backup_id, value=backup_id) for backup_id in backup_ids]
+
+    @restore.error
+    async def restore_error(interaction: discord.Interaction, error: AppCommandError):
+        if isinstance(error, app_commands.MissingRole) or isinstance(error, CheckFailure):
+            return
+        await interaction.followup.send(f"Error: {error}", ephemeral=True)
+
     # Evento que se ejecuta cuando el bot está listo
     @bot.event
     async def on_ready():
@@ -210,13 +357,57 @@ def register_handlers_discord(bot: commands.Bot, config: ManagerConfig):
         except Exception as e:
             print(f"Error al sincronizar comandos: {e}")
 
-        if config.minecraft_config.auto_shutdown_enabled:
-            print("Iniciando tarea de auto-apagado del servidor.")
-            auto_shutdown_loop.start(
+        for mc_config in config.servers.values():
+            start_server_services(mc_config)
+
+        if not monitor_servers_loop.is_running():
+            monitor_servers_loop.start(bot, config, config_manager)
+
+    def start_server_services(mc_config: MinecraftConfig):
+        """Arranca la vigilancia de un servidor. Es idempotente: on_ready se repite al reconectar."""
+        name = mc_config.name
+        if mc_config.process_backend == "supervisor":
+            # La consola del proceso supervisado ya alimenta el bus de eventos;
+            # seguir también el log duplicaría cada evento.
+            print(f"[{name}] Los eventos del servidor se leerán de su consola (modo supervisor).")
+        elif mc_config.log_watch_enabled:
+            print(f"[{name}] Siguiendo el log del servidor de Minecraft.")
+            start_log_watcher(mc_config)
+
+        if mc_config.activity_tracking and has_server_events(mc_config):
+            # Antes que el auto-apagado: su espera consulta el patrón de actividad.
+            print(f"[{name}] Guardando el historial de actividad de los jugadores.")
+            record_player_activity(mc_config)
+
+        if mc_config.telemetry_enabled:
+            print(
+                f"[{name}] Telemetría activada: una muestra cada "
+                f"{mc_config.telemetry_interval_seconds:g}s (ver /perf)."
+            )
+            start_telemetry(mc_config)
+
+        if mc_config.auto_shutdown_enabled:
+            print(f"[{name}] Iniciando el auto-apagado del servidor.")
+            start_auto_shutdown(
                 bot,
-                config.minecraft_config,
+                mc_config,
                 config_manager,
                 config.discord_config.guild_id,
             )
         else:
-            print("La tarea de auto-apagado está deshabilitada.")
+            print(f"[{name}] El auto-apagado está deshabilitado.")
+
+        if mc_config.wake_on_join_enabled:
+            print(f"[{name}] Despertar al entrar activado: si está apagado, quedará dormido.")
+            asyncio.create_task(
+                hibernate_if_stopped(bot, mc_config, config_manager, config.discord_config.guild_id)
+            )
+
+        if queue_backup_upload(mc_config):
+            print(f"[{name}] Subida de backups activada; se reanudan las subidas pendientes.")
+
+        schedule = get_schedule_state(mc_config).schedule
+        if schedule:
+            print(f"[{name}] Backups programados: {', '.join(e.expression for e in schedule)}.")
+            if has_server_events(mc_config):
+                watch_backup_activity(mc_config)
@@ -9,26 +9,30 @@ STARTING_TIMEOUT_SECONDS = 120  # 2 minutos
 class ServerStateManager:
     """Gestiona un estado simple y persistente para el servidor de Minecraft."""
 
+    def __init__(self, state_file: Path = STATE_FILE_PATH):
+        # Un archivo por servidor cuando el bot gestiona varios.
+        self.state_file = state_file
+
     def set_starting(self) -> None:
         """Marca el servidor como 'iniciando' guardando la marca de tiempo actual."""
         state = {"status": "starting", "timestamp": time.time()}
-        STATE_FILE_PATH.write_text(json.dumps(state), encoding="utf-8")
+        self.state_file.write_text(json.dumps(state), encoding="utf-8")
 
     def set_stopped(self) -> None:
         """Elimina el archivo de estado para marcar el servidor como detenido."""
-        if STATE_FILE_PATH.exists():
-            STATE_FILE_PATH.unlink()
+        if self.state_file.exists():
+            self.state_file.unlink()
 
     def is_starting(self) -> bool:
         """
         Comprueba si el servidor está en el período de gracia de 'iniciando'.
         Devuelve True si el archivo de estado existe y no ha expirado.
         """
-        if not STATE_FILE_PATH.exists():
+        if not self.state_file.exists():
             return False
 
         try:
-            state = json.loads(STATE_FILE_PATH.read_text(encoding="utf-8"))
+            state = json.loads(self.state_file.read_text(encoding="utf-8"))
         except (json.JSONDecodeError, FileNotFoundError):
             return False
 
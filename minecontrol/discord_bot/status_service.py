@@ -0,0 +1,126 @@
+import asyncio
+import inspect
+import time
+from typing import Awaitable, Callable
+
+from .enums import ServerStatus
+
+StatusCallback = Callable[[ServerStatus | None, ServerStatus], Awaitable[None] | None]
+
+
+class ServerStatusService:
+    """
+    Punto único para consultar el estado del servidor.
+
+    Guarda el último resultado durante `ttl` segundos y, si varias llamadas llegan
+    a la vez con la caché caducada, todas comparten la misma sonda en vuelo. Los
+    interesados pueden suscribirse a los cambios de estado en lugar de sondear.
+    """
+
+    def __init__(self, probe: Callable[[], Awaitable[ServerStatus]], ttl: float = 5.0):
+        self._probe = probe
+        self.ttl = ttl
+        self._status: ServerStatus | None = None
+        self._checked_at = 0.0
+        self._inflight: asyncio.Task | None = None
+        self._subscribers: list[StatusCallback] = []
+        # Tareas de los suscriptores asíncronos: se guarda una referencia para que no
+        # se recolecten antes de terminar.
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def last_status(self) -> ServerStatus | None:
+        """Último estado conocido, sin lanzar ninguna sonda."""
+        return self._status
+
+    async def get_status(self, max_age: float | None = None) -> ServerStatus:
+        """Devuelve el estado en caché si tiene menos de `max_age` segundos (por defecto `ttl`)."""
+        max_age = self.ttl if max_age is None else max_age
+        if self._status is not None and time.monotonic() - self._checked_at < max_age:
+            return self._status
+        return await self.refresh()
+
+    async def refresh(self) -> ServerStatus:
+        """Fuerza una sonda, o se une a la que ya esté en vuelo."""
+        if self._inflight is None:
+            self._inflight = asyncio.create_task(self._run_probe())
+        # shield: si un llamante se cancela, la sonda sigue para los demás.
+        return await asyncio.shield(self._inflight)
+
+    async def _run_probe(self) -> ServerStatus:
+        try:
+            status = await self._probe()
+        finally:
+            self._inflight = None
+        self.set_status(status)
+        return status
+
+    def invalidate(self):
+        """Marca la caché como caducada (p. ej. tras iniciar o detener el servidor)."""
+        self._checked_at = 0.0
+
+    def set_status(self, status: ServerStatus):
+        """Registra un estado observado y avisa a los suscriptores si ha cambiado."""
+        previous = self._status
+        self._status = status
+        self._checked_at = time.monotonic()
+        if previous == status:
+            return
+
+        for callback in list(self._subscribers):
+            try:
+                result = callback(previous, status)
+                if inspect.isawaitable(result):
+                    task = asyncio.ensure_future(result)
+                    self._tasks.add(task)
+                    task.add_done_callback(self._subscriber_done)
+            except Exception as e:
+                print(f"Error en un suscriptor de cambios de estado: {e}")
+
+    def _subscriber_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Error en un suscriptor de cambios de estado: {task.exception()}")
+
+    def subscribe(self, callback: StatusCallback) -> Callable[[], None]:
+        """Registra `callback(anterior, nuevo)` para cada cambio de estado. Devuelve la función para darse de baja."""
+        self._subscribers.append(callback)
+
+        def unsubscribe():
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    async def wait_for(
+        self, expected: ServerStatus, timeout: float, poll_interval: float
+    ) -> bool:
+        """
+        Espera hasta que el estado sea `expected` o se agote `timeout`.
+
+        Reacciona en cuanto cualquier otra consulta observa el cambio y, mientras
+        tanto, sondea como mucho cada `poll_interval` segundos.
+        """
+        loop = asyncio.get_running_loop()
+        reached = asyncio.Event()
+
+        def on_change(previous: ServerStatus | None, status: ServerStatus):
+            if status == expected:
+                reached.set()
+
+        unsubscribe = self.subscribe(on_change)
+        deadline = loop.time() + timeout
+        try:
+            while True:
+                if await self.get_status(max_age=poll_interval) == expected:
+                    return True
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return False
+                try:
+                    await asyncio.wait_for(reached.wait(), min(poll_interval, remaining))
+                    return True
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            unsubscribe()
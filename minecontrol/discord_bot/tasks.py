@@ -1,16 +1,51 @@
 import asyncio
 import re
-import subprocess
 import time
-from typing import cast
+from datetime import datetime
+from pathlib import Path
 
 import discord
 from discord.ext import commands, tasks
 
-from minecontrol.config import MinecraftConfig
-from minecontrol.discord_bot.commands import get_minecraft_server_status
+from minecontrol.activity import (
+    PLAYER_JOINED,
+    PLAYER_LEFT,
+    SERVER_STARTED,
+    SERVER_STOPPED,
+    SLOT_SECONDS,
+    WEEK_SECONDS,
+    ActivityStore,
+    WeeklyPattern,
+)
+from minecontrol.config import ManagerConfig, MinecraftConfig
+from minecontrol.cron import CronError, CronExpression, parse_schedule
+from minecontrol.discord_bot.commands import (
+    ensure_wake_listener,
+    hibernate_server,
+    launch_minecraft_server,
+    get_event_bus,
+    get_leval_name,
+    get_minecraft_server_status,
+    get_server_rcon,
+    get_status_service,
+    get_telemetry_store,
+    has_server_events,
+    get_process_backend,
+    regions_changed_since,
+    run_backup,
+)
 from minecontrol.discord_bot.guild_config import GuildConfigManager
-from minecontrol.rcon_client import RCONConnectionError, SimpleRCONClient
+from minecontrol.log_watcher import LogEvent, LogEventType
+from minecontrol.process_control import ProcessControlError
+from minecontrol.rcon_client import RCONAuthError, RCONConnectionError
+from minecontrol.server_metrics import (
+    ChunkCountProbe,
+    EntityCountProbe,
+    MsptProbe,
+    tps_from_mspt,
+)
+from minecontrol.slp_client import SLPError, query_server_list_ping
+from minecontrol.telemetry import ProcessStats
 
 from .enums import AutoShutdownStatus, ServerStatus
 from .utils import send_announcement
@@ -29,119 +64,681 @@ class AutoShutdownState:
         self.shutdown_countdown_start_time = None
 
 
-shutdown_state = AutoShutdownState()
+class BackupScheduleState:
+    def __init__(self, schedule: list[CronExpression] | None = None):
+        self.schedule = schedule or []
+        # Último instante revisado: las ejecuciones entre este y el siguiente tick cuentan.
+        self.last_checked: datetime | None = None
+        # Desde cuándo hay un backup programado pendiente (aplazado por jugadores).
+        self.due_since: float | None = None
+        # Última vez que se vio a algún jugador conectado y desde cuándo se observa.
+        self.last_player_seen: float | None = None
+        self.observing_since = time.time()
+
+    def note_players(self, player_count: int):
+        if player_count > 0:
+            self.last_player_seen = time.time()
+
+    def idle_since(self, timestamp: float) -> bool:
+        """Indica si consta que no ha habido jugadores desde `timestamp`."""
+        if self.observing_since > timestamp:
+            # El bot no estaba observando entonces: no se sabe.
+            return False
+        return self.last_player_seen is None or self.last_player_seen < timestamp
+
+
+class ActivityState:
+    def __init__(self, store: ActivityStore):
+        self.store = store
+        # Patrón semanal aprendido del historial y cuándo se calculó.
+        self.pattern: WeeklyPattern | None = None
+        self.learned_at: float | None = None
+        # Inicio de la última demanda para la que ya se arrancó el servidor.
+        self.last_prewarm: float | None = None
+
+
+# Estado por servidor, indexado por su carpeta (`server_path`).
+_schedule_states: dict[str, BackupScheduleState] = {}
+_shutdown_engines: dict[str, "AutoShutdownEngine"] = {}
+_background_tasks: set[asyncio.Task] = set()
+_activity_watched: set[str] = set()
+_activity_states: dict[str, ActivityState] = {}
+_activity_recorded: set[str] = set()
+_telemetry_tasks: dict[str, asyncio.Task] = {}
+# El patrón semanal se vuelve a aprender del historial cada hora.
+PATTERN_REFRESH_SECONDS = 3600
+# Eventos del log que se guardan en el historial de actividad.
+ACTIVITY_EVENT_KINDS = {
+    LogEventType.PLAYER_JOINED: PLAYER_JOINED,
+    LogEventType.PLAYER_LEFT: PLAYER_LEFT,
+    LogEventType.SERVER_READY: SERVER_STARTED,
+    LogEventType.SERVER_STOPPED: SERVER_STOPPED,
+}
+# Avisos en el juego durante la cuenta atrás final, en segundos antes del apagado.
+COUNTDOWN_WARNINGS = (600, 300, 120, 60, 30, 10, 5, 4, 3, 2, 1)
+
+
+def parse_player_names(response: str) -> list[str]:
+    """Extrae los nombres de la respuesta de 'list' ("...players online: a, b")."""
+    _, separator, names = response.partition(":")
+    if not separator:
+        return []
+    return [name.strip() for name in names.split(",") if name.strip()]
 
 
 async def get_player_count(config: MinecraftConfig) -> int:
-    """Obtiene el número de jugadores conectados vía RCON."""
+    """
+    Obtiene el número de jugadores conectados.
+
+    Si se está siguiendo el log y la lista de jugadores es fiable, se responde sin
+    tráfico de red; si no, se consulta vía RCON o Server List Ping.
+    """
+    player_count = await _query_player_count(config)
+    get_schedule_state(config).note_players(player_count)
+    return player_count
+
+
+def get_schedule_state(config: MinecraftConfig) -> BackupScheduleState:
+    """Devuelve el estado de los backups programados del servidor."""
+    state = _schedule_states.get(config.server_path)
+    if state is None:
+        try:
+            schedule = parse_schedule(config.backup_schedule)
+        except CronError as e:
+            print(
+                f"Backups programados de '{config.name}' deshabilitados: "
+                f"la expresión no es válida ({e})."
+            )
+            schedule = []
+        state = _schedule_states[config.server_path] = BackupScheduleState(schedule)
+    return state
+
+
+async def _query_player_count(config: MinecraftConfig) -> int:
+    bus = get_event_bus(config)
+    if has_server_events(config) and bus.players_known:
+        return bus.player_count
+
+    if config.status_probe == "slp":
+        try:
+            status = await query_server_list_ping(config.rcon_host, config.game_port)
+            return status.online_players
+        except (SLPError, asyncio.TimeoutError):
+            return -1
+
     try:
-        async with SimpleRCONClient(
-            config.rcon_host, config.rcon_port, config.rcon_password
-        ) as client:
-            response = await client.execute("list")
-
-            print(f"DEBUG: Respuesta RCON del comando 'list': '{response}'")
-            match = re.search(r"(\d+)/\d+|There are (\d+) of", response)
-
-            if match:
-                # El grupo 1 de la expresión regular es el primer número (los jugadores actuales).
-                player_count_str = match.group(1) or match.group(2)
-                return int(player_count_str)
-            else:
-                # Si no se encuentra el patrón, asumimos que hubo un error y devolvemos -1
-                print(
-                    f"WARN: No se pudo extraer el contador de jugadores de la respuesta RCON: '{response}'"
-                )
-                return -1
+        response = await get_server_rcon(config).execute("list")
+
+        print(f"DEBUG: Respuesta RCON del comando 'list': '{response}'")
+        match = re.search(r"(\d+)/\d+|There are (\d+) of", response)
+
+        if match:
+            # El grupo 1 de la expresión regular es el primer número (los jugadores actuales).
+            player_count_str = match.group(1) or match.group(2)
+            player_count = int(player_count_str)
+            names = parse_player_names(response)
+            if has_server_events(config) and len(names) == player_count:
+                # A partir de aquí los eventos del log mantienen la lista al día.
+                bus.seed_players(names)
+            return player_count
+        else:
+            # Si no se encuentra el patrón, asumimos que hubo un error y devolvemos -1
+            print(
+                f"WARN: No se pudo extraer el contador de jugadores de la respuesta RCON: '{response}'"
+            )
+            return -1
     except (RCONConnectionError, asyncio.TimeoutError):
         return -1
     except Exception:
         return -1
 
 
-@tasks.loop(minutes=1.0)
-async def auto_shutdown_loop(
+def _format_countdown(seconds: int) -> str:
+    if seconds >= 60 and seconds % 60 == 0:
+        minutes = seconds // 60
+        return f"{minutes} minuto{'s' if minutes != 1 else ''}"
+    return f"{seconds} segundo{'s' if seconds != 1 else ''}"
+
+
+class AutoShutdownEngine:
+    """
+    Máquina de auto-apagado movida por eventos.
+
+    Las entradas y salidas de jugadores (del log o de la consola del servidor)
+    cambian el estado al instante, y los plazos se cumplen con temporizadores de un
+    solo disparo (`loop.call_at`): uno para el fin de la espera con el servidor
+    vacío y, en la cuenta atrás, uno por aviso y otro para el apagado. Mientras hay
+    jugadores no se consulta nada por RCON.
+
+    Sin eventos del servidor, `monitor_servers_loop` sondea cada minuto y llama a
+    `observe`; los plazos siguen siendo los de los temporizadores.
+    """
+
+    def __init__(
+        self,
+        bot: commands.Bot,
+        mc_config: MinecraftConfig,
+        guild_manager: GuildConfigManager,
+        guild_id: int,
+    ):
+        self.bot = bot
+        self.mc_config = mc_config
+        self.guild_manager = guild_manager
+        self.guild_id = guild_id
+        self.state = AutoShutdownState()
+        self._timers: list[asyncio.TimerHandle] = []
+        self._tasks: set[asyncio.Task] = set()
+
+    def start(self):
+        """Se suscribe a los eventos del servidor y comprueba cómo está ahora."""
+        if has_server_events(self.mc_config):
+            get_event_bus(self.mc_config).subscribe(self._on_event)
+            self._spawn(self._check_players())
+
+    def observe(self, player_count: int):
+        """Aplica el número de jugadores conectados a la máquina de estados."""
+        if player_count > 0:
+            if self.state.status != AutoShutdownStatus.MONITORING:
+                print(
+                    f"Auto-Shutdown [{self.mc_config.name}]: Jugador detectado. Se cancela el apagado y se vuelve a monitorear."
+                )
+                if self.state.status == AutoShutdownStatus.SHUTDOWN_COUNTDOWN:
+                    self._spawn(self._say("Apagado automático cancelado."))
+            self._cancel()
+            return
+
+        if self.state.status == AutoShutdownStatus.MONITORING:
+            print(f"Auto-Shutdown [{self.mc_config.name}]: Servidor vacío. Transición a TIMING_EMPTY.")
+            self.state.status = AutoShutdownStatus.TIMING_EMPTY
+            self.state.empty_start_time = time.time()
+            self._arm(self.mc_config.auto_shutdown_idle_minutes * 60, self._begin_countdown)
+
+    def server_offline(self):
+        """El servidor se ha apagado (por lo que sea): no hay nada que cronometrar."""
+        if self.state.status != AutoShutdownStatus.MONITORING:
+            print(f"Auto-Shutdown [{self.mc_config.name}]: El servidor se ha detenido. Se cancela el apagado.")
+        self._cancel()
+
+    def _on_event(self, event: LogEvent):
+        if event.type in (LogEventType.PLAYER_JOINED, LogEventType.PLAYER_LEFT):
+            bus = get_event_bus(self.mc_config)
+            if bus.players_known:
+                self.observe(bus.player_count)
+            else:
+                # El bot arrancó con la partida empezada: hace falta una consulta.
+                self._spawn(self._check_players())
+        elif event.type == LogEventType.SERVER_READY:
+            self.observe(0)
+        elif event.type in (LogEventType.SERVER_STOPPING, LogEventType.SERVER_STOPPED):
+            self.server_offline()
+
+    async def _check_players(self):
+        if await get_minecraft_server_status(self.mc_config) != ServerStatus.ONLINE:
+            return
+        # Con eventos, esta consulta también siembra la lista de jugadores del bus.
+        player_count = await get_player_count(self.mc_config)
+        if player_count >= 0:
+            self.observe(player_count)
+
+    def _arm(self, delay: float, callback, *args):
+        loop = asyncio.get_running_loop()
+        self._timers.append(loop.call_at(loop.time() + delay, callback, *args))
+
+    def _cancel(self):
+        for timer in self._timers:
+            timer.cancel()
+        self._timers.clear()
+        self.state.reset()
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _begin_countdown(self):
+        hold_minutes = self.mc_config.auto_shutdown_hold_minutes
+        if hold_minutes > 0 and players_expected_within(self.mc_config, hold_minutes):
+            # Apagar para volver a arrancar enseguida no ahorra nada: se espera otra franja.
+            print(
+                f"Auto-Shutdown [{self.mc_config.name}]: Suelen volver jugadores en menos de "
+                f"{hold_minutes} minutos. Se aplaza el apagado."
+            )
+            self._arm(SLOT_SECONDS, self._begin_countdown)
+            return
+
+        countdown = self.mc_config.auto_shutdown_countdown_seconds
+        print(f"Auto-Shutdown [{self.mc_config.name}]: Tiempo de inactividad superado. Transición a SHUTDOWN_COUNTDOWN.")
+        self.state.status = AutoShutdownStatus.SHUTDOWN_COUNTDOWN
+        self.state.shutdown_countdown_start_time = time.time()
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + countdown
+        self._timers = [loop.call_at(deadline, self._fire_shutdown)]
+        self._warn(countdown)
+        for seconds in COUNTDOWN_WARNINGS:
+            if seconds < countdown:
+                self._timers.append(loop.call_at(deadline - seconds, self._warn, seconds))
+
+    def _warn(self, seconds: int):
+        self._spawn(
+            self._say(f"El servidor se apagará por inactividad en {_format_countdown(seconds)}.")
+        )
+
+    async def _say(self, message: str):
+        try:
+            await get_server_rcon(self.mc_config).execute(f"say {message}")
+        except Exception as e:
+            print(f"Auto-Shutdown [{self.mc_config.name}]: No se pudo enviar el aviso al juego: {e}")
+
+    def _fire_shutdown(self):
+        self._spawn(self._shutdown())
+
+    async def _shutdown(self):
+        self._timers.clear()
+        print(f"Auto-Shutdown [{self.mc_config.name}]: Cuenta atrás finalizada. Ejecutando apagado.")
+        try:
+            await get_process_backend(self.mc_config).stop()
+            get_status_service(self.mc_config).invalidate()
+            self._spawn(
+                hibernate_server(self.bot, self.mc_config, self.guild_id, self.guild_manager)
+            )
+
+            await asyncio.sleep(5)
+            await send_announcement(
+                bot=self.bot,
+                guild_manager=self.guild_manager,
+                guild_id=self.guild_id,
+                title="Servidor Apagado por Inactividad",
+                description=f"El servidor se ha apagado automáticamente después de estar vacío por más de {self.mc_config.auto_shutdown_idle_minutes} minutos.",
+                color=discord.Color.orange(),
+                footer_text=(
+                    "Se iniciará en cuanto alguien intente entrar."
+                    if self.mc_config.wake_on_join_enabled
+                    else "Se iniciará de nuevo cuando alguien use /server_start."
+                ),
+                server_name=self.mc_config.name,
+            )
+
+        except ProcessControlError as e:
+            print(f"Error al enviar el comando de apagado al servidor: {e}")
+        finally:
+            self.state.reset()
+
+
+async def hibernate_if_stopped(
     bot: commands.Bot,
     mc_config: MinecraftConfig,
     guild_manager: GuildConfigManager,
     guild_id: int,
 ):
-    is_online = await get_minecraft_server_status(mc_config) == ServerStatus.ONLINE
+    """Al arrancar el bot, deja dormido el servidor si está apagado."""
+    if not mc_config.wake_on_join_enabled:
+        return
+    if await get_process_backend(mc_config).is_running():
+        return
+    await hibernate_server(bot, mc_config, guild_id, guild_manager)
+
+
+def start_auto_shutdown(
+    bot: commands.Bot,
+    mc_config: MinecraftConfig,
+    guild_manager: GuildConfigManager,
+    guild_id: int,
+) -> AutoShutdownEngine:
+    """Crea y arranca el motor de auto-apagado del servidor (una sola vez)."""
+    engine = _shutdown_engines.get(mc_config.server_path)
+    if engine is not None:
+        # on_ready se repite tras cada reconexión a Discord.
+        return engine
+    engine = AutoShutdownEngine(bot, mc_config, guild_manager, guild_id)
+    _shutdown_engines[mc_config.server_path] = engine
+    engine.start()
+    return engine
+
+
+async def poll_auto_shutdown(engine: AutoShutdownEngine):
+    """Sondeo de respaldo cuando no hay eventos del servidor (sin log ni supervisor)."""
+    is_online = await get_minecraft_server_status(engine.mc_config) == ServerStatus.ONLINE
     if not is_online:
-        shutdown_state.reset()
+        engine.server_offline()
         return
 
-    player_count = await get_player_count(mc_config)
+    player_count = await get_player_count(engine.mc_config)
     if player_count == -1:
-        print("Auto-Shutdown: No se pudo conectar a RCON. Se omite el ciclo.")
+        print(f"Auto-Shutdown [{engine.mc_config.name}]: No se pudo conectar a RCON. Se omite el ciclo.")
         return
 
-    print(f"Auto-Shutdown: Jugadores conectados: {player_count}")
+    print(f"Auto-Shutdown [{engine.mc_config.name}]: Jugadores conectados: {player_count}")
+    engine.observe(player_count)
 
-    # CASO 1: Hay jugadores. Volvemos al estado de monitoreo.
-    if player_count > 0:
-        if shutdown_state.status != AutoShutdownStatus.MONITORING:
-            # avisamos que se cancela el apagado
-            print(
-                "Auto-Shutdown: Jugador detectado. Se cancela el apagado y se vuelve a monitorear."
+
+class TelemetrySampler:
+    """
+    Toma las muestras de telemetría de un servidor y las guarda en su historial.
+
+    El MSPT, la CPU, la memoria y los jugadores se miden cada
+    `telemetry_interval_seconds`; los chunks y entidades (y los jugadores, si no los
+    da el log) solo cada `telemetry_count_seconds`, porque contarlos cuesta tiempo de
+    tick o ensucia la consola con un 'list' por muestra.
+    """
+
+    def __init__(self, mc_config: MinecraftConfig):
+        self.mc_config = mc_config
+        self.store = get_telemetry_store(mc_config)
+        rcon = get_server_rcon(mc_config)
+        self.mspt_probe = MsptProbe(rcon)
+        self.entity_probe = EntityCountProbe(rcon)
+        self.chunk_probe = ChunkCountProbe(rcon)
+        self.process_stats = ProcessStats()
+        self._next_count = 0.0
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        next_sample = loop.time()
+        while True:
+            try:
+                self.store.record(await self.sample())
+            except Exception as e:
+                print(f"Telemetría [{self.mc_config.name}]: error inesperado: {e}")
+            # Cadencia fija aunque una muestra tarde: la siguiente no se desplaza.
+            next_sample = max(next_sample + self.store.interval, loop.time())
+            await asyncio.sleep(next_sample - loop.time())
+
+    async def sample(self) -> dict[str, float | None]:
+        values: dict[str, float | None] = {}
+        root_pid = await get_process_backend(self.mc_config).root_pid()
+        if root_pid is not None:
+            values["cpu"], values["rss"] = await asyncio.to_thread(
+                self.process_stats.sample, root_pid
             )
-        shutdown_state.reset()
+        if await get_minecraft_server_status(self.mc_config) != ServerStatus.ONLINE:
+            return values
+
+        count_now = time.monotonic() >= self._next_count
+        if count_now:
+            self._next_count = time.monotonic() + self.mc_config.telemetry_count_seconds
+        try:
+            mspt = await self.mspt_probe.measure()
+            if mspt is not None:
+                values["mspt"] = mspt
+                values["tps"] = tps_from_mspt(mspt)
+            if count_now:
+                values["entities"] = await self.entity_probe.measure()
+                values["chunks"] = await self.chunk_probe.measure()
+        except (RCONConnectionError, RCONAuthError, asyncio.TimeoutError):
+            return values
+
+        bus = get_event_bus(self.mc_config)
+        if has_server_events(self.mc_config) and bus.players_known:
+            values["players"] = bus.player_count
+        elif count_now:
+            player_count = await get_player_count(self.mc_config)
+            values["players"] = player_count if player_count >= 0 else None
+        return values
+
+
+def start_telemetry(mc_config: MinecraftConfig):
+    """Arranca el muestreo de telemetría del servidor (una sola vez)."""
+    task = _telemetry_tasks.get(mc_config.server_path)
+    if task is not None and not task.done():
         return
+    _telemetry_tasks[mc_config.server_path] = asyncio.create_task(
+        TelemetrySampler(mc_config).run()
+    )
 
-    # CASO 2: No hay jugadores. Actuamos según el estado actual.
 
-    # Si estábamos monitoreando, ahora empezamos a cronometrar.
-    if shutdown_state.status == AutoShutdownStatus.MONITORING:
-        print(f"Auto-Shutdown: Servidor vacío. Transición a TIMING_EMPTY.")
-        shutdown_state.status = AutoShutdownStatus.TIMING_EMPTY
-        shutdown_state.empty_start_time = time.time()
+def watch_backup_activity(mc_config: MinecraftConfig):
+    """Registra cada entrada de un jugador para saber si el mundo pudo cambiar."""
+    if mc_config.server_path in _activity_watched:
         return
+    _activity_watched.add(mc_config.server_path)
 
-    # Si ya estábamos cronometrando, vemos si se acabó el tiempo.
-    elif shutdown_state.status == AutoShutdownStatus.TIMING_EMPTY:
-        idle_duration = time.time() - cast(float, shutdown_state.empty_start_time)
-        if idle_duration >= mc_config.auto_shutdown_idle_minutes * 60:
-            print(
-                f"Auto-Shutdown: Tiempo de inactividad superado. Transición a SHUTDOWN_COUNTDOWN."
-            )
-            shutdown_state.status = AutoShutdownStatus.SHUTDOWN_COUNTDOWN
-            shutdown_state.shutdown_countdown_start_time = time.time()
+    def on_event(event: LogEvent):
+        if event.type == LogEventType.PLAYER_JOINED:
+            get_schedule_state(mc_config).note_players(1)
+
+    get_event_bus(mc_config).subscribe(on_event)
+
+
+def get_activity_db_path(config: MinecraftConfig) -> Path:
+    """Historial de actividad: `activity_db_path` si es absoluta, o relativa a la del servidor."""
+    if Path(config.activity_db_path).is_absolute():
+        return Path(config.activity_db_path)
+    return Path(config.server_path) / config.activity_db_path
 
+
+def get_activity_state(config: MinecraftConfig) -> ActivityState:
+    """Devuelve el historial de actividad del servidor (lo abre la primera vez)."""
+    state = _activity_states.get(config.server_path)
+    if state is None:
+        state = ActivityState(ActivityStore(get_activity_db_path(config)))
+        _activity_states[config.server_path] = state
+    return state
+
+
+def record_player_activity(mc_config: MinecraftConfig):
+    """Guarda en el historial las entradas, salidas, arranques y paradas del servidor."""
+    if mc_config.server_path in _activity_recorded:
         return
+    _activity_recorded.add(mc_config.server_path)
+    store = get_activity_state(mc_config).store
+
+    async def on_event(event: LogEvent):
+        kind = ACTIVITY_EVENT_KINDS.get(event.type)
+        if kind is None:
+            return
+        try:
+            await asyncio.to_thread(store.record, kind, event.player, event.timestamp)
+        except Exception as e:
+            print(f"Actividad [{mc_config.name}]: no se pudo guardar el evento: {e}")
+
+    get_event_bus(mc_config).subscribe(on_event)
+
+
+async def refresh_activity_pattern(mc_config: MinecraftConfig) -> WeeklyPattern:
+    """Vuelve a aprender el patrón semanal si el guardado tiene más de una hora."""
+    state = get_activity_state(mc_config)
+    now = time.time()
+    if (
+        state.pattern is None
+        or state.learned_at is None
+        or now - state.learned_at >= PATTERN_REFRESH_SECONDS
+    ):
+        weeks = mc_config.activity_history_weeks
+        await asyncio.to_thread(state.store.prune, now - (weeks + 1) * WEEK_SECONDS)
+        state.pattern = await asyncio.to_thread(WeeklyPattern.from_store, state.store, weeks, now)
+        state.learned_at = now
+    return state.pattern
+
+
+def players_expected_within(mc_config: MinecraftConfig, minutes: float) -> bool:
+    """Indica si, según el patrón aprendido, suele haber jugadores en los próximos `minutes`."""
+    state = _activity_states.get(mc_config.server_path)
+    if state is None or state.pattern is None:
+        return False
+    return (
+        state.pattern.next_demand(time.time(), minutes, mc_config.prewarm_threshold)
+        is not None
+    )
+
+
+async def tick_activity(
+    bot: commands.Bot,
+    mc_config: MinecraftConfig,
+    guild_manager: GuildConfigManager,
+    guild_id: int,
+):
+    """
+    Mantiene al día el patrón semanal y, si se acerca la hora a la que suelen entrar
+    jugadores, inicia el servidor apagado `prewarm_minutes` antes.
+    """
+    if not mc_config.activity_tracking:
+        return
+    if mc_config.prewarm_minutes <= 0 and mc_config.auto_shutdown_hold_minutes <= 0:
+        return
+    pattern = await refresh_activity_pattern(mc_config)
+    if mc_config.prewarm_minutes <= 0:
+        return
+
+    state = get_activity_state(mc_config)
+    onset = pattern.demand_onset(
+        time.time(), mc_config.prewarm_minutes, mc_config.prewarm_threshold
+    )
+    if onset is None or onset == state.last_prewarm:
+        return
+    # Una sola vez por demanda: si alguien lo apaga a mano, no se vuelve a arrancar.
+    state.last_prewarm = onset
+    if await get_process_backend(mc_config).is_running():
+        return
+
+    expected_at = datetime.fromtimestamp(onset).strftime("%H:%M")
+    print(
+        f"Pre-arranque [{mc_config.name}]: suele haber jugadores a las {expected_at}. "
+        "Iniciando el servidor."
+    )
+    try:
+        await launch_minecraft_server(bot, mc_config, guild_id, guild_manager)
+    except Exception as e:
+        print(f"Pre-arranque [{mc_config.name}]: no se pudo iniciar el servidor: {e}")
+        return
+    await send_announcement(
+        bot=bot,
+        guild_manager=guild_manager,
+        guild_id=guild_id,
+        title="Servidor Preparándose",
+        description=(
+            f"A esta hora suele haber jugadores (a partir de las {expected_at}). "
+            "El servidor se está iniciando para que esté listo."
+        ),
+        color=discord.Color.blue(),
+        footer_text="Se anunciará cuando esté listo para jugar.",
+        server_name=mc_config.name,
+    )
+
+
+async def scheduled_backup_needed(mc_config: MinecraftConfig, last_backup: float | None) -> bool:
+    """
+    Decide si merece la pena un backup programado.
 
-    # Si ya estábamos en la cuenta atrás, vemos si llegó a cero.
-    elif shutdown_state.status == AutoShutdownStatus.SHUTDOWN_COUNTDOWN:
-        countdown_duration = time.time() - cast(
-            float, shutdown_state.shutdown_countdown_start_time
+    Se omite si no ha entrado ningún jugador desde el último backup o si ningún
+    archivo de región ha cambiado desde entonces: el backup sería idéntico.
+    """
+    if last_backup is None or not mc_config.backup_schedule_skip_unchanged:
+        return True
+    if get_schedule_state(mc_config).idle_since(last_backup):
+        return False
+    world_path = Path(mc_config.server_path) / get_leval_name(Path(mc_config.server_path))
+    return await asyncio.to_thread(regions_changed_since, world_path, last_backup)
+
+
+async def run_scheduled_backup(
+    bot: commands.Bot,
+    mc_config: MinecraftConfig,
+    guild_manager: GuildConfigManager,
+    guild_id: int,
+):
+    async def notify(message: str):
+        print(f"Backup programado: {message}")
+
+    async def needs_backup(last_backup: float | None) -> bool:
+        return await scheduled_backup_needed(mc_config, last_backup)
+
+    try:
+        summary = await run_backup(mc_config, notify, needs_backup)
+    except Exception as e:
+        print(f"Backup programado: error inesperado: {e}")
+        await send_announcement(
+            bot=bot,
+            guild_manager=guild_manager,
+            guild_id=guild_id,
+            title="Error en el Backup Programado",
+            description=f"```\n{e}\n```",
+            color=discord.Color.red(),
+            footer_text="Se volverá a intentar en la siguiente ejecución programada.",
+            server_name=mc_config.name,
         )
-        if countdown_duration >= mc_config.auto_shutdown_countdown_seconds:
-            print("Auto-Shutdown: Cuenta atrás finalizada. Ejecutando apagado.")
-            try:
-                subprocess.run(
-                    [
-                        "tmux",
-                        "send-keys",
-                        "-t",
-                        mc_config.terminal_session_name,
-                        "stop",
-                        "C-m",
-                    ],
-                    check=True,
-                )
+        return
+
+    if summary is None:
+        print("Backup programado: el mundo no ha cambiado desde el último backup. Se omite.")
+    else:
+        print(f"Backup programado completado: {summary}")
 
-                await asyncio.sleep(5)
-                await send_announcement(
-                    bot=bot,
-                    guild_manager=guild_manager,
-                    guild_id=guild_id,
-                    title="Servidor Apagado por Inactividad",
-                    description=f"El servidor se ha apagado automáticamente después de estar vacío por más de {mc_config.auto_shutdown_idle_minutes} minutos.",
-                    color=discord.Color.orange(),
-                    footer_text="Se iniciará de nuevo cuando alguien use /server_start.",
-                )
 
-            except subprocess.CalledProcessError as e:
-                print(f"Error al ejecutar el comando de apagado por tmux: {e}")
-            finally:
-                shutdown_state.reset()
+async def tick_backup_schedule(
+    bot: commands.Bot,
+    mc_config: MinecraftConfig,
+    guild_manager: GuildConfigManager,
+    guild_id: int,
+):
+    """Revisa una vez (cada minuto) si toca un backup programado del servidor."""
+    schedule_state = get_schedule_state(mc_config)
+    if not schedule_state.schedule:
         return
+    now = datetime.now()
+    last_checked = schedule_state.last_checked or now
+    schedule_state.last_checked = now
+    if schedule_state.due_since is None:
+        for expression in schedule_state.schedule:
+            next_run = expression.next_after(last_checked)
+            if next_run is not None and next_run <= now:
+                print(f"Backup programado de '{mc_config.name}': toca el de '{expression.expression}'.")
+                schedule_state.due_since = time.time()
+                break
+
+    # Se consulta cada minuto aunque no toque backup, para saber si hubo jugadores.
+    is_online = await get_minecraft_server_status(mc_config) == ServerStatus.ONLINE
+    player_count = await get_player_count(mc_config) if is_online else 0
+    if schedule_state.due_since is None:
+        return
+
+    # Aplazar a un momento con menos jugadores, hasta el máximo configurado.
+    waited_minutes = (time.time() - schedule_state.due_since) / 60
+    if (
+        player_count > mc_config.backup_schedule_max_players
+        and waited_minutes < mc_config.backup_schedule_max_delay_minutes
+    ):
+        print(
+            f"Backup programado de '{mc_config.name}': {player_count} jugadores conectados, se aplaza "
+            f"({waited_minutes:.0f}/{mc_config.backup_schedule_max_delay_minutes} min)."
+        )
+        return
+
+    schedule_state.due_since = None
+    # El backup puede durar minutos: no debe retrasar la vigilancia de los demás servidores.
+    task = asyncio.create_task(run_scheduled_backup(bot, mc_config, guild_manager, guild_id))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
+@tasks.loop(minutes=1.0)
+async def monitor_servers_loop(
+    bot: commands.Bot,
+    config: ManagerConfig,
+    guild_manager: GuildConfigManager,
+):
+    """
+    Vigila todos los servidores desde un único bucle: el sondeo de auto-apagado de
+    los que no tienen eventos, el pre-arranque según el historial de actividad, los
+    backups programados y el puerto de los dormidos que aún no se pudo ocupar.
+
+    Los servidores se revisan a la vez, pero como mucho `monitor_concurrency` en
+    paralelo para no lanzar todas las sondas RCON en el mismo instante. Un error en
+    un servidor no afecta a los demás.
+    """
+    semaphore = asyncio.Semaphore(config.monitor_concurrency)
+    guild_id = config.discord_config.guild_id
+
+    async def monitor(mc_config: MinecraftConfig):
+        async with semaphore:
+            try:
+                engine = _shutdown_engines.get(mc_config.server_path)
+                if engine is not None and not has_server_events(mc_config):
+                    await poll_auto_shutdown(engine)
+                await ensure_wake_listener(bot, mc_config, guild_id, guild_manager)
+                await tick_activity(bot, mc_config, guild_manager, guild_id)
+                await tick_backup_schedule(bot, mc_config, guild_manager, guild_id)
+            except Exception as e:
+                print(f"Vigilancia: error inesperado con el servidor '{mc_config.name}': {e}")
+
+    await asyncio.gather(*(monitor(mc_config) for mc_config in config.servers.values()))
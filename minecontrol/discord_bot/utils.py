@@ -12,9 +12,12 @@ async def send_announcement(
     description: str,
     color: discord.Color,
     footer_text: str | None = None,
+    server_name: str | None = None,
 ):
     """
     Función centralizada para enviar anuncios a un canal preconfigurado.
+
+    `server_name` identifica el servidor de Minecraft cuando el bot gestiona varios.
     """
     channel_id = guild_manager.get_announcement_channel(guild_id)
     if not channel_id:
@@ -38,6 +41,8 @@ async def send_announcement(
         )
         if footer_text:
             embed.set_footer(text=footer_text)
+        if server_name:
+            embed.set_author(name=server_name)
 
         await channel.send(embed=embed)
         print(f"Anuncio enviado a '{channel.name}': '{title}'")
@@ -0,0 +1,393 @@
+import asyncio
+import ctypes
+import ctypes.util
+import inspect
+import os
+import re
+import sys
+import time
+from enum import Enum
+from pathlib import Path
+from typing import Awaitable, Callable, Iterable
+
+
+class LogEventType(Enum):
+    # "Done (12.345s)! For help, type "help"": el servidor acepta jugadores.
+    SERVER_READY = "Server Ready"
+    # "Stopping server": el servidor ha empezado a apagarse.
+    SERVER_STOPPING = "Server Stopping"
+    # "All dimensions are saved": última línea antes de que termine el proceso.
+    SERVER_STOPPED = "Server Stopped"
+    PLAYER_JOINED = "Player Joined"
+    PLAYER_LEFT = "Player Left"
+    # "Saved the game": confirmación de un save-all.
+    WORLD_SAVED = "World Saved"
+    # "Can't keep up! Is the server overloaded? Running 2034ms or 40 ticks behind"
+    SERVER_OVERLOADED = "Server Overloaded"
+    # Informe de crash o excepción no controlada, con su traza.
+    CRASH = "Crash"
+
+
+class LogEvent:
+    """Un evento reconocido en el log del servidor."""
+
+    def __init__(
+        self,
+        type: LogEventType,
+        line: str,
+        player: str | None = None,
+        startup_seconds: float | None = None,
+        details: str | None = None,
+        lag_ms: float | None = None,
+    ):
+        self.type = type
+        self.line = line
+        self.player = player
+        self.startup_seconds = startup_seconds
+        self.details = details
+        self.lag_ms = lag_ms
+        self.timestamp = time.time()
+
+    def __repr__(self) -> str:
+        extra = f", player={self.player!r}" if self.player else ""
+        return f"LogEvent({self.type.name}{extra})"
+
+
+# Vanilla/Forge/Fabric: "[12:34:56] [Server thread/INFO]: mensaje"
+#                  o    "[12:34:56] [Server thread/INFO] [minecraft/DedicatedServer]: mensaje"
+# Paper/Spigot:         "[12:34:56 INFO]: mensaje"
+_LINE_PREFIX = re.compile(
+    r"^\[[^\]]*?(?: (?P<paper_level>[A-Z]+))?\]"
+    r"(?: \[[^\]/]+/(?P<level>[A-Z]+)\])?"
+    r"(?: \[[^\]]*\])?: (?P<message>.*)$"
+)
+_DONE = re.compile(r"^Done \((?P<seconds>[\d.,]+)s\)! For help")
+_JOINED = re.compile(r"^(?P<player>[A-Za-z0-9_]{1,16}) joined the game$")
+_LEFT = re.compile(r"^(?P<player>[A-Za-z0-9_]{1,16}) left the game$")
+# El mensaje puede llevar delante el nombre del logger ("ThreadedAnvilChunkStorage (world): ...");
+# nada más, para que un jugador no lo pueda provocar escribiéndolo en el chat.
+_STOPPED = re.compile(
+    r"^(?:(?:ThreadedAnvilChunkStorage|ChunkMap)(?: \([^)]*\))?: )?All dimensions are saved$"
+)
+_OVERLOADED = re.compile(r"^Can't keep up! .*?Running (?P<ms>\d+)ms or \d+ ticks behind")
+_CRASH_START = re.compile(
+    r"^(Encountered an unexpected exception|This crash report has been saved to|"
+    r"---- Minecraft Crash Report ----|Exception stopping the server|Failed to start the minecraft server)"
+)
+_STACK_LINE = re.compile(r"^(\s+at |\s*\.\.\. \d+ more|Caused by: |\t|[\w.$]+(Exception|Error)(: |$))")
+
+
+class LogEventParser:
+    """
+    Convierte líneas del log de Minecraft en eventos tipados.
+
+    Las trazas de un crash ocupan varias líneas: se acumulan hasta la primera
+    línea que no forma parte de la traza, o hasta que se llama a `flush`.
+    """
+
+    def __init__(self):
+        self._crash_lines: list[str] | None = None
+
+    def feed_line(self, line: str) -> list[LogEvent]:
+        """Procesa una línea y devuelve los eventos que completa."""
+        events: list[LogEvent] = []
+        line = line.rstrip("\r\n")
+
+        if self._crash_lines is not None:
+            if _STACK_LINE.match(line) and not _LINE_PREFIX.match(line):
+                self._crash_lines.append(line)
+                return events
+            events.extend(self.flush())
+
+        match = _LINE_PREFIX.match(line)
+        message = match.group("message") if match else line
+        level = (match.group("level") or match.group("paper_level")) if match else None
+
+        if done := _DONE.match(message):
+            seconds = float(done.group("seconds").replace(",", "."))
+            events.append(LogEvent(LogEventType.SERVER_READY, line, startup_seconds=seconds))
+        elif joined := _JOINED.match(message):
+            events.append(LogEvent(LogEventType.PLAYER_JOINED, line, player=joined.group("player")))
+        elif left := _LEFT.match(message):
+            events.append(LogEvent(LogEventType.PLAYER_LEFT, line, player=left.group("player")))
+        elif message.startswith("Stopping server"):
+            events.append(LogEvent(LogEventType.SERVER_STOPPING, line))
+        elif _STOPPED.match(message):
+            events.append(LogEvent(LogEventType.SERVER_STOPPED, line))
+        elif message.startswith(("Saved the game", "[Rcon: Saved the game")):
+            events.append(LogEvent(LogEventType.WORLD_SAVED, line))
+        elif overloaded := _OVERLOADED.match(message):
+            lag_ms = float(overloaded.group("ms"))
+            events.append(LogEvent(LogEventType.SERVER_OVERLOADED, line, lag_ms=lag_ms))
+        elif _CRASH_START.match(message) or level == "FATAL":
+            self._crash_lines = [line]
+
+        return events
+
+    def flush(self) -> list[LogEvent]:
+        """Emite el crash pendiente, si lo hay."""
+        if self._crash_lines is None:
+            return []
+        lines, self._crash_lines = self._crash_lines, None
+        return [LogEvent(LogEventType.CRASH, lines[0], details="\n".join(lines))]
+
+
+EventCallback = Callable[[LogEvent], Awaitable[None] | None]
+
+
+class ServerEventBus:
+    """
+    Reparte los eventos del servidor a los suscriptores y mantiene la lista de jugadores.
+
+    La lista de jugadores solo es fiable si el bus ha visto arrancar el servidor o
+    si se ha inicializado con `seed_players`; `players_known` indica si lo es.
+    """
+
+    def __init__(self):
+        self.parser = LogEventParser()
+        self.players: set[str] = set()
+        self.players_known = False
+        self.last_event: dict[LogEventType, LogEvent] = {}
+        self._subscribers: list[EventCallback] = []
+        # Tareas de los suscriptores asíncronos: se guarda una referencia para que no
+        # se recolecten antes de terminar.
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def player_count(self) -> int:
+        return len(self.players)
+
+    def seed_players(self, players: Iterable[str]):
+        """Inicializa la lista de jugadores con una consulta externa (p. ej. 'list')."""
+        self.players = set(players)
+        self.players_known = True
+
+    def feed_line(self, line: str):
+        """Analiza una línea del log y emite sus eventos."""
+        for event in self.parser.feed_line(line):
+            self.emit(event)
+
+    def flush(self):
+        for event in self.parser.flush():
+            self.emit(event)
+
+    def emit(self, event: LogEvent):
+        if event.type == LogEventType.PLAYER_JOINED and event.player:
+            self.players.add(event.player)
+        elif event.type == LogEventType.PLAYER_LEFT and event.player:
+            self.players.discard(event.player)
+        elif event.type in (
+            LogEventType.SERVER_READY,
+            LogEventType.SERVER_STOPPED,
+        ):
+            # Un servidor recién arrancado o detenido no tiene jugadores.
+            self.seed_players([])
+
+        self.last_event[event.type] = event
+        for callback in list(self._subscribers):
+            try:
+                result = callback(event)
+                if inspect.isawaitable(result):
+                    task = asyncio.ensure_future(result)
+                    self._tasks.add(task)
+                    task.add_done_callback(self._subscriber_done)
+            except Exception as e:
+                print(f"Error en un suscriptor de eventos del log: {e}")
+
+    def _subscriber_done(self, task: asyncio.Task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Error en un suscriptor de eventos del log: {task.exception()}")
+
+    def subscribe(self, callback: EventCallback) -> Callable[[], None]:
+        """Registra `callback(evento)`. Devuelve la función para darse de baja."""
+        self._subscribers.append(callback)
+
+        def unsubscribe():
+            if callback in self._subscribers:
+                self._subscribers.remove(callback)
+
+        return unsubscribe
+
+    async def wait_for(
+        self, types: Iterable[LogEventType], timeout: float | None = None
+    ) -> LogEvent | None:
+        """Espera al siguiente evento de alguno de los tipos dados. Devuelve None si vence el timeout."""
+        wanted = set(types)
+        future = asyncio.get_running_loop().create_future()
+
+        def on_event(event: LogEvent):
+            if event.type in wanted and not future.done():
+                future.set_result(event)
+
+        unsubscribe = self.subscribe(on_event)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            unsubscribe()
+
+
+# Constantes de inotify (ver inotify(7))
+IN_MODIFY = 0x00000002
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+_WATCH_MASK = IN_MODIFY | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+
+def _open_inotify(directory: Path) -> int | None:
+    """Crea un descriptor inotify que vigila el directorio. Devuelve None si no está disponible."""
+    if not sys.platform.startswith("linux") or not directory.is_dir():
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            return None
+        if libc.inotify_add_watch(fd, os.fsencode(directory), _WATCH_MASK) < 0:
+            os.close(fd)
+            return None
+        return fd
+    except (OSError, AttributeError):
+        return None
+
+
+class LogTailer:
+    """
+    Sigue un archivo de log como `tail -F`, de forma asíncrona.
+
+    Usa inotify para despertar en cuanto el archivo cambia y, si no está disponible,
+    sondea cada `poll_interval` segundos. Detecta la rotación (el archivo se renombra
+    y se crea otro con el mismo nombre) y el truncado: primero termina de leer el
+    archivo antiguo y después continúa con el nuevo desde el principio.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        on_line: Callable[[str], None],
+        on_idle: Callable[[], None] | None = None,
+        poll_interval: float = 1.0,
+        start_at_end: bool = True,
+    ):
+        self.path = path
+        self.on_line = on_line
+        self.on_idle = on_idle
+        self.poll_interval = poll_interval
+        self.start_at_end = start_at_end
+        self._file = None
+        self._identity: tuple[int, int] | None = None
+        self._partial = b""
+        self._inotify_fd: int | None = None
+        self._changed = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self._inotify_fd is not None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._close_inotify()
+        self._close_file()
+
+    # --- Vigilancia ---
+
+    def _setup_inotify(self):
+        if self._inotify_fd is not None:
+            return
+        fd = _open_inotify(self.path.parent)
+        if fd is None:
+            return
+        self._inotify_fd = fd
+        asyncio.get_running_loop().add_reader(fd, self._on_inotify)
+
+    def _on_inotify(self):
+        try:
+            # Solo interesa saber que algo cambió: se vacía la cola de eventos.
+            while os.read(self._inotify_fd, 4096):  # type: ignore
+                pass
+        except BlockingIOError:
+            pass
+        self._changed.set()
+
+    def _close_inotify(self):
+        if self._inotify_fd is not None:
+            asyncio.get_running_loop().remove_reader(self._inotify_fd)
+            os.close(self._inotify_fd)
+            self._inotify_fd = None
+
+    async def _run(self):
+        first_open = True
+        while True:
+            self._setup_inotify()
+            first_open = self._read_available(first_open)
+            self._changed.clear()
+            # Con inotify el sondeo es solo una red de seguridad.
+            timeout = self.poll_interval * (5 if self.uses_inotify else 1)
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout)
+            except asyncio.TimeoutError:
+                if self.on_idle:
+                    self.on_idle()
+
+    # --- Lectura ---
+
+    def _open_file(self, seek_end: bool):
+        self._file = open(self.path, "rb")
+        stat = os.fstat(self._file.fileno())
+        self._identity = (stat.st_dev, stat.st_ino)
+        self._partial = b""
+        if seek_end:
+            self._file.seek(0, os.SEEK_END)
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._identity = None
+
+    def _read_available(self, first_open: bool) -> bool:
+        """Lee todo lo nuevo. Devuelve si aún no se ha abierto nunca el archivo."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            # Rotado y aún sin recrear: se apura lo que quede del archivo antiguo.
+            self._drain()
+            return first_open
+
+        if self._file is None:
+            self._open_file(seek_end=first_open and self.start_at_end)
+        elif (stat.st_dev, stat.st_ino) != self._identity:
+            self._drain()
+            self._close_file()
+            self._open_file(seek_end=False)
+        elif stat.st_size < self._file.tell():
+            # Truncado: el servidor empezó un log nuevo en el mismo archivo.
+            self._file.seek(0)
+            self._partial = b""
+
+        self._drain()
+        return False
+
+    def _drain(self):
+        if self._file is None:
+            return
+        while chunk := self._file.read(65536):
+            data = self._partial + chunk
+            *lines, self._partial = data.split(b"\n")
+            for line in lines:
+                self.on_line(line.decode("utf-8", errors="replace"))
@@ -0,0 +1,361 @@
+import asyncio
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable
+
+
+# La consola del servidor se lee por bloques; una línea más larga que esto (una traza
+# enorme, un volcado de un datapack) se entrega recortada y el resto se descarta.
+OUTPUT_CHUNK_BYTES = 64 * 1024
+MAX_LINE_BYTES = 256 * 1024
+# Buffer del pipe de salida en asyncio (el predeterminado es 64 KiB).
+OUTPUT_STREAM_LIMIT = 1024 * 1024
+
+
+class ProcessControlError(Exception):
+    """Un comando de control del proceso falló o no terminó a tiempo."""
+
+    pass
+
+
+async def run_command(args: list[str], timeout: float = 5.0) -> tuple[int, str, str]:
+    """
+    Ejecuta un comando sin bloquear el bucle de eventos y devuelve (código, stdout, stderr).
+
+    Si no termina en `timeout` segundos se mata el proceso y se lanza
+    `ProcessControlError`.
+    """
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+    except OSError as e:
+        raise ProcessControlError(f"No se pudo ejecutar '{args[0]}': {e}")
+
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise ProcessControlError(
+            f"'{' '.join(args)}' no terminó en {timeout} segundos."
+        )
+
+    return (
+        process.returncode or 0,
+        stdout.decode("utf-8", errors="replace"),
+        stderr.decode("utf-8", errors="replace"),
+    )
+
+
+class TmuxController:
+    """
+    Control asíncrono de la sesión tmux del servidor.
+
+    Todas las llamadas a tmux se hacen con `asyncio.create_subprocess_exec` y un
+    timeout, de modo que el bucle de Discord nunca se bloquea esperando un fork.
+    La respuesta a "¿existe la sesión?" se guarda `cache_ttl` segundos y las
+    consultas simultáneas comparten una sola ejecución de `tmux has-session`.
+    """
+
+    def __init__(self, session_name: str, timeout: float = 5.0, cache_ttl: float = 2.0):
+        self.session_name = session_name
+        self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self._exists: bool | None = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def invalidate(self):
+        """Descarta la respuesta en caché (tras crear o cerrar la sesión)."""
+        self._exists = None
+
+    async def has_session(self) -> bool:
+        """Comprueba si la sesión existe."""
+        async with self._lock:
+            if self._exists is not None and time.monotonic() - self._checked_at < self.cache_ttl:
+                return self._exists
+            returncode, _, _ = await run_command(
+                ["tmux", "has-session", "-t", self.session_name], self.timeout
+            )
+            self._exists = returncode == 0
+            self._checked_at = time.monotonic()
+            return self._exists
+
+    async def new_session(self, command: str):
+        """Crea la sesión en segundo plano ejecutando `command`."""
+        self.invalidate()
+        returncode, _, stderr = await run_command(
+            ["tmux", "new-session", "-s", self.session_name, "-d", command], self.timeout
+        )
+        if returncode != 0:
+            raise ProcessControlError(
+                f"tmux no pudo crear la sesión '{self.session_name}': {stderr.strip()}"
+            )
+
+    async def pane_pid(self) -> int | None:
+        """PID del proceso que corre en el panel de la sesión (el de `start.sh`)."""
+        returncode, stdout, _ = await run_command(
+            ["tmux", "list-panes", "-t", self.session_name, "-F", "#{pane_pid}"], self.timeout
+        )
+        if returncode != 0:
+            return None
+        first = stdout.split()[:1]
+        return int(first[0]) if first and first[0].isdigit() else None
+
+    async def send_keys(self, text: str):
+        """Escribe `text` en la consola de la sesión y pulsa Enter (C-m)."""
+        returncode, _, stderr = await run_command(
+            ["tmux", "send-keys", "-t", self.session_name, text, "C-m"], self.timeout
+        )
+        if returncode != 0:
+            self.invalidate()
+            raise ProcessControlError(
+                f"tmux no pudo enviar '{text}' a la sesión '{self.session_name}': {stderr.strip()}"
+            )
+
+
+class ServerProcessBackend:
+    """
+    Interfaz común para gestionar el proceso del servidor de Minecraft.
+
+    Permite cambiar la forma de lanzar el servidor (tmux o proceso hijo
+    supervisado) sin que los comandos del bot tengan que saber cuál se usa.
+    """
+
+    async def is_running(self) -> bool:
+        """Indica si el proceso del servidor está en ejecución."""
+        raise NotImplementedError
+
+    async def start(self, start_script: Path):
+        """Lanza el servidor ejecutando `start_script`."""
+        raise NotImplementedError
+
+    async def send_command(self, command: str):
+        """Escribe un comando en la consola del servidor."""
+        raise NotImplementedError
+
+    async def stop(self):
+        """Pide al servidor que se detenga de forma ordenada."""
+        await self.send_command("stop")
+
+    async def root_pid(self) -> int | None:
+        """PID del proceso lanzado por `start.sh` (la JVM es él o un descendiente), o None."""
+        return None
+
+    def describe(self) -> str:
+        """Descripción legible del backend para los mensajes al usuario."""
+        raise NotImplementedError
+
+
+class TmuxBackend(ServerProcessBackend):
+    """Ejecuta el servidor dentro de una sesión tmux (el comportamiento por defecto)."""
+
+    def __init__(self, session_name: str):
+        self.controller = TmuxController(session_name)
+
+    async def is_running(self) -> bool:
+        return await self.controller.has_session()
+
+    async def start(self, start_script: Path):
+        await self.controller.new_session(str(start_script))
+
+    async def send_command(self, command: str):
+        await self.controller.send_keys(command)
+
+    async def root_pid(self) -> int | None:
+        if not await self.is_running():
+            return None
+        return await self.controller.pane_pid()
+
+    def describe(self) -> str:
+        return f"la sesión de tmux `{self.controller.session_name}`"
+
+
+class SupervisorBackend(ServerProcessBackend):
+    """
+    Lanza `start.sh` como proceso hijo con stdin y stdout conectados al bot.
+
+    Los comandos se escriben directamente en stdin (sin un fork de tmux por cada
+    uno), la salida se guarda en un buffer circular en memoria y se entrega línea
+    a línea a `on_line`, y la salida del proceso se detecta al instante. Si el
+    proceso termina con error sin que se haya pedido un `stop`, se considera un
+    crash y se reinicia con un retroceso exponencial, hasta `max_restarts` intentos
+    seguidos. Una salida con código 0, o después de que `stopped_cleanly` confirme
+    un apagado ordenado (un `stop` desde el juego o por RCON), no es un crash.
+    """
+
+    def __init__(
+        self,
+        on_line: Callable[[str], None] | None = None,
+        on_exit: Callable[[int, bool], None] | None = None,
+        stopped_cleanly: Callable[[float], bool] | None = None,
+        output_lines: int = 1000,
+        restart_on_crash: bool = True,
+        max_restarts: int = 5,
+        backoff_base: float = 5.0,
+        backoff_max: float = 300.0,
+        stable_after: float = 600.0,
+    ):
+        self.on_line = on_line
+        self.on_exit = on_exit
+        # Recibe la hora (time.time()) del último arranque.
+        self.stopped_cleanly = stopped_cleanly
+        self.output: deque[str] = deque(maxlen=output_lines)
+        self.restart_on_crash = restart_on_crash
+        self.max_restarts = max_restarts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # Segundos en marcha a partir de los cuales se olvidan los crashes anteriores.
+        self.stable_after = stable_after
+        self.restarts = 0
+        self._process: asyncio.subprocess.Process | None = None
+        self._start_script: Path | None = None
+        self._started_at = 0.0
+        self.started_at_time = 0.0
+        self._stop_requested = False
+        self._tasks: set[asyncio.Task] = set()
+        self._pump_task: asyncio.Task | None = None
+
+    @property
+    def pid(self) -> int | None:
+        return self._process.pid if self._process else None
+
+    async def is_running(self) -> bool:
+        return self._process is not None and self._process.returncode is None
+
+    async def start(self, start_script: Path):
+        if await self.is_running():
+            raise ProcessControlError("El servidor ya está en ejecución.")
+        self._start_script = start_script
+        self._stop_requested = False
+        try:
+            self._process = await asyncio.create_subprocess_exec(
+                str(start_script),
+                cwd=str(start_script.parent),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                limit=OUTPUT_STREAM_LIMIT,
+                # Un Ctrl+C al bot no debe llegar también al servidor.
+                start_new_session=True,
+            )
+        except OSError as e:
+            raise ProcessControlError(f"No se pudo lanzar '{start_script}': {e}")
+        self._started_at = time.monotonic()
+        self.started_at_time = time.time()
+        self._pump_task = self._spawn(self._pump_output(self._process))
+        self._spawn(self._watch_exit(self._process))
+
+    async def send_command(self, command: str):
+        if not await self.is_running():
+            raise ProcessControlError("El servidor no está en ejecución.")
+        stdin = self._process.stdin  # type: ignore
+        try:
+            stdin.write(command.encode("utf-8") + b"\n")  # type: ignore
+            await stdin.drain()  # type: ignore
+        except (ConnectionError, BrokenPipeError) as e:
+            raise ProcessControlError(f"No se pudo escribir en la consola del servidor: {e}")
+
+    async def stop(self):
+        self._stop_requested = True
+        await self.send_command("stop")
+
+    async def root_pid(self) -> int | None:
+        return self.pid if await self.is_running() else None
+
+    def describe(self) -> str:
+        if self.pid is not None:
+            return f"el proceso supervisado (PID {self.pid})"
+        return "el proceso supervisado"
+
+    def recent_output(self, lines: int = 50) -> list[str]:
+        """Últimas líneas de la consola del servidor."""
+        return list(self.output)[-lines:]
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _pump_output(self, process: asyncio.subprocess.Process):
+        """
+        Copia la salida del servidor al buffer circular y al parser de eventos.
+
+        Lee por bloques en lugar de con `readline`, que falla con las líneas más
+        largas que el límite del stream: si la lectura se detuviera, el pipe se
+        llenaría y el servidor se bloquearía al escribir en la consola.
+        """
+        pending = b""
+        discarding = False  # Se está saltando el resto de una línea recortada.
+        while chunk := await process.stdout.read(OUTPUT_CHUNK_BYTES):  # type: ignore
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            for line_bytes in lines:
+                if discarding:
+                    discarding = False
+                    continue
+                self._handle_line(line_bytes)
+            if len(pending) > MAX_LINE_BYTES:
+                if not discarding:
+                    self._handle_line(pending[:MAX_LINE_BYTES])
+                    discarding = True
+                pending = b""
+        if pending and not discarding:
+            self._handle_line(pending)
+
+    def _handle_line(self, line_bytes: bytes):
+        line = line_bytes.decode("utf-8", errors="replace").rstrip("\r")
+        self.output.append(line)
+        if self.on_line:
+            try:
+                self.on_line(line)
+            except Exception as e:
+                print(f"Error procesando la salida del servidor: {e}")
+
+    async def _watch_exit(self, process: asyncio.subprocess.Process):
+        """Espera a que el proceso termine y decide si hay que reiniciarlo."""
+        returncode = await process.wait()
+        pump_task = self._pump_task
+        if pump_task is not None:
+            # Las últimas líneas ("All dimensions are saved") deciden si fue un stop.
+            await asyncio.wait({pump_task}, timeout=5.0)
+        expected = self._stop_requested
+        print(
+            f"Supervisor: el servidor terminó con código {returncode}"
+            f"{'' if expected else ' sin que se pidiera un stop'}."
+        )
+        if self.on_exit:
+            self.on_exit(returncode, expected)
+
+        if expected or not self.restart_on_crash or self._start_script is None:
+            return
+        if returncode == 0 or (
+            self.stopped_cleanly is not None and self.stopped_cleanly(self.started_at_time)
+        ):
+            print("Supervisor: el servidor se apagó de forma ordenada; no se reinicia.")
+            return
+
+        if time.monotonic() - self._started_at >= self.stable_after:
+            self.restarts = 0
+        if self.restarts >= self.max_restarts:
+            print(
+                f"Supervisor: {self.restarts} reinicios seguidos sin éxito. No se reintentará más."
+            )
+            return
+
+        delay = min(self.backoff_max, self.backoff_base * 2**self.restarts)
+        self.restarts += 1
+        print(f"Supervisor: reiniciando el servidor en {delay:.0f}s (intento {self.restarts}).")
+        await asyncio.sleep(delay)
+        if self._stop_requested or await self.is_running():
+            return
+        try:
+            await self.start(self._start_script)
+        except ProcessControlError as e:
+            print(f"Supervisor: no se pudo reiniciar el servidor: {e}")
@@ -1,7 +1,19 @@
 import asyncio
 import random
 import socket
-import struct
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Sequence, cast
+
+from .rcon_codec import (
+    SERVERDATA_AUTH,
+    SERVERDATA_AUTH_RESPONSE,
+    SERVERDATA_EXECCOMMAND,
+    SERVERDATA_RESPONSE_VALUE,
+    PacketDecoder,
+    PacketEncoder,
+    decode_payload,
+)
 
 
 class RCONConnectionError(Exception):
@@ -16,31 +28,53 @@ class RCONAuthError(Exception):
     pass
 
 
-# Entendiendo el Protocolo RCON
-# Un paquete RCON es una estructura de bytes simple. Se ve así:
-# Longitud (4 bytes) | ID de Petición (4 bytes) | Tipo (4 bytes) | Payload (N bytes) | Terminador (2 bytes)
-# Longitud: Un entero de 32 bits que indica el tamaño del resto del paquete (ID + Tipo + Payload + Terminador).
-# ID de Petición: Un número que tú eliges. El servidor te responderá usando el mismo ID, para que puedas asociar respuestas con peticiones.
-# Tipo: Un entero que define el propósito del paquete. Los más importantes son:
-# 3: SERVERDATA_AUTH (para iniciar sesión con la contraseña).
-# 2: SERVERDATA_EXECCOMMAND (para enviar un comando).
-# 0: SERVERDATA_RESPONSE_VALUE (la respuesta del servidor a un comando).
-# 2: SERVERDATA_AUTH_RESPONSE (la respuesta del servidor a la autenticación).
-# Payload: Los datos en sí (la contraseña o el comando), codificados en ASCII.
-# Terminador: Dos bytes nulos (\x00\x00) para marcar el final.
-# Para comunicarse, envías un paquete al servidor y luego lees su respuesta, que sigue el mismo formato.
+# El formato de los paquetes está descrito en `rcon_codec`.
+#
+# Respuestas divididas: Minecraft trocea las respuestas largas en varios paquetes de
+# como máximo 4096 bytes, todos con el mismo ID. Para saber cuándo ha terminado una
+# respuesta se envía justo después del comando un paquete vacío de tipo 0 con otro
+# ID (el "centinela"). El servidor procesa los paquetes en orden, así que cuando llega
+# la respuesta al centinela todos los fragmentos del comando anterior ya se recibieron.
+
+# Tamaño de cada lectura del socket; varios paquetes pueden llegar en una sola.
+READ_CHUNK_SIZE = 65536
 
 
 class SimpleRCONClient:
-    """Un cliente RCON asíncrono y minimalista para Minecraft."""
+    """
+    Un cliente RCON asíncrono y minimalista para Minecraft.
+
+    En modo `pipelined` una tarea en segundo plano lee todas las respuestas y las
+    entrega a quien las pidió según su ID de petición, de modo que varios comandos
+    pueden estar en vuelo a la vez sobre la misma conexión y las respuestas largas
+    se reconstruyen a partir de sus fragmentos.
+    """
 
-    def __init__(self, host: str, port: int, password: str, timeout: int = 5):
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        password: str,
+        timeout: int = 5,
+        pipelined: bool = False,
+    ):
         self.host = host
         self.port = port
         self.password = password
         self.timeout = timeout
+        self.pipelined = pipelined
         self._reader = None
         self._writer = None
+        self._next_id = random.randint(1, 2**30)
+        # ID del comando -> fragmentos recibidos hasta ahora
+        self._fragments: dict[int, list[bytes]] = {}
+        # ID del centinela -> (ID del comando, futuro de la respuesta)
+        self._sentinels: dict[int, tuple[int, asyncio.Future]] = {}
+        self._dispatcher: asyncio.Task | None = None
+        self._encoder = PacketEncoder()
+        self._decoder = PacketDecoder()
+        # Serializa los comandos en modo no pipelined (una petición, una respuesta)
+        self._lock = asyncio.Lock()
 
     async def __aenter__(self):
         """Permite el uso con 'async with'."""
@@ -49,39 +83,59 @@ class SimpleRCONClient:
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Cierra la conexión al salir del bloque 'async with'."""
-        if self._writer:
-            self._writer.close()
-            await self._writer.wait_closed()
-
-    def _create_packet(self, req_id: int, req_type: int, payload: str) -> bytes:
-        """Construye un paquete RCON en el formato de bytes correcto."""
-        payload_bytes = payload.encode("ascii")
-        # Formato: < (little-endian), i (entero de 4 bytes)
-        # Paquete: ID, Tipo, Payload, Terminador (2 bytes nulos)
-        packet_data = struct.pack("<ii", req_id, req_type) + payload_bytes + b"\x00\x00"
-        # Longitud total del paquete (sin incluir el campo de longitud en sí)
-        packet_len = len(packet_data)
-        # Paquete final con la longitud al principio
-        return struct.pack("<i", packet_len) + packet_data
-
-    async def _read_response(self) -> tuple[int, str]:
-        """Lee y decodifica una respuesta del servidor."""
-        # Lee los primeros 4 bytes para obtener la longitud del paquete
-        len_data = await asyncio.wait_for(self._reader.readexactly(4), self.timeout)  # type: ignore
-        packet_len = struct.unpack("<i", len_data)[0]
+        await self.close()
 
-        # Lee el resto del paquete
-        packet_data = await asyncio.wait_for(
-            self._reader.readexactly(packet_len), self.timeout  # type: ignore
-        )
+    @property
+    def is_connected(self) -> bool:
+        """Indica si el socket sigue abierto y el servidor no ha cerrado la conexión."""
+        if self._writer is None or self._reader is None:
+            return False
+        if self._dispatcher is not None and self._dispatcher.done():
+            return False
+        return not self._writer.is_closing() and not self._reader.at_eof()
+
+    async def close(self):
+        """Cierra la conexión si está abierta."""
+        writer = self._writer
+        self._reader = None
+        self._writer = None
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+        self._fail_pending(RCONConnectionError("La conexión RCON se cerró."))
+        if writer:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                # El servidor ya había cerrado el socket.
+                pass
+
+    def _new_id(self) -> int:
+        """Genera un ID de petición positivo (el -1 está reservado para errores de autenticación)."""
+        self._next_id = self._next_id % (2**31 - 1) + 1
+        return self._next_id
 
-        # Desempaqueta el ID y el Tipo
-        req_id, res_type = struct.unpack("<ii", packet_data[:8])
+    async def _read_packet(self) -> tuple[int, int, bytes]:
+        """Lee del socket hasta disponer de un paquete completo y devuelve (ID, tipo, payload)."""
+        while True:
+            packet = self._decoder.next_packet()
+            if packet is not None:
+                return packet
 
-        # El payload es el resto, menos los 2 bytes nulos del final
-        payload = packet_data[8:-2].decode("ascii", errors="ignore")
+            # Si la lectura se cancela (p. ej. por timeout) no se pierde nada: los
+            # bytes ya recibidos permanecen en el decodificador.
+            data = await self._reader.read(READ_CHUNK_SIZE)  # type: ignore
+            if not data:
+                raise asyncio.IncompleteReadError(bytes(), None)
+            self._decoder.feed(data)
 
-        return res_type, payload
+    async def _read_response(self) -> tuple[int, int, str]:
+        """Lee y decodifica una respuesta del servidor."""
+        req_id, res_type, payload = await asyncio.wait_for(
+            self._read_packet(), self.timeout
+        )
+        return req_id, res_type, decode_payload(payload)
 
     async def connect(self):
         """Establece la conexión y se autentica."""
@@ -89,27 +143,145 @@ class SimpleRCONClient:
             self._reader, self._writer = await asyncio.wait_for(
                 asyncio.open_connection(self.host, self.port), self.timeout
             )
-        except (asyncio.TimeoutError, ConnectionRefusedError, socket.gaierror) as e:
+        except (asyncio.TimeoutError, OSError, socket.gaierror) as e:
             raise RCONConnectionError(
                 f"No se pudo conectar a {self.host}:{self.port}: {e}"
             )
 
         await self._authenticate()
 
+        if self.pipelined:
+            self._dispatcher = asyncio.create_task(self._dispatch_responses())
+
     async def _authenticate(self):
         """Envía el paquete de autenticación."""
-        auth_id = random.randint(0, 2**31 - 1)
-        auth_packet = self._create_packet(auth_id, 3, self.password)
-        self._writer.write(auth_packet)  # type: ignore
+        auth_id = self._new_id()
+        self._encoder.add(auth_id, SERVERDATA_AUTH, self.password)
+        self._writer.write(self._encoder.take())  # type: ignore
         await self._writer.drain()  # type: ignore
 
         # Minecraft responde con un paquete de tipo 2 (SERVERDATA_AUTH_RESPONSE)
         # y un ID de -1 si la autenticación falla.
-        res_type, _ = await self._read_response()
-        if res_type != 2:  # No es una respuesta de autenticación
+        req_id, res_type, _ = await self._read_response()
+        if res_type != SERVERDATA_AUTH_RESPONSE:  # No es una respuesta de autenticación
             raise RCONAuthError(
                 "El servidor no respondió correctamente a la autenticación."
             )
+        if req_id == -1:
+            raise RCONAuthError("Contraseña RCON incorrecta.")
+
+    # --- Modo pipelined ---
+
+    async def _dispatch_responses(self):
+        """Lee respuestas continuamente y las entrega a los comandos pendientes."""
+        try:
+            while True:
+                req_id, _, payload = await self._read_packet()
+                self._route_packet(req_id, payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self._fail_pending(e)
+
+    def _route_packet(self, req_id: int, payload: bytes):
+        """Asocia un paquete recibido con su comando o cierra la respuesta si es un centinela."""
+        fragments = self._fragments.get(req_id)
+        if fragments is not None:
+            fragments.append(payload)
+            return
+
+        entry = self._sentinels.pop(req_id, None)
+        if entry is None:
+            # Respuesta de un comando ya abandonado (p. ej. por timeout).
+            return
+
+        cmd_id, future = entry
+        fragments = self._fragments.pop(cmd_id, [])
+        if not future.done():
+            # Se une antes de decodificar: un carácter UTF-8 puede quedar partido entre fragmentos.
+            future.set_result(decode_payload(b"".join(fragments)))
+
+    def _fail_pending(self, error: BaseException):
+        """Propaga un error a todos los comandos que esperan respuesta."""
+        sentinels, self._sentinels = self._sentinels, {}
+        self._fragments = {}
+        for _, future in sentinels.values():
+            if not future.done():
+                future.set_exception(error)
+
+    def _register_command(self, command: str) -> tuple[int, int, asyncio.Future]:
+        """Registra la respuesta esperada de un comando y añade sus paquetes (comando + centinela) al lote."""
+        cmd_id = self._new_id()
+        sentinel_id = self._new_id()
+        future = asyncio.get_running_loop().create_future()
+        self._fragments[cmd_id] = []
+        self._sentinels[sentinel_id] = (cmd_id, future)
+        self._encoder.add(cmd_id, SERVERDATA_EXECCOMMAND, command)
+        self._encoder.add(sentinel_id, SERVERDATA_RESPONSE_VALUE)
+        return cmd_id, sentinel_id, future
+
+    def _forget_command(self, cmd_id: int, sentinel_id: int, future: asyncio.Future):
+        """Deja de esperar un comando abandonado (timeout o cancelación)."""
+        if not future.done() or future.cancelled():
+            self._fragments.pop(cmd_id, None)
+            self._sentinels.pop(sentinel_id, None)
+
+    def _send_batch(
+        self, commands: Sequence[str]
+    ) -> list[tuple[int, int, asyncio.Future]]:
+        """Registra varios comandos y los escribe en el socket con una única escritura."""
+        registered = [self._register_command(command) for command in commands]
+        self._writer.write(self._encoder.take())  # type: ignore
+        return registered
+
+    async def _execute_pipelined(self, command: str) -> str:
+        """Envía el comando sin esperar a los anteriores y aguarda su respuesta."""
+        [(cmd_id, sentinel_id, future)] = self._send_batch([command])
+        try:
+            await self._writer.drain()  # type: ignore
+            return await asyncio.wait_for(future, self.timeout)
+        finally:
+            self._forget_command(cmd_id, sentinel_id, future)
+
+    async def _execute_many_pipelined(
+        self, commands: Sequence[str]
+    ) -> list[str | BaseException]:
+        """Envía un lote y deja que la tarea lectora reparta las respuestas."""
+        registered = self._send_batch(commands)
+        try:
+            await self._writer.drain()  # type: ignore
+            return await asyncio.gather(
+                *(asyncio.wait_for(future, self.timeout) for _, _, future in registered),
+                return_exceptions=True,
+            )
+        finally:
+            for cmd_id, sentinel_id, future in registered:
+                self._forget_command(cmd_id, sentinel_id, future)
+
+    async def _execute_many_inline(
+        self, commands: Sequence[str]
+    ) -> list[str | BaseException]:
+        """Envía un lote y lee las respuestas en este mismo coroutine (modo no pipelined)."""
+        registered = self._send_batch(commands)
+        try:
+            await self._writer.drain()  # type: ignore
+            # El timeout se aplica entre paquetes: un lote grande puede tardar más
+            # que un solo comando mientras el servidor siga respondiendo.
+            while self._sentinels:
+                req_id, _, payload = await asyncio.wait_for(
+                    self._read_packet(), self.timeout
+                )
+                self._route_packet(req_id, payload)
+        except Exception as e:
+            self._fail_pending(e)
+            # Pueden quedar respuestas sin leer en el socket: la conexión ya no es fiable.
+            self._writer.close()  # type: ignore
+
+        results: list[str | BaseException] = []
+        for _, _, future in registered:
+            error = future.exception()
+            results.append(error if error is not None else future.result())
+        return results
 
     async def execute(self, command: str) -> str:
         """Ejecuta un comando y devuelve la respuesta."""
@@ -118,12 +290,271 @@ class SimpleRCONClient:
                 "No conectado. Llama a connect() primero o usa 'async with'."
             )
 
-        cmd_id = random.randint(0, 2**31 - 1)
-        cmd_packet = self._create_packet(cmd_id, 2, command)
-        self._writer.write(cmd_packet)
-        await self._writer.drain()
+        if self._dispatcher is not None:
+            if self._dispatcher.done():
+                raise ConnectionResetError("La conexión RCON se ha perdido.")
+            return await self._execute_pipelined(command)
+
+        async with self._lock:
+            # Comando + centinela, igual que en modo pipelined: se leen todos los
+            # fragmentos y no queda ninguno en el socket para el siguiente comando.
+            [result] = await self._execute_many_inline([command])
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    async def execute_many(self, commands: Sequence[str]) -> list[str | BaseException]:
+        """
+        Ejecuta varios comandos con una sola escritura y devuelve las respuestas en orden.
+
+        Cada posición de la lista contiene la respuesta del comando o la excepción que
+        impidió obtenerla, de modo que un fallo no oculta el resultado de los demás.
+        """
+        if not self._writer:
+            raise RCONConnectionError(
+                "No conectado. Llama a connect() primero o usa 'async with'."
+            )
+        if not commands:
+            return []
+
+        if self._dispatcher is not None:
+            if self._dispatcher.done():
+                raise ConnectionResetError("La conexión RCON se ha perdido.")
+            return await self._execute_many_pipelined(commands)
+
+        async with self._lock:
+            return await self._execute_many_inline(commands)
+
+
+def raise_first_error(results: Sequence[str | BaseException]) -> list[str]:
+    """Devuelve las respuestas de `execute_many` o lanza el primer error que contengan."""
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return cast(list[str], list(results))
+
+
+# Errores que indican que una conexión reutilizada estaba muerta (el servidor se
+# reinició o cerró el socket mientras estaba inactiva en el pool).
+_STALE_CONNECTION_ERRORS = (asyncio.IncompleteReadError, ConnectionError)
+
+
+class RCONConnectionPool:
+    """
+    Mantiene un pequeño conjunto de conexiones RCON autenticadas y reutilizables.
 
-        res_type, payload = await self._read_response()
+    Abrir una conexión implica un handshake TCP y una autenticación, que es la
+    mayor parte del coste de cada consulta y además llena el log del servidor de
+    líneas de conexión/desconexión. El pool conserva las conexiones abiertas entre
+    llamadas, descarta las que se han caído y, tras fallos consecutivos, espera
+    con un retroceso exponencial antes de volver a intentar conectar.
 
-        # Nota: Algunos comandos (como 'list') pueden enviar una respuesta vacía primero.
-        return payload
+    Con `pipelined=True`, `execute` comparte una única conexión entre todas las
+    llamadas concurrentes: los comandos salen seguidos y cada respuesta se asocia a
+    su llamada por ID, así que una ráfaga de N comandos cuesta un solo viaje de ida
+    y vuelta en lugar de N.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        password: str,
+        size: int = 2,
+        timeout: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 15.0,
+        pipelined: bool = False,
+    ):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.size = size
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pipelined = pipelined
+        self._idle: list[SimpleRCONClient] = []
+        self._semaphore = asyncio.Semaphore(size)
+        self._failures = 0
+        self._next_attempt = 0.0
+        self._shared: SimpleRCONClient | None = None
+        self._shared_lock = asyncio.Lock()
+
+    def _take_idle(self) -> SimpleRCONClient | None:
+        """Devuelve una conexión inactiva que siga viva, descartando las muertas."""
+        while self._idle:
+            client = self._idle.pop()
+            if client.is_connected:
+                return client
+        return None
+
+    def _record_failure(self):
+        """Registra un fallo de conexión y programa el siguiente intento."""
+        self._failures += 1
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (self._failures - 1))
+        self._next_attempt = time.monotonic() + delay
+
+    async def _open(self) -> SimpleRCONClient:
+        """Abre y autentica una nueva conexión respetando el retroceso."""
+        remaining = self._next_attempt - time.monotonic()
+        if remaining > 0:
+            raise RCONConnectionError(
+                f"No se pudo conectar a {self.host}:{self.port}. "
+                f"Siguiente intento en {remaining:.1f}s."
+            )
+
+        client = SimpleRCONClient(
+            self.host, self.port, self.password, self.timeout, self.pipelined
+        )
+        try:
+            await client.connect()
+        except RCONAuthError:
+            await client.close()
+            self._record_failure()
+            raise
+        except (RCONConnectionError, asyncio.TimeoutError, *_STALE_CONNECTION_ERRORS) as e:
+            await client.close()
+            self._record_failure()
+            if isinstance(e, RCONConnectionError):
+                raise
+            raise RCONConnectionError(
+                f"No se pudo conectar a {self.host}:{self.port}: {e}"
+            ) from e
+
+        self._failures = 0
+        self._next_attempt = 0.0
+        return client
+
+    @asynccontextmanager
+    async def acquire(self, fresh: bool = False) -> AsyncIterator[SimpleRCONClient]:
+        """
+        Presta una conexión autenticada durante el bloque 'async with'.
+
+        Si el bloque lanza una excepción la conexión se cierra, ya que su estado
+        (respuestas pendientes en el socket) es desconocido.
+        """
+        async with self._semaphore:
+            client = None if fresh else self._take_idle()
+            if client is None:
+                client = await self._open()
+            try:
+                yield client
+            except BaseException:
+                await client.close()
+                raise
+            if client.is_connected:
+                self._idle.append(client)
+
+    async def _get_shared(self, failed: SimpleRCONClient | None = None) -> SimpleRCONClient:
+        """
+        Devuelve la conexión compartida del modo pipelined, abriéndola si hace falta.
+
+        `failed` es la conexión con la que falló quien llama: solo se reabre si sigue
+        siendo la compartida. Si otro comando en vuelo ya la reemplazó, se reutiliza
+        la nueva en lugar de cerrarla.
+        """
+        async with self._shared_lock:
+            shared = self._shared
+            if shared is None or shared is failed or not shared.is_connected:
+                if shared is not None:
+                    await shared.close()
+                self._shared = None
+                self._shared = await self._open()
+            return self._shared
+
+    async def _execute_shared(self, command: str) -> str:
+        """Ejecuta un comando sobre la conexión compartida, reintentando una vez si estaba caída."""
+        client = await self._get_shared()
+        try:
+            return await client.execute(command)
+        except _STALE_CONNECTION_ERRORS:
+            pass
+
+        try:
+            client = await self._get_shared(failed=client)
+            return await client.execute(command)
+        except _STALE_CONNECTION_ERRORS as e:
+            raise RCONConnectionError(
+                f"Se perdió la conexión con {self.host}:{self.port}: {e}"
+            ) from e
+
+    async def execute(self, command: str) -> str:
+        """
+        Ejecuta un comando con una conexión del pool.
+
+        Si la conexión reutilizada resulta estar caída se reintenta una vez con
+        una conexión nueva.
+        """
+        if self.pipelined:
+            return await self._execute_shared(command)
+
+        try:
+            async with self.acquire() as client:
+                return await client.execute(command)
+        except _STALE_CONNECTION_ERRORS:
+            pass
+
+        try:
+            async with self.acquire(fresh=True) as client:
+                return await client.execute(command)
+        except _STALE_CONNECTION_ERRORS as e:
+            raise RCONConnectionError(
+                f"Se perdió la conexión con {self.host}:{self.port}: {e}"
+            ) from e
+
+    async def execute_many(self, commands: Sequence[str]) -> list[str | BaseException]:
+        """
+        Ejecuta un lote de comandos con una sola escritura (ver `SimpleRCONClient.execute_many`).
+
+        Si la conexión reutilizada estaba caída antes de enviar nada, el lote se
+        envía por una conexión nueva. Una vez escrito no se reintenta nunca: los
+        comandos podrían ejecutarse dos veces (`give`, `say`, `save-off`...).
+        """
+        if self.pipelined:
+            # `_get_shared` ya sustituye la conexión si estaba caída. Entre esa
+            # comprobación y la escritura del lote no hay ningún `await`, así que un
+            # error de conexión a partir de aquí llega con el lote ya enviado.
+            client = await self._get_shared()
+            try:
+                return await client.execute_many(commands)
+            except _STALE_CONNECTION_ERRORS as e:
+                raise RCONConnectionError(
+                    f"Se perdió la conexión con {self.host}:{self.port}: {e}"
+                ) from e
+
+        # `acquire` descarta las conexiones inactivas que ya estaban caídas, y en
+        # este modo los errores tras la escritura se devuelven en la lista.
+        try:
+            async with self.acquire() as client:
+                return await client.execute_many(commands)
+        except _STALE_CONNECTION_ERRORS as e:
+            raise RCONConnectionError(
+                f"Se perdió la conexión con {self.host}:{self.port}: {e}"
+            ) from e
+
+    async def close(self):
+        """Cierra todas las conexiones inactivas y la compartida."""
+        if self._shared is not None:
+            await self._shared.close()
+            self._shared = None
+        idle, self._idle = self._idle, []
+        for client in idle:
+            await client.close()
+
+
+_pools: dict[tuple[str, int, str], RCONConnectionPool] = {}
+
+
+def get_rcon_pool(
+    host: str, port: int, password: str, size: int = 2, pipelined: bool = False
+) -> RCONConnectionPool:
+    """Devuelve el pool compartido para un servidor, creándolo la primera vez."""
+    key = (host, port, password)
+    pool = _pools.get(key)
+    if pool is None:
+        pool = RCONConnectionPool(
+            host, port, password, size=size, pipelined=pipelined
+        )
+        _pools[key] = pool
+    return pool
@@ -0,0 +1,144 @@
+import struct
+from typing import Iterator
+
+# Entendiendo el Protocolo RCON
+# Un paquete RCON es una estructura de bytes simple. Se ve así:
+# Longitud (4 bytes) | ID de Petición (4 bytes) | Tipo (4 bytes) | Payload (N bytes) | Terminador (2 bytes)
+# Longitud: Un entero de 32 bits que indica el tamaño del resto del paquete (ID + Tipo + Payload + Terminador).
+# ID de Petición: Un número que tú eliges. El servidor te responderá usando el mismo ID, para que puedas asociar respuestas con peticiones.
+# Tipo: Un entero que define el propósito del paquete. Los más importantes son:
+# 3: SERVERDATA_AUTH (para iniciar sesión con la contraseña).
+# 2: SERVERDATA_EXECCOMMAND (para enviar un comando).
+# 0: SERVERDATA_RESPONSE_VALUE (la respuesta del servidor a un comando).
+# 2: SERVERDATA_AUTH_RESPONSE (la respuesta del servidor a la autenticación).
+# Payload: Los datos en sí (la contraseña o el comando), codificados en UTF-8.
+# Terminador: Dos bytes nulos (\x00\x00) para marcar el final.
+# Para comunicarse, envías un paquete al servidor y luego lees su respuesta, que sigue el mismo formato.
+
+SERVERDATA_RESPONSE_VALUE = 0
+SERVERDATA_EXECCOMMAND = 2
+SERVERDATA_AUTH_RESPONSE = 2
+SERVERDATA_AUTH = 3
+
+# Longitud, ID y Tipo: los tres enteros little-endian de la cabecera
+HEADER = struct.Struct("<iii")
+LENGTH = struct.Struct("<i")
+TERMINATOR = b"\x00\x00"
+# ID + Tipo + Terminador: el valor mínimo posible del campo Longitud
+MIN_PACKET_LENGTH = 10
+# Minecraft nunca envía más de 4096 bytes de payload por paquete; una longitud
+# muy superior solo puede significar que el flujo se ha desincronizado.
+MAX_PACKET_LENGTH = 1 << 20
+
+
+class RCONProtocolError(Exception):
+    """El servidor envió datos que no forman un paquete RCON válido."""
+
+    pass
+
+
+def decode_payload(payload: bytes) -> str:
+    """Convierte el cuerpo de una respuesta en texto sin perder caracteres no ASCII."""
+    return payload.decode("utf-8", errors="replace")
+
+
+class PacketEncoder:
+    """
+    Empaqueta paquetes RCON sobre un bytearray reutilizable.
+
+    Los paquetes se escriben uno tras otro con `struct.pack_into`, de modo que un
+    lote completo queda contiguo en el buffer y se entrega al socket con una sola
+    escritura. El buffer crece solo cuando un lote no cabe y se reutiliza después.
+    """
+
+    def __init__(self, initial_size: int = 4096):
+        self._buffer = bytearray(initial_size)
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def _reserve(self, size: int):
+        """Garantiza espacio para `size` bytes más al final del lote actual."""
+        needed = self._length + size
+        if needed > len(self._buffer):
+            self._buffer.extend(bytes(max(needed, 2 * len(self._buffer)) - len(self._buffer)))
+
+    def add(self, req_id: int, req_type: int, payload: str | bytes = ""):
+        """Añade un paquete al lote actual. Los payloads de texto se codifican en UTF-8."""
+        data = payload.encode("utf-8") if isinstance(payload, str) else payload
+        size = HEADER.size + len(data) + len(TERMINATOR)
+        self._reserve(size)
+
+        offset = self._length
+        HEADER.pack_into(self._buffer, offset, size - LENGTH.size, req_id, req_type)
+        body_start = offset + HEADER.size
+        body_end = body_start + len(data)
+        self._buffer[body_start:body_end] = data
+        self._buffer[body_end : body_end + len(TERMINATOR)] = TERMINATOR
+        self._length += size
+
+    def take(self) -> bytes:
+        """
+        Devuelve el lote acumulado y vacía el encoder.
+
+        Se entrega una copia porque el transporte de asyncio puede conservar los
+        datos en su propio buffer mientras este se reutiliza para el siguiente lote.
+        """
+        with memoryview(self._buffer) as view, view[: self._length] as batch:
+            data = batch.tobytes()
+        self._length = 0
+        return data
+
+
+def encode_packet(req_id: int, req_type: int, payload: str | bytes = "") -> bytes:
+    """Construye un único paquete RCON."""
+    encoder = PacketEncoder(HEADER.size + len(payload) * 4 + len(TERMINATOR))
+    encoder.add(req_id, req_type, payload)
+    return encoder.take()
+
+
+class PacketDecoder:
+    """
+    Decodificador incremental de paquetes RCON.
+
+    Acepta los bytes tal como llegan del socket (lecturas parciales o varios
+    paquetes juntos) y extrae los paquetes completos leyendo la cabecera
+    directamente del buffer de recepción con `unpack_from`.
+    """
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def feed(self, data: bytes):
+        """Añade bytes recibidos al buffer."""
+        self._buffer += data
+
+    def next_packet(self) -> tuple[int, int, bytes] | None:
+        """Extrae el siguiente paquete completo como (ID, tipo, payload) o None si faltan bytes."""
+        buffer = self._buffer
+        if len(buffer) < LENGTH.size:
+            return None
+
+        (packet_len,) = LENGTH.unpack_from(buffer, 0)
+        if not MIN_PACKET_LENGTH <= packet_len <= MAX_PACKET_LENGTH:
+            raise RCONProtocolError(f"Longitud de paquete RCON inválida: {packet_len}")
+
+        total = LENGTH.size + packet_len
+        if len(buffer) < total:
+            return None
+
+        _, req_id, res_type = HEADER.unpack_from(buffer, 0)
+        with memoryview(buffer) as view, view[HEADER.size : total - len(TERMINATOR)] as body:
+            payload = body.tobytes()
+        # Borrar por el principio de un bytearray no desplaza el resto de datos en CPython.
+        del buffer[:total]
+        return req_id, res_type, payload
+
+    def packets(self) -> Iterator[tuple[int, int, bytes]]:
+        """Itera sobre todos los paquetes completos disponibles en el buffer."""
+        while (packet := self.next_packet()) is not None:
+            yield packet
@@ -0,0 +1,121 @@
+import re
+from typing import Callable
+
+from .rcon_client import RCONConnectionPool
+
+# Entendiendo la medida del MSPT
+# MSPT = milisegundos que tarda el servidor en procesar un tick. Por encima de 50 ms
+# el servidor no llega a 20 TPS y los jugadores notan el lag. Cada servidor lo
+# expone con un comando distinto:
+# - Vanilla 1.20.3+: "tick query"  -> "Average time per tick: 3.2ms (Target: 50.0ms)"
+# - Paper/Purpur:    "mspt"        -> "◴ 2.1/1.2/5.3, 2.0/1.1/6.0, ..." (media/mín/máx de los últimos 5 s, ...)
+# - Forge:           "forge tps"   -> "Overall: Mean tick time: 1.503 ms. Mean TPS: 20.000"
+# Se prueban en ese orden y se recuerda el primero que responde con un valor.
+#
+# Los contadores para la telemetría siguen la misma idea:
+# - Entidades: "execute if entity @e" (vanilla, vale en todos) -> "Test passed, count: 812"
+# - Chunks cargados: "paper chunkinfo *" (Paper)
+#   -> "... Chunks in all listed worlds: Total: 1523 Inactive: 0 ..."
+#   Vanilla no tiene un comando que los cuente; sin Paper no hay dato.
+# Los TPS se derivan del MSPT: el servidor no pasa de 20 TPS y, por encima de 50 ms
+# por tick, hace 1000 / MSPT ticks por segundo.
+
+MSPT_COMMANDS = ("tick query", "mspt", "forge tps")
+ENTITY_COUNT_COMMANDS = ("execute if entity @e",)
+CHUNK_COUNT_COMMANDS = ("paper chunkinfo *",)
+TARGET_TPS = 20.0
+
+_COLOR_CODES = re.compile(r"§.")
+_VANILLA = re.compile(r"Average time per tick: ([\d.]+)\s*ms")
+_PAPER = re.compile(r"([\d.]+)/[\d.]+/[\d.]+")
+_FORGE_OVERALL = re.compile(r"Overall:.*?Mean tick time: ([\d.]+) ms")
+_FORGE = re.compile(r"Mean tick time: ([\d.]+) ms")
+_ENTITY_COUNT = re.compile(r"Test passed, count: (\d+)")
+_CHUNK_TOTAL = re.compile(r"Total: (\d+)")
+
+
+def parse_mspt(response: str) -> float | None:
+    """Extrae el MSPT medio de la respuesta de cualquiera de `MSPT_COMMANDS`."""
+    text = _COLOR_CODES.sub("", response)
+    for pattern in (_VANILLA, _FORGE_OVERALL, _FORGE, _PAPER):
+        if match := pattern.search(text):
+            return float(match.group(1))
+    return None
+
+
+def parse_entity_count(response: str) -> float | None:
+    """Extrae el número de entidades de "execute if entity @e"."""
+    text = _COLOR_CODES.sub("", response)
+    if match := _ENTITY_COUNT.search(text):
+        return float(match.group(1))
+    if text.startswith("Test failed"):
+        # Ninguna entidad cumple el selector.
+        return 0.0
+    return None
+
+
+def parse_chunk_count(response: str) -> float | None:
+    """Extrae el total de chunks cargados de "paper chunkinfo *" (el último total es el global)."""
+    totals = _CHUNK_TOTAL.findall(_COLOR_CODES.sub("", response))
+    return float(totals[-1]) if totals else None
+
+
+def tps_from_mspt(mspt: float) -> float:
+    """TPS que corresponden a un MSPT medio."""
+    if mspt <= 0:
+        return TARGET_TPS
+    return min(TARGET_TPS, 1000.0 / mspt)
+
+
+class RconMetricProbe:
+    """Mide un valor por RCON, descubriendo una sola vez qué comando entiende el servidor."""
+
+    def __init__(
+        self,
+        rcon: RCONConnectionPool,
+        name: str,
+        commands: tuple[str, ...],
+        parse: Callable[[str], float | None],
+    ):
+        self.rcon = rcon
+        self.name = name
+        self.commands = commands
+        self.parse = parse
+        self.command: str | None = None
+        self.supported = True
+
+    async def measure(self) -> float | None:
+        """Devuelve el valor o None si el servidor no ofrece ningún comando conocido."""
+        if not self.supported:
+            return None
+        candidates = (self.command,) if self.command else self.commands
+        for command in candidates:
+            value = self.parse(await self.rcon.execute(command))
+            if value is not None:
+                self.command = command
+                return value
+        if self.command is None:
+            print(f"{self.name}: el servidor no responde a ningún comando de medida conocido.")
+            self.supported = False
+        return None
+
+
+class MsptProbe(RconMetricProbe):
+    """Mide el MSPT medio por RCON."""
+
+    def __init__(self, rcon: RCONConnectionPool):
+        super().__init__(rcon, "MSPT", MSPT_COMMANDS, parse_mspt)
+
+
+class EntityCountProbe(RconMetricProbe):
+    """Cuenta las entidades cargadas en todas las dimensiones."""
+
+    def __init__(self, rcon: RCONConnectionPool):
+        super().__init__(rcon, "Entidades", ENTITY_COUNT_COMMANDS, parse_entity_count)
+
+
+class ChunkCountProbe(RconMetricProbe):
+    """Cuenta los chunks cargados (solo Paper y derivados)."""
+
+    def __init__(self, rcon: RCONConnectionPool):
+        super().__init__(rcon, "Chunks", CHUNK_COUNT_COMMANDS, parse_chunk_count)
@@ -0,0 +1,207 @@
+import asyncio
+import json
+import socket
+import struct
+import time
+
+# Entendiendo el Server List Ping (SLP)
+# Es el protocolo que usa el cliente de Minecraft para mostrar la lista de servidores.
+# Funciona sobre el puerto del juego, no necesita contraseña y no ejecuta comandos.
+# Cada paquete es: Longitud (VarInt) | ID de paquete (VarInt) | Datos
+# 1. Handshake (ID 0x00): versión de protocolo, dirección, puerto y estado siguiente (1 = status).
+# 2. Status Request (ID 0x00, sin datos): el servidor responde con un JSON con la
+#    versión, los jugadores (online, max y una muestra de nombres) y el MOTD.
+# 3. Ping (ID 0x01, un entero de 8 bytes): el servidor devuelve el mismo valor (Pong),
+#    lo que permite medir la latencia.
+
+HANDSHAKE_PACKET_ID = 0x00
+STATUS_REQUEST_PACKET_ID = 0x00
+PING_PACKET_ID = 0x01
+NEXT_STATE_STATUS = 1
+NEXT_STATE_LOGIN = 2
+# Versión de protocolo "desconocida": los servidores responden al status igualmente.
+ANY_PROTOCOL_VERSION = -1
+MAX_PACKET_LENGTH = 1 << 21
+
+
+class SLPError(Exception):
+    """La respuesta del Server List Ping no es válida."""
+
+    pass
+
+
+class SLPConnectionError(SLPError):
+    """No se pudo conectar al puerto del juego."""
+
+    pass
+
+
+def encode_varint(value: int) -> bytes:
+    """Codifica un entero de 32 bits como VarInt (los negativos usan 5 bytes)."""
+    value &= 0xFFFFFFFF
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def decode_varint(data: bytes, offset: int = 0) -> tuple[int, int]:
+    """Decodifica un VarInt de `data` y devuelve (valor, nuevo offset)."""
+    result = 0
+    for shift in range(0, 35, 7):
+        if offset >= len(data):
+            raise SLPError("VarInt incompleto.")
+        byte = data[offset]
+        offset += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            if result & 0x80000000:
+                result -= 1 << 32
+            return result, offset
+    raise SLPError("VarInt demasiado largo.")
+
+
+async def read_varint(reader: asyncio.StreamReader) -> int:
+    """Lee un VarInt directamente del stream."""
+    result = 0
+    for shift in range(0, 35, 7):
+        byte = (await reader.readexactly(1))[0]
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            if result & 0x80000000:
+                result -= 1 << 32
+            return result
+    raise SLPError("VarInt demasiado largo.")
+
+
+def encode_string(value: str) -> bytes:
+    data = value.encode("utf-8")
+    return encode_varint(len(data)) + data
+
+
+def encode_packet(packet_id: int, payload: bytes = b"") -> bytes:
+    """Añade el ID y la longitud a los datos de un paquete."""
+    body = encode_varint(packet_id) + payload
+    return encode_varint(len(body)) + body
+
+
+async def read_packet(reader: asyncio.StreamReader) -> tuple[int, bytes]:
+    """Lee un paquete completo y devuelve (ID, datos)."""
+    length = await read_varint(reader)
+    if not 0 < length <= MAX_PACKET_LENGTH:
+        raise SLPError(f"Longitud de paquete inválida: {length}")
+    body = await reader.readexactly(length)
+    packet_id, offset = decode_varint(body)
+    return packet_id, body[offset:]
+
+
+def encode_handshake(host: str, port: int, next_state: int) -> bytes:
+    return encode_packet(
+        HANDSHAKE_PACKET_ID,
+        encode_varint(ANY_PROTOCOL_VERSION)
+        + encode_string(host)
+        + struct.pack(">H", port)
+        + encode_varint(next_state),
+    )
+
+
+def flatten_motd(description) -> str:
+    """Convierte el MOTD (texto plano o componente de chat JSON) en texto."""
+    if isinstance(description, str):
+        return description
+    if isinstance(description, dict):
+        text = description.get("text", "")
+        for extra in description.get("extra", []):
+            text += flatten_motd(extra)
+        return text
+    if isinstance(description, list):
+        return "".join(flatten_motd(part) for part in description)
+    return ""
+
+
+class SLPStatus:
+    """Resultado de un Server List Ping."""
+
+    def __init__(self, data: dict, latency_ms: float):
+        players = data.get("players", {})
+        version = data.get("version", {})
+        self.online_players: int = int(players.get("online", 0))
+        self.max_players: int = int(players.get("max", 0))
+        self.sample: list[str] = [
+            player.get("name", "") for player in players.get("sample", []) or []
+        ]
+        self.version_name: str = version.get("name", "")
+        self.protocol: int = int(version.get("protocol", -1))
+        self.motd: str = flatten_motd(data.get("description", ""))
+        self.latency_ms = latency_ms
+        self.raw = data
+
+    def __repr__(self) -> str:
+        return (
+            f"SLPStatus(players={self.online_players}/{self.max_players}, "
+            f"version={self.version_name!r}, latency_ms={self.latency_ms:.1f})"
+        )
+
+
+async def query_server_list_ping(
+    host: str, port: int = 25565, timeout: float = 5
+) -> SLPStatus:
+    """
+    Consulta el estado del servidor mediante Server List Ping.
+
+    Lanza `SLPConnectionError` si nadie escucha en el puerto y `asyncio.TimeoutError`
+    si el puerto acepta la conexión pero el servidor no responde (colgado).
+    """
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(host, port), timeout
+        )
+    except (asyncio.TimeoutError, OSError, socket.gaierror) as e:
+        raise SLPConnectionError(f"No se pudo conectar a {host}:{port}: {e}")
+
+    try:
+        start = time.perf_counter()
+        writer.write(
+            encode_handshake(host, port, NEXT_STATE_STATUS)
+            + encode_packet(STATUS_REQUEST_PACKET_ID)
+        )
+        await writer.drain()
+
+        try:
+            packet_id, payload = await asyncio.wait_for(read_packet(reader), timeout)
+        except asyncio.IncompleteReadError as e:
+            raise SLPError(f"El servidor cerró la conexión sin responder: {e}")
+        latency_ms = (time.perf_counter() - start) * 1000
+        if packet_id != STATUS_REQUEST_PACKET_ID:
+            raise SLPError(f"Se esperaba la respuesta de status y llegó el paquete {packet_id}.")
+        length, offset = decode_varint(payload)
+        try:
+            data = json.loads(payload[offset : offset + length].decode("utf-8"))
+        except ValueError as e:
+            raise SLPError(f"JSON de status inválido: {e}")
+
+        # La latencia se mide con el ping/pong, igual que el cliente del juego. Si el
+        # servidor no lo implementa se usa el tiempo de respuesta del status.
+        token = time.monotonic_ns() & 0x7FFFFFFFFFFFFFFF
+        start = time.perf_counter()
+        writer.write(encode_packet(PING_PACKET_ID, struct.pack(">q", token)))
+        try:
+            await writer.drain()
+            packet_id, payload = await asyncio.wait_for(read_packet(reader), timeout)
+            if packet_id == PING_PACKET_ID and payload[:8] == struct.pack(">q", token):
+                latency_ms = (time.perf_counter() - start) * 1000
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            pass
+
+        return SLPStatus(data, latency_ms)
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
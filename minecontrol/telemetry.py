@@ -0,0 +1,232 @@
+import math
+import os
+import time
+from array import array
+from collections import deque
+from pathlib import Path
+
+# Entendiendo la telemetría del servidor
+# Un muestreador toma cada pocos segundos el MSPT (y de ahí los TPS), la CPU y la
+# memoria del proceso del servidor, los jugadores y, con menos frecuencia, los chunks
+# y entidades cargados. Todo se guarda en memoria, en series de tamaño fijo:
+# - Cada serie es un buffer circular sobre `array` (sumas y cuentas por franja), sin
+#   objetos por muestra: la memoria no crece por mucho que dure el bot.
+# - Cada métrica tiene tres niveles: la resolución del muestreo durante la última
+#   hora, medias por minuto del último día y medias por hora del último mes. Cada
+#   muestra se suma a los tres a la vez; no hace falta un proceso que compacte.
+# - Una franja sin muestras (servidor apagado, comando no soportado) queda vacía y
+#   la gráfica muestra un hueco en lugar de inventar un valor.
+# La CPU y la memoria se leen de /proc del proceso más pesado que cuelga del de
+# `start.sh` (la JVM), así que solo están disponibles en Linux.
+
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+SPARKLINE_WIDTH = 40
+
+# Métricas: nombre -> (etiqueta, unidad, decimales).
+METRICS = {
+    "tps": ("TPS", "", 1),
+    "mspt": ("MSPT", "ms", 1),
+    "cpu": ("CPU", "%", 0),
+    "rss": ("Memoria", "MB", 0),
+    "players": ("Jugadores", "", 0),
+    "chunks": ("Chunks", "", 0),
+    "entities": ("Entidades", "", 0),
+}
+
+# Niveles: nombre -> (resolución en segundos, duración en segundos). La resolución
+# del primero (None) es el intervalo de muestreo.
+TIERS = {
+    "hora": (None, 3600),
+    "dia": (60, 86400),
+    "mes": (3600, 30 * 86400),
+}
+
+PROC = Path("/proc")
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+MB = 1024 * 1024
+
+
+class RingSeries:
+    """Serie temporal de tamaño fijo con la media de las muestras de cada franja."""
+
+    def __init__(self, resolution: float, capacity: int):
+        self.resolution = resolution
+        self.capacity = capacity
+        self._sums = array("d", [0.0]) * capacity
+        self._counts = array("L", [0]) * capacity
+        # Franja absoluta (tiempo // resolución) de la muestra más reciente.
+        self._newest: int | None = None
+
+    def add(self, timestamp: float, value: float):
+        bucket = int(timestamp // self.resolution)
+        if self._newest is None or bucket > self._newest:
+            # Las franjas que se reutilizan al avanzar dejan de tener datos.
+            first = bucket - self.capacity + 1
+            if self._newest is not None:
+                first = max(first, self._newest + 1)
+            for skipped in range(first, bucket + 1):
+                slot = skipped % self.capacity
+                self._sums[slot] = 0.0
+                self._counts[slot] = 0
+            self._newest = bucket
+        elif bucket <= self._newest - self.capacity:
+            return
+        slot = bucket % self.capacity
+        self._sums[slot] += value
+        self._counts[slot] += 1
+
+    def values(self, now: float | None = None) -> list[float]:
+        """Medias por franja, de la más antigua a la de `now`. NaN = sin muestras."""
+        end = int((now if now is not None else time.time()) // self.resolution)
+        values = []
+        for bucket in range(end - self.capacity + 1, end + 1):
+            slot = bucket % self.capacity
+            if (
+                self._newest is None
+                or bucket > self._newest
+                or bucket <= self._newest - self.capacity
+                or not self._counts[slot]
+            ):
+                values.append(math.nan)
+            else:
+                values.append(self._sums[slot] / self._counts[slot])
+        return values
+
+
+class TelemetryStore:
+    """Historial en memoria de todas las métricas de un servidor, en sus tres niveles."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._series: dict[str, dict[str, RingSeries]] = {}
+        for metric in METRICS:
+            tiers = {}
+            for tier, (resolution, span) in TIERS.items():
+                resolution = resolution or interval
+                tiers[tier] = RingSeries(resolution, max(1, math.ceil(span / resolution)))
+            self._series[metric] = tiers
+        self.latest: dict[str, tuple[float, float]] = {}
+
+    def record(self, values: dict[str, float | None], timestamp: float | None = None):
+        """Añade una muestra. Las métricas ausentes o a None no se registran."""
+        timestamp = timestamp if timestamp is not None else time.time()
+        for metric, value in values.items():
+            if value is None or metric not in self._series:
+                continue
+            for series in self._series[metric].values():
+                series.add(timestamp, value)
+            self.latest[metric] = (timestamp, value)
+
+    def window(self, metric: str, tier: str, now: float | None = None) -> list[float]:
+        return self._series[metric][tier].values(now)
+
+
+def format_value(metric: str, value: float) -> str:
+    _, unit, decimals = METRICS[metric]
+    return f"{value:.{decimals}f}{' ' + unit if unit and unit != '%' else unit}"
+
+
+def sparkline(values: list[float], width: int = SPARKLINE_WIDTH) -> str:
+    """Gráfica de una línea con `width` columnas (media de cada tramo); huecos en blanco."""
+    width = min(width, len(values))
+    if width <= 0:
+        return ""
+    columns = []
+    for column in range(width):
+        start = column * len(values) // width
+        end = (column + 1) * len(values) // width
+        present = [value for value in values[start:end] if not math.isnan(value)]
+        columns.append(sum(present) / len(present) if present else math.nan)
+
+    present = [value for value in columns if not math.isnan(value)]
+    if not present:
+        return " " * width
+    low, high = min(present), max(present)
+    chars = []
+    for value in columns:
+        if math.isnan(value):
+            chars.append(" ")
+        elif high == low:
+            chars.append(SPARK_CHARS[len(SPARK_CHARS) // 2])
+        else:
+            level = round((value - low) / (high - low) * (len(SPARK_CHARS) - 1))
+            chars.append(SPARK_CHARS[level])
+    return "".join(chars)
+
+
+def read_process_stat(pid: int) -> tuple[int, float, int] | None:
+    """Lee /proc/<pid>/stat. Devuelve (ppid, segundos de CPU, bytes en RAM) o None."""
+    try:
+        data = (PROC / str(pid) / "stat").read_text()
+    except OSError:
+        return None
+    # El nombre del proceso va entre paréntesis y puede contener espacios.
+    fields = data[data.rfind(")") + 2 :].split()
+    try:
+        ppid = int(fields[1])
+        cpu_seconds = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+        rss_bytes = int(fields[21]) * PAGE_SIZE
+    except (IndexError, ValueError):
+        return None
+    return ppid, cpu_seconds, rss_bytes
+
+
+def find_server_process(root_pid: int) -> int | None:
+    """
+    Función bloqueante que busca la JVM: el proceso con más memoria entre `root_pid`
+    y sus descendientes (`start.sh` suele lanzar java como hijo).
+    """
+    children: dict[int, list[int]] = {}
+    rss: dict[int, int] = {}
+    try:
+        entries = [entry.name for entry in os.scandir(PROC) if entry.name.isdigit()]
+    except OSError:
+        return None
+    for name in entries:
+        stat = read_process_stat(int(name))
+        if stat is None:
+            continue
+        ppid, _, rss_bytes = stat
+        children.setdefault(ppid, []).append(int(name))
+        rss[int(name)] = rss_bytes
+    if root_pid not in rss:
+        return None
+
+    best = root_pid
+    pending = deque([root_pid])
+    while pending:
+        pid = pending.popleft()
+        if rss.get(pid, 0) > rss[best]:
+            best = pid
+        pending.extend(children.get(pid, []))
+    return best
+
+
+class ProcessStats:
+    """CPU (en % de un núcleo) y memoria del proceso del servidor, leídas de /proc."""
+
+    def __init__(self):
+        self.root_pid: int | None = None
+        self.pid: int | None = None
+        self._last: tuple[float, float] | None = None
+
+    def sample(self, root_pid: int) -> tuple[float | None, float | None]:
+        """Función bloqueante. Devuelve (CPU %, memoria en MB); None si no se puede leer."""
+        stat = read_process_stat(self.pid) if self.pid is not None else None
+        if root_pid != self.root_pid or stat is None:
+            # Servidor reiniciado o primera muestra: volver a buscar la JVM.
+            self.root_pid = root_pid
+            self.pid = find_server_process(root_pid)
+            self._last = None
+            stat = read_process_stat(self.pid) if self.pid is not None else None
+            if stat is None:
+                return None, None
+
+        _, cpu_seconds, rss_bytes = stat
+        now = time.monotonic()
+        cpu_percent = None
+        if self._last is not None and now > self._last[0]:
+            cpu_percent = max(0.0, (cpu_seconds - self._last[1]) / (now - self._last[0]) * 100)
+        self._last = (now, cpu_seconds)
+        return cpu_percent, rss_bytes / MB
@@ -0,0 +1,172 @@
+import asyncio
+import json
+from typing import Awaitable, Callable
+
+from .slp_client import (
+    NEXT_STATE_LOGIN,
+    NEXT_STATE_STATUS,
+    PING_PACKET_ID,
+    STATUS_REQUEST_PACKET_ID,
+    SLPError,
+    decode_varint,
+    encode_packet,
+    encode_string,
+    read_packet,
+)
+
+# Entendiendo el despertar al entrar (wake-on-join)
+# Con el servidor apagado nadie escucha en el puerto del juego y el cliente muestra
+# "No se puede conectar". Este listener ocupa ese puerto mientras tanto y habla lo
+# justo del protocolo de Minecraft:
+# - Server List Ping (estado 1): responde con un MOTD de "dormido" y 0 jugadores.
+#   Devuelve la misma versión de protocolo que envía el cliente para que la lista de
+#   servidores no lo marque como incompatible.
+# - Login (estado 2, o 3 = transferencia): lee el nombre del jugador del paquete
+#   Login Start, le desconecta con un mensaje ("vuelve a entrar en un minuto") y
+#   avisa a `on_wake`, que libera el puerto y arranca el servidor de verdad.
+# El mensaje de desconexión del estado login es un componente de chat en JSON en
+# todas las versiones.
+
+NEXT_STATE_TRANSFER = 3
+LOGIN_START_PACKET_ID = 0x00
+LOGIN_DISCONNECT_PACKET_ID = 0x00
+CLIENT_TIMEOUT = 10.0
+SLEEPING_MAX_PLAYERS = 20
+
+WakeCallback = Callable[[str], Awaitable[None]]
+
+
+def decode_string(data: bytes, offset: int = 0) -> tuple[str, int]:
+    length, offset = decode_varint(data, offset)
+    if length < 0 or offset + length > len(data):
+        raise SLPError("Cadena incompleta.")
+    return data[offset : offset + length].decode("utf-8", errors="replace"), offset + length
+
+
+class WakeOnJoinListener:
+    """
+    Escucha en el puerto del juego mientras el servidor duerme y lo despierta
+    cuando un jugador intenta entrar.
+
+    `allowed_players` limita quién puede despertarlo (vacío = cualquiera). `on_wake`
+    se llama una sola vez, con el nombre del jugador, en una tarea aparte.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        on_wake: WakeCallback,
+        motd: str = "Servidor dormido. Entra para despertarlo.",
+        wake_message: str = "El servidor se está iniciando. Vuelve a entrar en un minuto.",
+        allowed_players: list[str] | None = None,
+    ):
+        self.host = host
+        self.port = port
+        self.on_wake = on_wake
+        self.motd = motd
+        self.wake_message = wake_message
+        self.allowed_players = {name.lower() for name in allowed_players or []}
+        self.woken_by: str | None = None
+        self._server: asyncio.AbstractServer | None = None
+        self._clients: dict[asyncio.StreamWriter, asyncio.Task] = {}
+        self._wake_task: asyncio.Task | None = None
+
+    @property
+    def is_serving(self) -> bool:
+        return self._server is not None
+
+    async def start(self) -> int:
+        """Ocupa el puerto y devuelve el asignado. Lanza OSError si está en uso."""
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def stop(self):
+        """Libera el puerto y corta las conexiones a medias."""
+        if self._server is None:
+            return
+        self._server.close()
+        tasks = list(self._clients.values())
+        for writer, task in list(self._clients.items()):
+            writer.transport.abort()
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self._server.wait_closed()
+        self._server = None
+
+    def status_json(self, protocol: int) -> dict:
+        return {
+            "version": {"name": "Dormido", "protocol": protocol},
+            "players": {"max": SLEEPING_MAX_PLAYERS, "online": 0, "sample": []},
+            "description": {"text": self.motd},
+        }
+
+    def can_wake(self, player: str) -> bool:
+        return not self.allowed_players or player.lower() in self.allowed_players
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._clients[writer] = asyncio.current_task()  # type: ignore
+        try:
+            await asyncio.wait_for(self._converse(reader, writer), CLIENT_TIMEOUT)
+        except (
+            ConnectionError,
+            asyncio.IncompleteReadError,
+            asyncio.TimeoutError,
+            asyncio.CancelledError,
+            SLPError,
+        ):
+            pass
+        finally:
+            self._clients.pop(writer, None)
+            writer.close()
+
+    async def _converse(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        _, handshake = await read_packet(reader)
+        protocol, offset = decode_varint(handshake)
+        _, offset = decode_string(handshake, offset)  # dirección
+        offset += 2  # puerto
+        next_state, _ = decode_varint(handshake, offset)
+
+        if next_state == NEXT_STATE_STATUS:
+            while True:
+                packet_id, payload = await read_packet(reader)
+                if packet_id == STATUS_REQUEST_PACKET_ID:
+                    document = json.dumps(self.status_json(protocol))
+                    writer.write(encode_packet(STATUS_REQUEST_PACKET_ID, encode_string(document)))
+                elif packet_id == PING_PACKET_ID:
+                    writer.write(encode_packet(PING_PACKET_ID, payload))
+                    await writer.drain()
+                    return
+                await writer.drain()
+
+        elif next_state in (NEXT_STATE_LOGIN, NEXT_STATE_TRANSFER):
+            packet_id, payload = await read_packet(reader)
+            if packet_id != LOGIN_START_PACKET_ID:
+                return
+            player, _ = decode_string(payload)
+            allowed = self.can_wake(player)
+            if allowed:
+                message = self.wake_message
+            else:
+                message = "No tienes permiso para despertar este servidor."
+                print(f"Wake-on-join: '{player}' no puede despertar el servidor.")
+            try:
+                writer.write(
+                    encode_packet(
+                        LOGIN_DISCONNECT_PACKET_ID, encode_string(json.dumps({"text": message}))
+                    )
+                )
+                await writer.drain()
+            finally:
+                # Después de responder: despertar libera el puerto y corta las conexiones.
+                if allowed:
+                    self._wake(player)
+
+    def _wake(self, player: str):
+        if self._wake_task is not None:
+            # Ya se está despertando; los demás solo reciben el mensaje.
+            return
+        self.woken_by = player
+        # Fuera de las tareas de los clientes: `on_wake` llama a `stop`, que las cancela.
+        self._wake_task = asyncio.create_task(self.on_wake(player))
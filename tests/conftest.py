@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Los servidores simulados viven en `benchmarks/`, fuera del paquete instalado.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
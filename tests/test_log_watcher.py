@@ -0,0 +1,66 @@
+import pytest
+
+from minecontrol.log_watcher import LogEventParser, LogEventType
+
+
+def parse(*lines: str):
+    parser = LogEventParser()
+    events = []
+    for line in lines:
+        events.extend(parser.feed_line(line))
+    events.extend(parser.flush())
+    return events
+
+
+def test_server_ready():
+    (event,) = parse('[12:00:00] [Server thread/INFO]: Done (12.345s)! For help, type "help"')
+    assert event.type == LogEventType.SERVER_READY
+    assert event.startup_seconds == pytest.approx(12.345)
+
+
+def test_player_joined_and_left():
+    joined, left = parse(
+        "[12:00:00] [Server thread/INFO]: Steve joined the game",
+        "[12:05:00] [Server thread/INFO]: Steve left the game",
+    )
+    assert (joined.type, joined.player) == (LogEventType.PLAYER_JOINED, "Steve")
+    assert (left.type, left.player) == (LogEventType.PLAYER_LEFT, "Steve")
+
+
+@pytest.mark.parametrize(
+    "line",
+    [
+        "[12:00:00] [Server thread/INFO]: All dimensions are saved",
+        "[12:00:00] [Server thread/INFO]: ThreadedAnvilChunkStorage: All dimensions are saved",
+        "[12:00:00] [Server thread/INFO]: ThreadedAnvilChunkStorage (world): All dimensions are saved",
+        "[12:00:00] [Server thread/INFO]: ChunkMap: All dimensions are saved",
+    ],
+)
+def test_server_stopped(line):
+    (event,) = parse(line)
+    assert event.type == LogEventType.SERVER_STOPPED
+
+
+def test_chat_is_not_a_stop():
+    assert parse("[12:00:00] [Server thread/INFO]: <Steve> All dimensions are saved") == []
+    assert parse("[12:00:00] [Server thread/INFO]: <Steve> Steve joined the game") == []
+
+
+def test_overloaded():
+    (event,) = parse(
+        "[12:00:00] [Server thread/WARN]: Can't keep up! Is the server overloaded? "
+        "Running 2500ms or 50 ticks behind"
+    )
+    assert event.type == LogEventType.SERVER_OVERLOADED
+    assert event.lag_ms == 2500
+
+
+def test_crash_collects_stack_trace():
+    events = parse(
+        "[12:00:00] [Server thread/ERROR]: Encountered an unexpected exception",
+        "java.lang.NullPointerException: boom",
+        "\tat net.minecraft.server.MinecraftServer.tick(MinecraftServer.java:1)",
+        "[12:00:01] [Server thread/INFO]: Stopping server",
+    )
+    assert [event.type for event in events] == [LogEventType.CRASH, LogEventType.SERVER_STOPPING]
+    assert events[0].details.count("\n") == 2
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from benchmarks.fake_servers import MAX_RESPONSE_PAYLOAD, FakeRCONServer
+from minecontrol.rcon_client import SimpleRCONClient
+from minecontrol.rcon_codec import (
+    SERVERDATA_EXECCOMMAND,
+    PacketDecoder,
+    PacketEncoder,
+    RCONProtocolError,
+    encode_packet,
+)
+
+
+def test_codec_round_trip():
+    encoder = PacketEncoder(initial_size=16)
+    encoder.add(1, SERVERDATA_EXECCOMMAND, "list")
+    encoder.add(2, SERVERDATA_EXECCOMMAND, "say ñandú")
+    encoder.add(3, SERVERDATA_EXECCOMMAND, "")
+    data = encoder.take()
+    assert data.startswith(encode_packet(1, SERVERDATA_EXECCOMMAND, "list"))
+
+    decoder = PacketDecoder()
+    packets = []
+    # Entregar los bytes de uno en uno para cubrir las lecturas parciales.
+    for i in range(len(data)):
+        decoder.feed(data[i : i + 1])
+        packets.extend(decoder.packets())
+    assert packets == [
+        (1, SERVERDATA_EXECCOMMAND, b"list"),
+        (2, SERVERDATA_EXECCOMMAND, "say ñandú".encode()),
+        (3, SERVERDATA_EXECCOMMAND, b""),
+    ]
+    assert len(decoder) == 0
+
+
+def test_codec_rejects_invalid_length():
+    decoder = PacketDecoder()
+    decoder.feed(b"\x01\x00\x00\x00" + b"\x00" * 12)
+    with pytest.raises(RCONProtocolError):
+        decoder.next_packet()
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_split_response_is_reassembled(pipelined):
+    long_response = "x" * (MAX_RESPONSE_PAYLOAD * 2 + 123)
+
+    async def main():
+        async with FakeRCONServer() as server:
+            server.responses["long"] = long_response
+            client = SimpleRCONClient("127.0.0.1", server.port, server.password, pipelined=pipelined)
+            async with client:
+                results = await asyncio.gather(
+                    client.execute("long"), client.execute("list"), client.execute("long")
+                )
+        return results
+
+    long_1, listed, long_2 = asyncio.run(main())
+    assert long_1 == long_2 == long_response
+    assert listed.startswith("There are 0 of a max of 20 players online")
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_execute_many(pipelined):
+    async def main():
+        async with FakeRCONServer(players=["Steve", "Alex"]) as server:
+            client = SimpleRCONClient("127.0.0.1", server.port, server.password, pipelined=pipelined)
+            async with client:
+                return await client.execute_many(["list", "save-off", "save-on"])
+
+    assert asyncio.run(main()) == [
+        "There are 2 of a max of 20 players online: Steve, Alex",
+        "Automatic saving is now disabled",
+        "Automatic saving is now enabled",
+    ]
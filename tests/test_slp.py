@@ -0,0 +1,34 @@
+import asyncio
+
+import pytest
+
+from benchmarks.fake_servers import FakeSLPServer
+from minecontrol.slp_client import decode_varint, encode_varint, query_server_list_ping
+
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 25565, 2**31 - 1, -1])
+def test_varint_round_trip(value):
+    data = encode_varint(value)
+    assert decode_varint(data) == (value, len(data))
+
+
+def test_query_server_list_ping():
+    async def main():
+        async with FakeSLPServer(players=["Steve"], motd="Hola") as server:
+            return await query_server_list_ping("127.0.0.1", server.port, timeout=2)
+
+    status = asyncio.run(main())
+    assert status.online_players == 1
+    assert status.max_players == 20
+    assert status.sample == ["Steve"]
+    assert status.version_name == "1.21.1"
+    assert status.motd == "Hola"
+
+
+def test_query_hung_server_times_out():
+    async def main():
+        async with FakeSLPServer(hang=True) as server:
+            await query_server_list_ping("127.0.0.1", server.port, timeout=0.2)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(main())